@@ -9,20 +9,36 @@ Guarda los videos descargados en el directorio de salidas con integración de ba
 # ============================================================================
 
 # Librerías estándar de Python
+import heapq  # Cola de prioridad para reintentos programados
+import itertools  # Contador de secuencia para la cola de reintentos
 import json  # Para manejar archivos JSON (logs y metadatos)
 import logging  # Para crear logs detallados del sistema
 import os  # Para operaciones del sistema operativo
+import signal  # Para drenar descargas en curso al recibir SIGTERM
 import sys  # Para argumentos de línea de comandos y control del sistema
+import time  # Para programar reintentos con backoff
+import threading  # Para estado por hilo (una instancia de yt-dlp por worker)
 import uuid  # Para generar identificadores únicos de sesión
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait  # Pool de workers de descarga
 from datetime import datetime  # Para timestamps y manejo de fechas
 from pathlib import Path  # Para manejo moderno de rutas de archivos
 
 # Librerías externas instaladas via pip
+# yt_dlp y tqdm tardan en importarse y solo hacen falta al descargar:
+# se importan dentro de _create_ydl y download_videos (arranque más rápido)
 import colorama  # Para colores en la terminal multiplataforma
-import yt_dlp  # Motor principal para descargar videos de TikTok
+from archive_index import AlreadyArchivedError, ArchiveIndex  # Índice de videos ya descargados
 from colorama import Back, Fore, Style  # Específicamente para colores de texto
+from config import load_config  # Lectura de configs/database_config.ini
+from content_store import ContentStore  # Almacén direccionado por contenido (SHA-256)
 from database import TikTokDatabase  # Nuestro módulo personalizado para base de datos
-from tqdm import tqdm  # Para barras de progreso elegantes
+from info_cache import InfoCache  # Caché persistente de metadatos con TTL y LRU
+from output_layout import filename_template_from_config, layout_from_config  # Subdirectorios de salida
+from quota import DiskQuota  # Presupuestos de disco, desalojo LRU y espacio libre
+from retry import DISK_FULL, RetryPolicy, classify_error  # Clasificación de errores y backoff con jitter
+from timing import DB_WRITE, DOWNLOAD, EXTRACT, LOG_WRITE, POST_PROCESS, StageTimer  # Tiempos por etapa
+from url_sources import SUPPORTED_EXTENSIONS, IngestStats, iter_urls  # Lectura en streaming de archivos de URLs
+from url_utils import UrlCanonicalizer, extract_video_id  # Normalización de URLs de TikTok
 
 # ============================================================================
 # CONFIGURACIÓN INICIAL
@@ -32,6 +48,13 @@ from tqdm import tqdm  # Para barras de progreso elegantes
 # autoreset=True hace que los colores se restablezcan automáticamente después de cada print
 colorama.init(autoreset=True)
 
+# Segundos entre comprobaciones de URLs nuevas mientras se escribe el journal
+JOURNAL_POLL_INTERVAL = 0.2
+
+# URLs por transacción del journal de una sesión nueva: lotes pequeños para
+# que las primeras descargas no esperen a leer mucha entrada
+JOURNAL_BATCH_SIZE = 200
+
 # ============================================================================
 # CLASE PRINCIPAL: TikTokDownloader
 # ============================================================================
@@ -49,11 +72,15 @@ class TikTokDownloader:
     - Proporcionar interfaz de usuario (CLI)
     """
     
-    def __init__(self):
+    def __init__(self, base_dir=None, config_path=None):
         """
         Constructor: Inicializa el descargador configurando todas las rutas necesarias
         y preparando el entorno de trabajo.
         
+        Parámetros:
+            base_dir (Path): Directorio base con data/ y outputs/ (por defecto TikTokVault)
+            config_path (Path): Archivo de configuración (por defecto configs/database_config.ini)
+        
         Pasos que realiza:
         1. Define la estructura de directorios del proyecto
         2. Crea directorios faltantes automáticamente
@@ -69,7 +96,8 @@ class TikTokDownloader:
         # __file__ = ruta actual del archivo TikTokDL.py
         # .parent = directorio src
         # .parent = directorio TikTokVault (nuestro directorio base)
-        self.base_dir = Path(__file__).parent.parent  # TikTokVault directory
+        # (se puede indicar otro, p. ej. un directorio temporal en los benchmarks)
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent  # TikTokVault directory
         
         # Define las rutas principales del proyecto
         self.data_dir = self.base_dir / "data"        # Archivos de entrada (URLs)
@@ -99,7 +127,98 @@ class TikTokDownloader:
         
         # Inicializa la conexión con la base de datos SQLite
         # Esto crea las tablas necesarias si no existen
-        self.db = TikTokDatabase()
+        self.db = TikTokDatabase(self.outputs_dir / "tiktok_videos.db")
+        
+        # Índice de IDs ya archivados (filtro Bloom en memoria + confirmación en SQLite)
+        # Se consulta ANTES de cualquier petición de red para saltar videos conocidos
+        self.archive_index = ArchiveIndex(self.db)
+        
+        # ====================================================================
+        # CONFIGURACIÓN DE RENDIMIENTO
+        # ====================================================================
+        
+        # Lee configs/database_config.ini (usa valores por defecto si no existe)
+        self.config = load_config(config_path)
+        
+        # Número de workers del motor de descarga ([performance] concurrent_downloads)
+        # max(1, ...) evita valores inválidos como 0 o negativos
+        self.concurrent_downloads = max(1, self.config.getint('performance', 'concurrent_downloads', fallback=1))
+        
+        # Política de reintentos ([performance] retry_count): solo errores transitorios
+        # (rate limit y red) se reintentan, con backoff exponencial y jitter
+        self.retry_policy = RetryPolicy(self.config.getint('performance', 'retry_count', fallback=3))
+        
+        # Caché negativa ([cache] skip_known_failures): las URLs que fallaron
+        # definitivamente se saltan hasta que pase su tiempo de espera
+        # (p. ej. 30 días para videos eliminados, 1 hora para errores de red)
+        self.skip_known_failures = self.config.getboolean('cache', 'skip_known_failures', fallback=True)
+        
+        # Timeout de conexión en segundos ([performance] timeout)
+        self.timeout = self.config.getfloat('performance', 'timeout', fallback=30)
+        
+        # Caché persistente de metadatos ([cache] en la configuración)
+        # Evita volver a extraer videos procesados hace poco
+        if self.config.getboolean('cache', 'enable_info_cache', fallback=True):
+            self.info_cache = InfoCache(
+                self.outputs_dir / "cache" / "info_cache.db",
+                ttl_seconds=self.config.getfloat('cache', 'info_cache_ttl_hours', fallback=6) * 3600,
+                max_bytes=int(self.config.getfloat('cache', 'info_cache_max_mb', fallback=256) * 1024 * 1024))
+        else:
+            self.info_cache = None
+        
+        # Organización de outputs/videos ([output] layout): plano, por creador,
+        # por fecha o por prefijo de hash del ID, para no acumular cientos de
+        # miles de archivos en un solo directorio
+        self.output_layout = layout_from_config(self.config, self.videos_dir)
+        
+        # Nombre de los archivos ([output] filename_template / id_filenames)
+        self.filename_template = filename_template_from_config(self.config)
+        
+        # Almacén direccionado por contenido ([storage] content_addressed):
+        # cada video idéntico se guarda una sola vez en outputs/store y se
+        # expone en outputs/videos mediante un enlace (hardlink o symlink)
+        if self.config.getboolean('storage', 'content_addressed', fallback=False):
+            self.content_store = ContentStore(
+                self.outputs_dir / "store",
+                link_mode=self.config.get('storage', 'link_mode', fallback='hardlink'))
+        else:
+            self.content_store = None
+        
+        # Cuotas de disco ([storage] max_vault_gb, max_creator_gb, min_free_gb):
+        # antes de cada descarga se desalojan los videos menos prioritarios o
+        # menos consultados si se supera el presupuesto, y el motor se pausa
+        # si el disco se queda sin espacio libre en lugar de fallar las URLs
+        self.disk_quota = DiskQuota.from_config(self.db, self.videos_dir, self.config,
+                                                store_root=self.outputs_dir / "store")
+        
+        # Normalizador de URLs: resuelve enlaces cortos en paralelo (con caché
+        # persistente en la base de datos) y elimina duplicados
+        self.url_canonicalizer = UrlCanonicalizer(self.db, timeout=self.timeout)
+        
+        # Tiempos por etapa de cada URL (extracción, descarga, post-proceso,
+        # base de datos, journal); se reinicia en cada sesión y se exporta
+        # como JSON y en formato Prometheus ([metrics] en la configuración)
+        self.timer = StageTimer()
+        self.timing_report = self.config.getboolean('metrics', 'timing_report', fallback=True)
+        prometheus_textfile = self.config.get('metrics', 'prometheus_textfile', fallback='').strip()
+        self.prometheus_textfile = Path(prometheus_textfile) if prometheus_textfile else self.logs_dir / "tiktokvault.prom"
+        
+        # Cada worker usa su propia instancia de yt_dlp.YoutubeDL (no es thread-safe)
+        # threading.local guarda la instancia del hilo actual
+        self._thread_state = threading.local()
+        self._ydl_instances = []             # Todas las instancias creadas, para cerrarlas al final
+        self._ydl_lock = threading.Lock()    # Protege la lista anterior y el contador
+        
+        # Llamadas a extract_info de la sesión actual (debe ser 1 por URL)
+        # y URLs resueltas desde la caché de metadatos sin tocar la red
+        self._extraction_count = 0
+        self._cache_hit_count = 0
+        
+        # Señal para detener el reparto de URLs (SIGTERM / Ctrl+C)
+        self._stop_event = threading.Event()
+        
+        # ID de la última sesión ejecutada (None si no había URLs)
+        self.last_session_id = None
         
         # ====================================================================
         # CONFIGURACIÓN DEL SISTEMA DE LOGGING
@@ -118,88 +237,102 @@ class TikTokDownloader:
         )
     
     # ========================================================================
-    # MÉTODO: CARGAR URLs DESDE ARCHIVO
+    # MÉTODO: CARGAR URLs DESDE ARCHIVO (STREAMING)
     # ========================================================================
     
-    def load_urls_from_file(self, filename="tiktok_urls.txt"):
+    def iter_urls_from_file(self, filename="tiktok_urls.txt"):
         """
-        Carga y valida URLs de TikTok desde un archivo de texto en el directorio de datos.
+        Lee, valida y normaliza URLs de TikTok de forma perezosa (generador),
+        de modo que la memoria no crece con el tamaño del archivo.
         
         Parámetros:
-            filename (str): Nombre del archivo a leer (por defecto: "tiktok_urls.txt")
+            filename (str): Nombre del archivo en el directorio de datos
+                            (.txt, .csv o .jsonl), o '-' para leer de stdin
         
-        Retorna:
-            list: Lista de URLs válidas de TikTok encontradas en el archivo
+        Produce:
+            str: URLs válidas y normalizadas (los duplicados tienen la misma URL
+                 canónica y los descarta el journal de la sesión)
         
         Funcionalidad:
         1. Verifica que el archivo exista
-        2. Lee línea por línea
+        2. Lee línea por línea según el formato (texto, CSV, JSONL o stdin)
         3. Filtra líneas vacías y comentarios (que empiecen con #)
-        4. Valida que contengan 'tiktok.com'
-        5. Muestra advertencias para URLs inválidas
-        6. Retorna lista limpia de URLs válidas
+        4. Valida cada línea con un patrón compilado de URL de TikTok
+        5. Agrupa las advertencias de líneas inválidas en un único resumen
+        6. Normaliza las URLs (resuelve enlaces cortos, quita parámetros)
         """
         
-        # Construye la ruta completa del archivo
-        file_path = self.data_dir / filename
+        # Construye la ruta completa del archivo ('-' significa stdin)
+        file_path = filename if filename == '-' else self.data_dir / filename
         
         # ====================================================================
         # VERIFICACIÓN DE EXISTENCIA DEL ARCHIVO
         # ====================================================================
         
         # Si el archivo no existe, muestra error y guías útiles
-        if not file_path.exists():
+        if filename != '-' and not file_path.exists():
             print(f"{Fore.RED}❌ File {filename} not found in data directory!")
             print(f"{Fore.YELLOW}💡 Create a file at: {file_path}")
             print(f"{Fore.YELLOW}💡 Add TikTok URLs, one per line")
-            return []  # Retorna lista vacía
+            return  # No produce ninguna URL
         
         # ====================================================================
-        # PROCESAMIENTO DEL ARCHIVO
+        # PROCESAMIENTO DEL ARCHIVO (EN STREAMING)
         # ====================================================================
         
-        urls = []  # Lista para almacenar URLs válidas
+        # download_videos consume este generador en un hilo aparte mientras
+        # descarga: los mensajes usan tqdm.write para no romper la barra
+        from tqdm import tqdm
+        
+        # Contadores agregados: sustituyen al aviso individual por línea
+        stats = IngestStats()
+        count = 0
         
         try:
-            # Abre el archivo con codificación UTF-8 para caracteres especiales
-            with open(file_path, 'r', encoding='utf-8') as file:
-                
-                # Procesa cada línea con numeración para reportes de error
-                for line_num, line in enumerate(file, 1):
-                    
-                    # Limpia espacios en blanco al inicio y final
-                    line = line.strip()
-                    
-                    # ============================================================
-                    # FILTRADO DE LÍNEAS
-                    # ============================================================
-                    
-                    # Salta líneas vacías y comentarios (que empiecen con #)
-                    if line and not line.startswith('#'):
-                        
-                        # Valida que sea una URL de TikTok
-                        if 'tiktok.com' in line:
-                            urls.append(line)  # Agrega URL válida a la lista
-                        else:
-                            # Muestra advertencia para URLs no válidas
-                            print(f"{Fore.YELLOW}⚠️  Line {line_num}: Not a TikTok URL - {line}")
-            
-            # ================================================================
-            # REPORTE DE RESULTADOS
-            # ================================================================
-            
-            # Muestra resumen de URLs cargadas exitosamente
-            print(f"{Fore.GREEN}📂 Loaded {len(urls)} URLs from {filename}")
-            return urls
+            # Cadena de generadores: lectura -> validación -> normalización
+            # El normalizador resuelve enlaces cortos por bloques
+            for url in self.url_canonicalizer.iter_canonical(iter_urls(file_path, stats)):
+                count += 1
+                yield url
         
         # ====================================================================
         # MANEJO DE ERRORES
         # ====================================================================
         
-        except Exception as e:
+        except (OSError, UnicodeDecodeError) as e:
             # Captura cualquier error de lectura del archivo
-            print(f"{Fore.RED}❌ Error reading file {filename}: {str(e)}")
-            return []  # Retorna lista vacía en caso de error
+            tqdm.write(f"{Fore.RED}❌ Error reading file {filename}: {str(e)}")
+            return
+        
+        # ====================================================================
+        # REPORTE DE RESULTADOS
+        # ====================================================================
+        
+        # Resumen único de líneas inválidas (con algunos ejemplos)
+        if stats.invalid:
+            tqdm.write(f"{Fore.YELLOW}⚠️  Skipped {stats.invalid} lines that are not TikTok URLs")
+            for line_num, value in stats.invalid_samples:
+                tqdm.write(f"{Fore.YELLOW}   Line {line_num}: {value}")
+        
+        # Muestra resumen de URLs cargadas exitosamente
+        tqdm.write(f"{Fore.GREEN}📂 Loaded {count} URLs from {filename}")
+        if self.url_canonicalizer.unresolved:
+            tqdm.write(f"{Fore.YELLOW}⚠️  {self.url_canonicalizer.unresolved} short links could not be resolved (kept as-is)")
+    
+    def load_urls_from_file(self, filename="tiktok_urls.txt"):
+        """
+        Carga y valida URLs de TikTok desde un archivo del directorio de datos.
+        Versión en lista de iter_urls_from_file(), para listas pequeñas.
+        
+        Parámetros:
+            filename (str): Nombre del archivo a leer (por defecto: "tiktok_urls.txt")
+        
+        Retorna:
+            list: Lista de URLs válidas de TikTok encontradas en el archivo, sin duplicados
+        """
+        
+        # La lista ya está en memoria: los duplicados se quitan aquí mismo
+        return list(dict.fromkeys(self.iter_urls_from_file(filename)))
     
     # ========================================================================
     # MÉTODO: CONFIGURACIÓN DE yt-dlp
@@ -225,12 +358,13 @@ class TikTokDownloader:
             # CONFIGURACIÓN DE NOMBRES DE ARCHIVO
             # ================================================================
             
-            # Define el patrón para nombrar archivos descargados
+            # Define el patrón para nombrar archivos descargados ([output] filename_template)
             # %(uploader)s = Nombre del creador del video
             # %(title)s = Título del video
             # %(id)s = ID único del video en TikTok
             # %(ext)s = Extensión del archivo (mp4, mov, etc.)
-            'outtmpl': str(self.videos_dir / '%(uploader)s_%(title)s_%(id)s.%(ext)s'),
+            # El subdirectorio de cada video se fija al descargarlo (ver _set_output_dir)
+            'outtmpl': {'default': str(self.videos_dir / self.filename_template)},
             
             # ================================================================
             # CONFIGURACIÓN DE CALIDAD DE VIDEO
@@ -260,71 +394,507 @@ class TikTokDownloader:
             # CONFIGURACIÓN DE COMPORTAMIENTO
             # ================================================================
             
-            # Continúa descargando otros videos aunque uno falle
-            # Evita que un error detenga todo el proceso
-            'ignoreerrors': True,
+            # Lanza los errores en lugar de ignorarlos: el motor de descarga procesa
+            # cada URL por separado, así que un error no detiene el resto, y el
+            # mensaje original permite clasificarlo y decidir si se reintenta
+            'ignoreerrors': False,
+            
+            # Timeout de conexión ([performance] timeout)
+            'socket_timeout': self.timeout,
             
             # Muestra advertencias (útil para debugging)
             'no_warnings': False,
             
             # No extrae solo información, descarga el archivo completo
             'extract_flat': False,
+            
+            # Marca el inicio y el fin de la transferencia de bytes para
+            # separar la etapa de descarga del post-proceso (ver timing.py)
+            'progress_hooks': [self._progress_hook],
+        }
+    
+    # ========================================================================
+    # MÉTODO: INSTANCIA DE yt-dlp POR WORKER
+    # ========================================================================
+    
+    def _get_ydl(self):
+        """
+        Devuelve la instancia de yt_dlp.YoutubeDL del hilo actual, creándola
+        la primera vez. YoutubeDL no es thread-safe, así que cada worker del
+        motor de descarga usa la suya propia.
+        
+        Retorna:
+            yt_dlp.YoutubeDL: Instancia configurada con setup_ydl_options()
+        """
+        
+        ydl = getattr(self._thread_state, 'ydl', None)
+        if ydl is None:
+            # Primera descarga de este worker: crea su instancia
+            ydl = self._create_ydl()
+            self._thread_state.ydl = ydl
+            
+            # Registra la instancia para poder cerrarla al terminar la sesión
+            with self._ydl_lock:
+                self._ydl_instances.append(ydl)
+        return ydl
+    
+    def _create_ydl(self):
+        """
+        Crea una instancia de yt-dlp con setup_ydl_options(). Las subclases
+        pueden sustituirla (p. ej. el benchmark offline registra un extractor
+        propio que sirve videos desde un servidor local).
+        
+        Retorna:
+            yt_dlp.YoutubeDL: Nueva instancia
+        """
+        
+        # Importación diferida: yt-dlp carga cientos de extractores
+        import yt_dlp  # Motor principal para descargar videos de TikTok
+        
+        return yt_dlp.YoutubeDL(self.setup_ydl_options())
+    
+    def _close_ydl_instances(self):
+        """
+        Cierra todas las instancias de yt-dlp creadas por los workers.
+        Se llama al final de cada sesión de descarga.
+        """
+        
+        with self._ydl_lock:
+            instances, self._ydl_instances = self._ydl_instances, []
+        
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception as e:
+                logging.warning(f"Error closing yt-dlp instance: {str(e)}")
+        
+        # Los hilos del pool ya terminaron; una nueva sesión creará instancias nuevas
+        self._thread_state = threading.local()
+    
+    def _count_extraction(self, cache_hit=False):
+        """
+        Incrementa el contador de extracciones (o de aciertos de caché) de la
+        sesión actual. Los workers lo llaman en paralelo, por eso usa un lock.
+        
+        Parámetros:
+            cache_hit (bool): True si la información vino de la caché (sin red)
+        """
+        
+        with self._ydl_lock:
+            if cache_hit:
+                self._cache_hit_count += 1
+            else:
+                self._extraction_count += 1
+    
+    # ========================================================================
+    # MÉTODO: OBTENER INFORMACIÓN DE UN VIDEO (CON CACHÉ)
+    # ========================================================================
+    
+    def fetch_info(self, url, use_cache=True):
+        """
+        Obtiene la información cruda (sin procesar ni descargar) de un video,
+        consultando primero la caché persistente de metadatos. Además del motor
+        de descarga, la pueden usar trabajos que solo refrescan metadatos.
+        
+        Parámetros:
+            url (str): URL de TikTok
+            use_cache (bool): Si es False, siempre extrae desde la red
+        
+        Retorna:
+            tuple: (info, desde_cache) - diccionario de yt-dlp y si vino de la caché
+        
+        Lanza:
+            Exception: Cualquier error de extracción
+        """
+        
+        # ====================================================================
+        # CONSULTA A LA CACHÉ (SIN RED)
+        # ====================================================================
+        
+        # La caché se indexa por ID de video, que se conoce antes de extraer
+        # salvo en enlaces cortos sin resolver
+        video_id = extract_video_id(url)
+        if use_cache and self.info_cache is not None and video_id:
+            info = self.info_cache.get(video_id)
+            if info is not None:
+                self._count_extraction(cache_hit=True)
+                return info, True
+        
+        # ====================================================================
+        # EXTRACCIÓN ÚNICA DESDE LA RED
+        # ====================================================================
+        
+        # process=False devuelve el resultado crudo del extractor, sin seleccionar
+        # formatos ni descargar, para reutilizarlo en la descarga
+        info = self._get_ydl().extract_info(url, download=False, process=False)
+        self._count_extraction()
+        
+        # Por seguridad: yt-dlp puede devolver None si el extractor no produce resultado
+        if info is None:
+            raise RuntimeError("yt-dlp could not extract video information")
+        
+        # Guarda en caché solo videos individuales; las claves '__...' son internas
+        # de yt-dlp (pueden contener funciones) y no se pueden serializar
+        if self.info_cache is not None and info.get('_type', 'video') == 'video':
+            self.info_cache.put(info.get('id'), {k: v for k, v in info.items() if not k.startswith('__')})
+        
+        return info, False
+    
+    # ========================================================================
+    # MÉTODO: DESCARGA DE UN SOLO VIDEO (EJECUTADO POR LOS WORKERS)
+    # ========================================================================
+    
+    def download_single_video(self, url):
+        """
+        Descarga un video y lo registra en la base de datos. Se ejecuta dentro
+        de un worker del pool, por lo que no toca la barra de progreso ni las
+        listas de resultados (eso lo hace el hilo principal).
+        
+        Parámetros:
+            url (str): URL de TikTok a descargar
+        
+        Retorna:
+            dict: Registro de la descarga exitosa (url, title, uploader, video_id, timestamp)
+        
+        Lanza:
+            Exception: Cualquier error de extracción o descarga
+        """
+        
+        ydl = self._get_ydl()
+        
+        # ====================================================================
+        # PASO 1: EXTRACCIÓN ÚNICA DE INFORMACIÓN
+        # ====================================================================
+        
+        # Extrae la información del video UNA sola vez por URL
+        # (o la toma de la caché persistente si se extrajo hace poco)
+        with self.timer.span(EXTRACT):
+            info, from_cache = self.fetch_info(url)
+        
+        # Obtiene datos básicos del video
+        title = info.get('title', 'Unknown')      # Título del video
+        uploader = info.get('uploader', 'Unknown') # Creador del video
+        
+        # Segunda comprobación de duplicados, para URLs cuyo ID no se conocía
+        # antes de extraer (p. ej. enlaces cortos vm.tiktok.com)
+        if self.archive_index.contains(info.get('id')):
+            raise AlreadyArchivedError(info.get('id'))
+        
+        # ====================================================================
+        # PASO 2: DESCARGA REAL DEL VIDEO
+        # ====================================================================
+        
+        # Hace sitio dentro de los presupuestos de disco (si están configurados)
+        creator = info.get('uploader', info.get('uploader_id', ''))
+        self.disk_quota.make_room(creator, self._expected_filesize(info))
+        
+        # Coloca el video (y su .info.json y miniatura) en su subdirectorio
+        self._set_output_dir(ydl, info)
+        
+        # Procesa el resultado ya extraído: selecciona formato y descarga
+        # Esto evita una segunda petición a la página y un segundo parseo del JSON
+        # Los hooks de progreso anotan en transfer [inicio, fin] de la transferencia
+        processing_start = time.perf_counter()
+        self._thread_state.transfer = transfer = [None, None]
+        try:
+            final_info = ydl.process_ie_result(info, download=True)
+        except Exception:
+            if not from_cache:
+                raise
+            
+            # Las URLs de medios de la caché pueden haber caducado:
+            # invalida la entrada y repite con una extracción nueva
+            self.info_cache.invalidate(info.get('id'))
+            info, _ = self.fetch_info(url, use_cache=False)
+            final_info = ydl.process_ie_result(info, download=True)
+        
+        if final_info is None:
+            raise RuntimeError("yt-dlp could not download the video")
+        
+        # Tamaño real del archivo (yt-dlp a veces solo da uno aproximado o
+        # ninguno); es el que cuentan las cuotas de disco
+        video_file = self._downloaded_file(final_info)
+        if video_file is not None:
+            final_info['filesize'] = os.path.getsize(video_file)
+        
+        # Con el almacén activado, calcula el SHA-256 del archivo descargado
+        # (en streaming, dentro del worker) y lo sustituye por un enlace al
+        # objeto almacenado; el hash se guarda en la base de datos
+        duplicate = False
+        if self.content_store is not None and video_file is not None:
+            duplicate = self.store_content(final_info, video_file)
+        
+        # Ruta que se guarda en file_path (la usan las cuotas de disco y
+        # 'db relayout'): process_ie_result solo pone '_filename' en las copias
+        # de requested_downloads, no en el diccionario que devuelve. Con el
+        # almacén activado es el enlace que ocupa la ruta original
+        if video_file is not None:
+            final_info['_filename'] = video_file
+        
+        # Todo process_ie_result + hash menos la transferencia es post-proceso
+        # (selección de formato, miniatura, .info.json, post-procesadores)
+        processing = time.perf_counter() - processing_start
+        transferring = transfer[1] - transfer[0] if transfer[0] is not None and transfer[1] is not None else 0.0
+        self.timer.record(DOWNLOAD, transferring)
+        self.timer.record(POST_PROCESS, processing - transferring)
+        
+        # ====================================================================
+        # PASO 3: REGISTRO EN BASE DE DATOS
+        # ====================================================================
+        
+        # Se guarda el mismo diccionario producido por la extracción única
+        # TikTokDatabase serializa las escrituras entre workers
+        with self.timer.span(DB_WRITE):
+            self.db.add_video(final_info)
+            self.archive_index.add(final_info.get('id'))
+        creator = final_info.get('uploader', final_info.get('uploader_id', ''))
+        self.disk_quota.record(creator, final_info.get('filesize'), final_info.get('id'),
+                               final_info.get('content_hash'), duplicate)
+        
+        # El tamaño previsto es solo una estimación (y varios workers descargan
+        # a la vez): con el tamaño real ya contado, vuelve a aplicar los
+        # presupuestos para que el archivo no quede por encima de ellos
+        self.disk_quota.make_room(creator)
+        
+        # ====================================================================
+        # PASO 4: REGISTRO DE ÉXITO
+        # ====================================================================
+        
+        return {
+            'url': url,                                    # URL original
+            'title': title,                               # Título del video
+            'uploader': uploader,                         # Creador
+            'video_id': final_info.get('id', ''),        # ID único de TikTok
+            'timestamp': datetime.now().isoformat()      # Momento de descarga
         }
     
+    # ========================================================================
+    # MÉTODO: HOOK DE PROGRESO (TIEMPOS DE TRANSFERENCIA)
+    # ========================================================================
+    
+    def _progress_hook(self, status):
+        """
+        Hook de progreso de yt-dlp: se ejecuta en el worker que descarga y
+        anota cuándo empezó (primer aviso) y terminó (último 'finished') la
+        transferencia del video actual.
+        
+        Parámetros:
+            status (dict): Estado enviado por yt-dlp ('downloading', 'finished', ...)
+        """
+        
+        transfer = getattr(self._thread_state, 'transfer', None)
+        if transfer is None:
+            return
+        now = time.perf_counter()
+        if transfer[0] is None:
+            transfer[0] = now
+        if status.get('status') == 'finished':
+            transfer[1] = now
+    
+    # ========================================================================
+    # MÉTODO: SUBDIRECTORIO DE SALIDA POR VIDEO
+    # ========================================================================
+    
+    def _set_output_dir(self, ydl, info):
+        """
+        Ajusta la plantilla de salida de la instancia de yt-dlp del worker
+        para que el video se guarde en el subdirectorio de su layout
+        (p. ej. videos/<creador>/ o videos/ab/cd/). Cada worker tiene su
+        propia instancia, así que cambiarla no afecta a otras descargas.
+        
+        Parámetros:
+            ydl (yt_dlp.YoutubeDL): Instancia del worker actual
+            info (dict): Información extraída del video
+        """
+        
+        ydl.params['outtmpl']['default'] = self.output_layout.outtmpl(info, self.filename_template)
+    
+    # ========================================================================
+    # MÉTODO: ALMACÉN DIRECCIONADO POR CONTENIDO
+    # ========================================================================
+    
+    def _downloaded_file(self, info):
+        """
+        Localiza el archivo de video que yt-dlp acaba de descargar.
+        
+        Parámetros:
+            info (dict): Diccionario devuelto por process_ie_result
+        
+        Retorna:
+            str: Ruta del archivo, o None si no se encuentra
+        """
+        
+        # yt-dlp indica la ruta final en requested_downloads (tras el post-proceso)
+        candidates = [download.get('filepath') for download in info.get('requested_downloads') or []]
+        candidates += [info.get('filepath'), info.get('_filename')]
+        return next((path for path in candidates if path and os.path.isfile(path)), None)
+    
+    def _expected_filesize(self, info):
+        """
+        Estima el tamaño del video antes de descargarlo, para hacerle sitio
+        dentro de los presupuestos de disco. Con process=False TikTok no da
+        'filesize' en el nivel superior, solo en cada entrada de 'formats'.
+        
+        Parámetros:
+            info (dict): Información cruda de fetch_info()
+        
+        Retorna:
+            int: Bytes esperados (0 si yt-dlp no da ningún tamaño)
+        """
+        
+        size = info.get('filesize') or info.get('filesize_approx')
+        if size:
+            return size
+        
+        # Mismo criterio que el formato 'best[height<=720]/best': entre los
+        # formatos de hasta 720p (o todos si no hay ninguno), el mayor tamaño
+        formats = info.get('formats') or []
+        eligible = [f for f in formats if (f.get('height') or 0) <= 720] or formats
+        return max((f.get('filesize') or f.get('filesize_approx') or 0 for f in eligible), default=0)
+    
+    def store_content(self, info, video_file):
+        """
+        Mueve el video descargado al almacén direccionado por contenido y
+        anota su hash en info['content_hash']. Un fallo aquí no anula la
+        descarga: el archivo se queda como está y el video se registra sin hash.
+        
+        Parámetros:
+            info (dict): Diccionario devuelto por process_ie_result
+            video_file (str): Archivo descargado (ver _downloaded_file)
+        
+        Retorna:
+            bool: True si el contenido ya estaba almacenado (el archivo es un
+                  enlace más y no ocupa espacio nuevo)
+        """
+        
+        try:
+            info['content_hash'], duplicate = self.content_store.add(Path(video_file))
+            if duplicate:
+                logging.info(f"Duplicate payload for {info.get('id')}: linked to stored copy")
+            return duplicate
+        except OSError as e:
+            logging.warning(f"Could not add {video_file} to the content store: {str(e)}")
+            return False
+    
     # ========================================================================
     # MÉTODO PRINCIPAL: DESCARGA DE VIDEOS
     # ========================================================================
     
-    def download_videos(self, urls, source_file=None):
+    def download_videos(self, urls, source_file=None, session_id=None):
         """
         Método principal que descarga una lista de videos de TikTok con integración
         completa de base de datos y seguimiento de progreso.
         
+        Cada URL queda registrada en un journal de la sesión en SQLite
+        (pending -> in_flight -> done/failed), de modo que una sesión
+        interrumpida (Ctrl+C, SIGTERM o caída) puede reanudarse después.
+        
         Parámetros:
-            urls (list): Lista de URLs de TikTok a descargar
+            urls (iterable): URLs de TikTok a descargar (lista o generador)
             source_file (str): Nombre del archivo de origen (opcional, para logs)
+            session_id (str): ID de una sesión previa a reanudar (opcional).
+                              Si se indica, las URLs se toman del journal.
         
         Retorna:
             tuple: (lista_exitosos, lista_fallidos)
         
         Proceso completo:
-        1. Validación inicial
-        2. Creación de sesión de descarga
-        3. Configuración de yt-dlp
-        4. Loop de descarga con barra de progreso
+        1. Creación (o reanudación) de sesión de descarga y validación
+        2. Registro de las URLs en el journal (en streaming)
+        3. Reparto de URLs entre workers ([performance] concurrent_downloads)
+        4. Recogida de resultados con barra de progreso
         5. Integración con base de datos
-        6. Manejo de errores
+        6. Manejo de errores e interrupciones
         7. Generación de logs
         """
         
+        # Importaciones diferidas (solo hacen falta al descargar). yt_dlp se
+        # carga aquí y no en el primer worker para que, si falta, el error se
+        # vea antes de empezar y no como un fallo registrado de cada URL
+        import yt_dlp  # noqa: F401
+        from tqdm import tqdm  # Para barras de progreso elegantes
+        
         # ====================================================================
-        # VALIDACIÓN INICIAL
+        # INICIALIZACIÓN O REANUDACIÓN DE SESIÓN DE DESCARGA
         # ====================================================================
         
-        # Verifica que hay URLs para procesar
-        if not urls:
-            print(f"{Fore.RED}❌ No URLs to download!")
-            return [], []  # Retorna listas vacías
+        # Hilo que escribe el journal de una sesión nueva mientras se descarga
+        # (al reanudar el journal ya está completo y no hace falta)
+        journal_thread = None
+        journal_done = threading.Event()
+        journal_stats = {'read': 0, 'total': 0}
+        
+        if session_id is None:
+            # Crea un ID único para esta sesión de descarga
+            # Permite rastrear estadísticas por sesión en la base de datos
+            session_id = str(uuid.uuid4())
+            
+            # La primera URL se lee en este hilo: si el archivo no existe o no
+            # tiene URLs válidas, el aviso sale antes de empezar la sesión
+            urls = iter(urls)
+            first_url = next(urls, None)
+            
+            # ================================================================
+            # VALIDACIÓN INICIAL
+            # ================================================================
+            
+            # Verifica que hay URLs para procesar
+            if first_url is None:
+                print(f"{Fore.RED}❌ No URLs to download!")
+                self.last_session_id = None
+                return [], []  # Retorna listas vacías
+            
+            # Registra el inicio de la sesión en la base de datos
+            # (el total de URLs lo completa end_download_session desde el journal)
+            self.db.start_download_session(session_id, 0, source_file)
+            
+            # Registra las URLs en el journal como 'pending' en un hilo aparte:
+            # el motor reparte las primeras mientras se leen las demás y se
+            # resuelven sus enlaces cortos. La entrada se consume por lotes
+            # y los duplicados los descarta el journal, sin guardarlos en memoria
+            journal_thread = threading.Thread(
+                target=self._journal_urls, name="journal", daemon=True,
+                args=(session_id, itertools.chain([first_url], urls), journal_done, journal_stats))
+            journal_thread.start()
+        else:
+            # Reanuda una sesión existente
+            session = self.db.get_download_session(session_id)
+            if session is None:
+                print(f"{Fore.RED}❌ Session {session_id} not found in database!")
+                self.last_session_id = None
+                return [], []
+            
+            # Las URLs que quedaron 'in_flight' por una caída se vuelven a procesar
+            reset = self.db.reset_in_flight_urls(session_id)
+            total_urls = session.get('total_urls') or 0
+            print(f"{Fore.CYAN}♻️  Resuming session {session_id} ({reset} interrupted URLs requeued)")
+            journal_done.set()
+        
+        self.last_session_id = session_id
+        
+        # Cuenta lo que ya estaba hecho antes (0 en una sesión nueva)
+        counts = self.db.get_session_url_counts(session_id)
+        already_done = counts.get('done', 0) + counts.get('failed', 0) + counts.get('skipped', 0)
+        pending_count = counts.get('pending', 0)
+        
+        # Las URLs a procesar se leen del journal por lotes (sin cargarlas todas)
+        # Mientras el journal se escribe, el iterador da None al alcanzarlo
+        pending_urls = self.db.iter_session_urls(session_id, 'pending', follow=journal_done)
 
         # ====================================================================
         # INFORMACIÓN INICIAL AL USUARIO
         # ====================================================================
         
         # Muestra información sobre la sesión que va a iniciar
-        print(f"{Fore.CYAN}🚀 Starting download of {len(urls)} videos...")
+        if journal_thread is not None:
+            print(f"{Fore.CYAN}🚀 Starting downloads (URLs are journaled as they are read)...")
+        else:
+            print(f"{Fore.CYAN}🚀 Starting download of {pending_count} videos...")
+        if already_done:
+            print(f"{Fore.CYAN}⏭️  Skipping {already_done} URLs already processed in this session")
         print(f"{Fore.CYAN}📁 Videos will be saved to: {self.videos_dir}")
         print(f"{Fore.CYAN}🗄️  Metadata will be stored in database")
-
-        # ====================================================================
-        # INICIALIZACIÓN DE SESIÓN DE DESCARGA
-        # ====================================================================
-        
-        # Crea un ID único para esta sesión de descarga
-        # Permite rastrear estadísticas por sesión en la base de datos
-        session_id = str(uuid.uuid4())
-        
-        # Registra el inicio de la sesión en la base de datos
-        self.db.start_download_session(session_id, len(urls), source_file)
+        print(f"{Fore.CYAN}🔖 Session ID: {session_id}")
 
         # ====================================================================
         # INICIALIZACIÓN DE LISTAS DE RESULTADOS
@@ -333,128 +903,333 @@ class TikTokDownloader:
         # Listas para almacenar resultados separados
         successful_downloads = []  # Videos descargados exitosamente
         failed_downloads = []      # Videos que fallaron
+        skipped_count = 0          # Videos saltados por estar ya archivados
+        skipped_failures = 0       # URLs saltadas por la caché negativa de fallos
+        
+        # Reinicia los contadores de extracciones para esta sesión
+        self._extraction_count = 0
+        self._cache_hit_count = 0
+        self.timer = StageTimer()
+        if self.content_store is not None:
+            self.content_store.duplicates = 0
+            self.content_store.bytes_saved = 0
+        self.disk_quota.evicted = 0
+        self.disk_quota.freed_bytes = 0
 
         # ====================================================================
-        # CONFIGURACIÓN DE yt-dlp
+        # ESCRITOR DE BASE DE DATOS POR LOTES
         # ====================================================================
         
-        # Obtiene las opciones de configuración definidas anteriormente
-        ydl_opts = self.setup_ydl_options()
+        # Un único hilo escritor agrupa los INSERT/UPDATE de videos, fallos y
+        # journal en transacciones (en lugar de una conexión y un fsync por video)
+        # end_download_session() vacía la cola antes de cerrar la sesión
+        self.db.start_batch_writer()
 
         # ====================================================================
-        # PROCESO PRINCIPAL DE DESCARGA
+        # MANEJO DE SEÑALES (SIGTERM)
         # ====================================================================
         
-        # Crea instancia de yt-dlp con las opciones configuradas
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            
-            # Crea barra de progreso para mostrar avance visual
-            # desc: texto descriptivo
-            # unit: unidad de medida para la barra
-            with tqdm(urls, desc="Downloading videos", unit="video") as pbar:
+        # Evento que indica al motor que deje de repartir URLs nuevas
+        # Las descargas en curso terminan ("drenado") antes de cerrar la sesión
+        self._stop_event = threading.Event()
+        previous_sigterm = self._install_sigterm_handler()
+        interrupted = False
+
+        # ====================================================================
+        # PROCESO PRINCIPAL DE DESCARGA (MOTOR CONCURRENTE)
+        # ====================================================================
+        
+        # Número de workers leído de [performance] concurrent_downloads
+        workers = self.concurrent_downloads
+        print(f"{Fore.CYAN}⚙️  Concurrent downloads: {workers}")
+        
+        # Limita las descargas en curso para no encolar miles de futures de golpe
+        # (2 por worker mantiene a todos ocupados sin acumular memoria)
+        max_in_flight = workers * 2
+        in_flight = {}  # future -> URL que está procesando
+        
+        # Reintentos programados: heap de (momento, secuencia, URL)
+        # La secuencia desempata URLs con el mismo momento
+        retry_queue = []
+        retry_seq = itertools.count()
+        attempts = {}       # URL -> intentos fallidos (solo URLs en reintento)
+        retried_count = 0   # Total de reintentos programados en la sesión
+        paused = False      # Reparto detenido por falta de espacio en disco
+        urls_exhausted = False  # El journal está completo y ya se repartieron todas sus URLs
+        aborted = False     # Caída inesperada o segundo Ctrl+C
+        
+        try:
+            # Crea el pool de workers y la barra de progreso
+            # La barra solo se actualiza desde este hilo (el principal)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as executor, \
+                    tqdm(total=None if journal_thread is not None else pending_count,
+                         desc="Downloading videos", unit="video") as pbar:
                 
                 # ============================================================
-                # LOOP PRINCIPAL: PROCESA CADA URL
+                # LOOP PRINCIPAL: REPARTE URLs Y RECOGE RESULTADOS
                 # ============================================================
                 
-                for i, url in enumerate(pbar):
-                    try:
-                        # ====================================================
-                        # ACTUALIZACIÓN DE PROGRESO VISUAL
-                        # ====================================================
-                        
-                        # Actualiza el texto de la barra de progreso
-                        pbar.set_description(f"Downloading video {i+1}/{len(urls)}")
-
-                        # ====================================================
-                        # PASO 1: EXTRACCIÓN DE INFORMACIÓN PREVIA
-                        # ====================================================
-                        
-                        # Extrae información del video SIN descargarlo aún
-                        # Esto permite mostrar información antes de la descarga
-                        info = ydl.extract_info(url, download=False)
-                        
-                        # Obtiene datos básicos del video
-                        title = info.get('title', 'Unknown')      # Título del video
-                        uploader = info.get('uploader', 'Unknown') # Creador del video
-
-                        # Actualiza la barra de progreso con información del video actual
-                        pbar.set_postfix_str(f"'{title[:30]}...' by {uploader}")
-
-                        # ====================================================
-                        # PASO 2: DESCARGA REAL DEL VIDEO
-                        # ====================================================
+                while True:
+                    # Sin espacio libre suficiente ([storage] min_free_gb) no se
+                    # reparten URLs nuevas: las descargas en curso terminan y el
+                    # motor espera a que se libere espacio en lugar de fallarlas
+                    if self.disk_quota.has_free_space() == paused:
+                        paused = not paused
+                        if paused:
+                            tqdm.write(f"{Fore.YELLOW}⏸️  Low disk space "
+                                       f"({self.disk_quota.free_bytes() / (1024 ** 3):.1f} GB free): "
+                                       f"downloads paused until space is freed")
+                        else:
+                            tqdm.write(f"{Fore.GREEN}▶️  Disk space available again: resuming downloads")
+                    
+                    # Con el journal completo la barra ya puede mostrar el total
+                    if pbar.total is None and journal_done.is_set():
+                        pbar.total = journal_stats['total']
+                        pbar.refresh()
+                    
+                    # Reencola los reintentos cuyo tiempo de espera ya pasó
+                    # (tienen prioridad sobre las URLs nuevas)
+                    while retry_queue and retry_queue[0][0] <= time.monotonic() \
+                            and len(in_flight) < max_in_flight and not self._stop_event.is_set() and not paused:
+                        _, _, url = heapq.heappop(retry_queue)
+                        self.db.mark_session_url(session_id, url, 'in_flight')
+                        in_flight[executor.submit(self.download_single_video, url)] = url
+                    
+                    # Rellena la ventana de trabajo con nuevas URLs
+                    # (no reparte más si se pidió detener la sesión)
+                    while len(in_flight) < max_in_flight and not self._stop_event.is_set() and not paused:
+                        try:
+                            url = next(pending_urls)
+                        except StopIteration:
+                            urls_exhausted = True
+                            break  # No quedan URLs por repartir
+                        if url is None:
+                            break  # El journal aún se está escribiendo: se mira en la siguiente vuelta
                         
-                        # Descarga el video y obtiene información completa
-                        # Esta llamada hace la descarga real del archivo
-                        final_info = ydl.extract_info(url, download=True)
+                        # Salta videos ya archivados sin hacer ninguna petición de red
+                        if self.archive_index.contains(extract_video_id(url)):
+                            self.db.mark_session_url(session_id, url, 'skipped')
+                            skipped_count += 1
+                            pbar.update(1)
+                            continue
                         
-                        # ====================================================
-                        # PASO 3: REGISTRO EN BASE DE DATOS
-                        # ====================================================
+                        # Salta URLs que fallaron definitivamente hace poco (caché negativa)
+                        failure = self.skip_known_failures and self.db.get_active_failure(url)
+                        if failure:
+                            self.db.mark_session_url(session_id, url, 'skipped',
+                                                     f"Known failure ({failure['error_class']}) until "
+                                                     f"{failure['next_retry_at'][:19]}: {failure['error']}")
+                            skipped_failures += 1
+                            pbar.update(1)
+                            continue
                         
-                        # Guarda toda la información del video en la base de datos SQLite
-                        self.db.add_video(final_info)
-
-                        # ====================================================
-                        # PASO 4: REGISTRO DE ÉXITO
-                        # ====================================================
+                        # Marca la URL como en curso en el journal antes de enviarla
+                        self.db.mark_session_url(session_id, url, 'in_flight')
+                        in_flight[executor.submit(self.download_single_video, url)] = url
+                    
+                    # Si no queda nada en curso ni por reintentar, la sesión ha terminado
+                    # (al detener la sesión, los reintentos quedan 'pending' en el journal)
+                    if not in_flight and (not retry_queue or self._stop_event.is_set()) \
+                            and (not paused or self._stop_event.is_set()) \
+                            and (urls_exhausted or self._stop_event.is_set()):
+                        break
+                    
+                    # Espera como máximo hasta el próximo reintento programado
+                    # (en pausa, hasta la próxima comprobación del espacio libre)
+                    timeout = max(0, retry_queue[0][0] - time.monotonic()) if retry_queue else None
+                    if paused:
+                        timeout = min(timeout, self.disk_quota.check_interval) \
+                            if timeout is not None else self.disk_quota.check_interval
+                    
+                    # Mientras se escribe el journal, vuelve a buscar URLs nuevas
+                    # para que la ventana de trabajo no se quede a medias
+                    if not urls_exhausted and len(in_flight) < max_in_flight:
+                        timeout = min(timeout, JOURNAL_POLL_INTERVAL) \
+                            if timeout is not None else JOURNAL_POLL_INTERVAL
+                    
+                    try:
+                        if not in_flight:
+                            # Solo quedan reintentos en espera: duerme hasta el próximo
+                            # (stop_event.wait despierta antes si llega SIGTERM)
+                            self._stop_event.wait(timeout)
+                            continue
                         
-                        # Crea registro detallado del video descargado exitosamente
-                        successful_downloads.append({
-                            'url': url,                                    # URL original
-                            'title': title,                               # Título del video
-                            'uploader': uploader,                         # Creador
-                            'video_id': final_info.get('id', ''),        # ID único de TikTok
-                            'timestamp': datetime.now().isoformat()      # Momento de descarga
-                        })
-
-                        # Muestra mensaje de éxito con colores
-                        print(f"\n{Fore.GREEN}✅ Downloaded: {title} by {uploader}")
-
-                    # ========================================================
-                    # MANEJO DE ERRORES DURANTE LA DESCARGA
-                    # ========================================================
+                        # Espera a que termine al menos una descarga
+                        done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                    except KeyboardInterrupt:
+                        # Ctrl+C: deja de repartir y drena las descargas en curso
+                        tqdm.write(f"{Fore.YELLOW}⚠️  Interrupted: finishing {len(in_flight)} in-flight downloads...")
+                        self._stop_event.set()
+                        continue
                     
-                    except Exception as e:
-                        # Captura cualquier error durante el proceso de descarga
-                        error_msg = str(e)
+                    for future in done:
+                        url = in_flight.pop(future)
                         
-                        # ================================================
-                        # REGISTRO DE ERROR EN BASE DE DATOS
-                        # ================================================
+                        try:
+                            # ================================================
+                            # REGISTRO DE ÉXITO
+                            # ================================================
+                            
+                            # result() relanza la excepción del worker si falló
+                            record = future.result()
+                            record['attempts'] = attempts.pop(url, 0) + 1
+                            successful_downloads.append(record)
+                            
+                            # Checkpoint: la URL queda completada en el journal
+                            # (y se olvida cualquier fallo anterior de la URL)
+                            with self.timer.span(LOG_WRITE):
+                                self.db.mark_session_url(session_id, url, 'done', attempts=record['attempts'])
+                                self.db.clear_failed_download(url)
+                            
+                            # Actualiza la barra con el último video completado
+                            pbar.set_postfix_str(f"'{record['title'][:30]}...' by {record['uploader']}")
+                            
+                            # tqdm.write no rompe la barra de progreso
+                            tqdm.write(f"{Fore.GREEN}✅ Downloaded: {record['title']} by {record['uploader']}")
                         
-                        # Registra la descarga fallida en la base de datos
-                        self.db.add_failed_download(url, error_msg)
+                        except AlreadyArchivedError:
+                            # Detectado tras la extracción: no es un error
+                            self.db.mark_session_url(session_id, url, 'skipped', attempts=attempts.pop(url, 0) + 1)
+                            skipped_count += 1
                         
                         # ================================================
-                        # REGISTRO DE ERROR EN MEMORIA
+                        # MANEJO DE ERRORES DURANTE LA DESCARGA
                         # ================================================
                         
-                        # Crea registro detallado del error
-                        failed_downloads.append({
-                            'url': url,                              # URL que falló
-                            'error': error_msg,                      # Mensaje de error
-                            'timestamp': datetime.now().isoformat() # Momento del error
-                        })
-
-                        # Muestra mensaje de error con colores
-                        print(f"\n{Fore.RED}❌ Failed to download {url}")
-                        print(f"{Fore.RED}   Error: {error_msg}")
-
-        # ====================================================================
-        # FINALIZACIÓN DE SESIÓN
-        # ====================================================================
-        
-        # Registra el final de la sesión en la base de datos con estadísticas
-        self.db.end_download_session(session_id, len(successful_downloads), len(failed_downloads))
-
-        # ====================================================================
-        # GENERACIÓN DE LOG DE DESCARGA
-        # ====================================================================
-        
-        # Crea archivo de log detallado con todos los resultados
-        self.save_download_log(successful_downloads, failed_downloads)
+                        except Exception as e:
+                            # Captura cualquier error ocurrido en el worker
+                            error_msg = str(e)
+                            
+                            # Clasifica el error: rate limit, red, eliminado/privado, geobloqueo
+                            error_class = classify_error(e)
+                            url_attempts = attempts.get(url, 0) + 1
+                            
+                            # Disco lleno: no es culpa de la URL ni cuenta como intento;
+                            # vuelve a la cola y el motor se pausa hasta que haya espacio
+                            if error_class == DISK_FULL:
+                                heapq.heappush(retry_queue, (time.monotonic() + self.disk_quota.check_interval,
+                                                             next(retry_seq), url))
+                                self.db.mark_session_url(session_id, url, 'pending', error_msg, url_attempts - 1)
+                                tqdm.write(f"{Fore.YELLOW}💾 Disk full, requeued: {url}")
+                                continue
+                            
+                            # ================================================
+                            # REINTENTO CON BACKOFF (FUERA DEL CAMINO CRÍTICO)
+                            # ================================================
+                            
+                            if self.retry_policy.should_retry(error_class, url_attempts):
+                                # No se duerme en el worker: la URL se programa para más
+                                # tarde y los workers siguen con otras URLs mientras tanto
+                                delay = self.retry_policy.next_delay(error_class, url_attempts)
+                                attempts[url] = url_attempts
+                                heapq.heappush(retry_queue, (time.monotonic() + delay, next(retry_seq), url))
+                                self.db.mark_session_url(session_id, url, 'pending', error_msg, url_attempts)
+                                retried_count += 1
+                                tqdm.write(f"{Fore.YELLOW}🔁 Retrying in {delay:.0f}s ({error_class}, "
+                                           f"attempt {url_attempts}/{self.retry_policy.max_retries + 1}): {url}")
+                                continue  # La barra no avanza: la URL aún no terminó
+                            
+                            attempts.pop(url, None)
+                            
+                            # Registra la descarga fallida en la base de datos y en el journal
+                            # La tabla de fallos programa cuándo se podrá volver a intentar
+                            with self.timer.span(LOG_WRITE):
+                                self.db.add_failed_download(url, error_msg, error_class, url_attempts,
+                                                            self.retry_policy.failure_cooldown(error_class))
+                                self.db.mark_session_url(session_id, url, 'failed', error_msg, url_attempts)
+                            
+                            # Crea registro detallado del error
+                            failed_downloads.append({
+                                'url': url,                              # URL que falló
+                                'error': error_msg,                      # Mensaje de error
+                                'error_class': error_class,              # Tipo de error
+                                'attempts': url_attempts,                # Intentos realizados
+                                'timestamp': datetime.now().isoformat() # Momento del error
+                            })
+                            
+                            # Muestra mensaje de error con colores
+                            tqdm.write(f"{Fore.RED}❌ Failed to download {url}")
+                            tqdm.write(f"{Fore.RED}   Error ({error_class}): {error_msg}")
+                        
+                        # Avanza la barra una posición por URL procesada
+                        pbar.update(1)
+        except BaseException:
+            # Caída inesperada o segundo Ctrl+C: la sesión queda como interrumpida
+            # (las URLs 'in_flight' se reencolan al reanudar)
+            interrupted = True
+            aborted = True
+            raise
+        finally:
+            # Cierra las instancias de yt-dlp creadas por los workers
+            self._close_ydl_instances()
+            self._restore_sigterm_handler(previous_sigterm)
+            
+            interrupted = interrupted or self._stop_event.is_set()
+            
+            # Una sesión detenida mientras se escribía el journal espera a que
+            # termine, para que --resume tenga todas las URLs de la entrada
+            if journal_thread is not None and not journal_done.is_set() and not aborted:
+                print(f"{Fore.CYAN}📝 Journaling the remaining URLs so the session can be resumed...")
+                journal_done.wait()
+            
+            # ================================================================
+            # FINALIZACIÓN DE SESIÓN
+            # ================================================================
+            
+            # Registra el final de la sesión con los totales del journal
+            # (incluye lo procesado en ejecuciones anteriores de la misma sesión)
+            counts = self.db.get_session_url_counts(session_id)
+            self.db.end_download_session(session_id, counts.get('done', 0), counts.get('failed', 0),
+                                         'interrupted' if interrupted else 'completed')
+            self.db.stop_batch_writer()
+            
+            # ================================================================
+            # GENERACIÓN DE LOG DE DESCARGA
+            # ================================================================
+            
+            # URLs repetidas de la entrada que descartó el journal (solo se
+            # conocen si el journal llegó a completarse)
+            duplicate_urls = journal_stats['read'] - journal_stats['total'] if journal_done.is_set() else 0
+            
+            # Crea archivo de log detallado con todos los resultados
+            # Incluye el contador de extracciones para verificar 1 extracción por URL
+            log_start = time.perf_counter()
+            self.save_download_log(successful_downloads, failed_downloads,
+                                   extra_stats={'session_id': session_id,
+                                                'interrupted': interrupted,
+                                                'skipped_already_archived': skipped_count,
+                                                'skipped_known_failures': skipped_failures,
+                                                'retries': retried_count,
+                                                'duplicate_urls': duplicate_urls,
+                                                'extractions': self._extraction_count,
+                                                'info_cache_hits': self._cache_hit_count,
+                                                'evicted_videos': self.disk_quota.evicted,
+                                                'deduplicated_videos': self.content_store.duplicates
+                                                if self.content_store else 0})
+            
+            # Informe de tiempos por etapa (JSON + archivo Prometheus)
+            if self.timing_report:
+                self.save_timing_report(session_id, len(successful_downloads), len(failed_downloads),
+                                        time.perf_counter() - log_start)
+            
+            if duplicate_urls:
+                print(f"{Fore.CYAN}🔗 Collapsed {duplicate_urls} duplicate URLs")
+            if skipped_count:
+                print(f"{Fore.CYAN}⏭️  Skipped {skipped_count} videos already in the archive")
+            if skipped_failures:
+                print(f"{Fore.CYAN}⏭️  Skipped {skipped_failures} URLs that failed recently "
+                      f"(see 'db failures')")
+            if self.disk_quota.evicted:
+                freed_mb = self.disk_quota.freed_bytes / (1024 * 1024)
+                print(f"{Fore.CYAN}🧹 Evicted {self.disk_quota.evicted} old video files ({freed_mb:.1f} MB) "
+                      f"to stay within the storage budget (see 'db quota')")
+            if self.content_store and self.content_store.duplicates:
+                saved_mb = self.content_store.bytes_saved / (1024 * 1024)
+                print(f"{Fore.CYAN}🔗 {self.content_store.duplicates} duplicate videos "
+                      f"linked to stored copies ({saved_mb:.1f} MB saved)")
+            
+            if interrupted:
+                print(f"{Fore.YELLOW}💡 Resume with: python run_downloader.py --resume {session_id}")
 
         # ====================================================================
         # RETORNO DE RESULTADOS
@@ -463,11 +1238,73 @@ class TikTokDownloader:
         # Retorna ambas listas para que el código que llama pueda procesarlas
         return successful_downloads, failed_downloads
     
+    # ========================================================================
+    # MÉTODO: JOURNAL DE UNA SESIÓN NUEVA (HILO APARTE)
+    # ========================================================================
+    
+    def _journal_urls(self, session_id, urls, done, stats):
+        """
+        Registra las URLs de una sesión nueva en el journal como 'pending'.
+        Se ejecuta en un hilo aparte mientras el motor descarga las URLs que
+        ya están registradas.
+        
+        Parámetros:
+            session_id (str): ID de la sesión
+            urls (iterable): URLs canónicas; las repetidas las descarta el
+                             UNIQUE del journal
+            done (threading.Event): Se activa al terminar (también si falla)
+            stats (dict): Recibe 'read' (URLs leídas) y 'total' (URLs registradas)
+        """
+        
+        def count_read():
+            for url in urls:
+                stats['read'] += 1
+                yield url
+        
+        try:
+            stats['total'] = self.db.add_session_urls(session_id, count_read(), JOURNAL_BATCH_SIZE)
+        finally:
+            done.set()
+    
+    # ========================================================================
+    # MÉTODO: MANEJO DE SIGTERM
+    # ========================================================================
+    
+    def _install_sigterm_handler(self):
+        """
+        Instala un manejador de SIGTERM que pide al motor de descarga que
+        deje de repartir URLs y termine las que están en curso.
+        
+        Retorna:
+            El manejador anterior (para restaurarlo), o None si no se instaló
+        """
+        
+        # signal.signal solo puede llamarse desde el hilo principal
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        
+        def handle_sigterm(signum, frame):
+            logging.warning("SIGTERM received: draining in-flight downloads")
+            self._stop_event.set()
+        
+        return signal.signal(signal.SIGTERM, handle_sigterm)
+    
+    def _restore_sigterm_handler(self, previous):
+        """
+        Restaura el manejador de SIGTERM que había antes de la sesión.
+        
+        Parámetros:
+            previous: Manejador devuelto por _install_sigterm_handler()
+        """
+        
+        if previous is not None:
+            signal.signal(signal.SIGTERM, previous)
+    
     # ========================================================================
     # MÉTODO: GUARDAR LOG DE DESCARGA
     # ========================================================================
     
-    def save_download_log(self, successful, failed):
+    def save_download_log(self, successful, failed, extra_stats=None):
         """
         Guarda un log detallado de la sesión de descarga en formato JSON.
         Este archivo sirve como registro histórico y para debugging.
@@ -475,6 +1312,7 @@ class TikTokDownloader:
         Parámetros:
             successful (list): Lista de descargas exitosas
             failed (list): Lista de descargas fallidas
+            extra_stats (dict): Estadísticas adicionales de la sesión (opcional)
         
         Funcionalidad:
         1. Genera timestamp único para el archivo
@@ -512,6 +1350,9 @@ class TikTokDownloader:
             # Usa operador ternario para evitar división por cero
             'success_rate': len(successful) / (len(successful) + len(failed)) * 100 if (successful or failed) else 0,
             
+            # Estadísticas adicionales (p. ej. número de extracciones)
+            **(extra_stats or {}),
+            
             # Datos detallados de cada descarga
             'successful': successful,  # Lista completa de descargas exitosas
             'failed': failed          # Lista completa de descargas fallidas
@@ -536,6 +1377,79 @@ class TikTokDownloader:
             # Maneja errores de escritura del archivo
             print(f"{Fore.RED}❌ Failed to save log: {str(e)}")
     
+    # ========================================================================
+    # MÉTODO: INFORME DE TIEMPOS POR ETAPA
+    # ========================================================================
+    
+    def save_timing_report(self, session_id, successful, failed, session_log_seconds=0.0):
+        """
+        Exporta los tiempos por etapa de la sesión: un JSON en el directorio
+        de logs y un archivo en formato de texto de Prometheus que el
+        textfile collector de node_exporter puede leer.
+        
+        Parámetros:
+            session_id (str): ID de la sesión
+            successful (int): Descargas exitosas
+            failed (int): Descargas fallidas
+            session_log_seconds (float): Tiempo de escritura del log de la sesión
+        """
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_file = self.logs_dir / f"timing_{timestamp}.json"
+        
+        try:
+            report = self.timer.write_json(report_file, {
+                'session_id': session_id,
+                'successful_downloads': successful,
+                'failed_downloads': failed,
+                'session_log_seconds': round(session_log_seconds, 6),
+            })
+            self.timer.write_prometheus(self.prometheus_textfile, {
+                'session_successful_downloads': successful,
+                'session_failed_downloads': failed,
+                'session_duration_seconds': report['wall_seconds'],
+                'session_last_run_timestamp_seconds': int(time.time()),
+            })
+        except Exception as e:
+            print(f"{Fore.RED}❌ Failed to save timing report: {str(e)}")
+            return
+        
+        # Resumen en pantalla: mediana y p95 de cada etapa con datos
+        print(f"{Fore.BLUE}⏱️  Stage timing (p50 / p95 per URL), report: {report_file}")
+        for stage, stats in report['stages'].items():
+            if stats['count']:
+                print(f"{Fore.BLUE}   {stage:<13} {stats['p50'] * 1000:8.1f} ms / {stats['p95'] * 1000:8.1f} ms "
+                      f"({stats['count']} samples, {stats['total']:.1f}s total)")
+    
+    # ========================================================================
+    # MÉTODO: PERFIL DE LA EJECUCIÓN (--profile)
+    # ========================================================================
+    
+    def save_profile(self, profiler):
+        """
+        Guarda el perfil de la ejecución junto a los logs de sesión y muestra
+        las funciones con más tiempo propio.
+        
+        Archivos generados en outputs/logs:
+        - profile_<timestamp>.pstats: cProfile (python -m pstats, snakeviz)
+        - profile_<timestamp>.collapsed: pilas muestreadas (--profile-sampler),
+          para flamegraph.pl o speedscope
+        
+        Parámetros:
+            profiler (SessionProfiler): Perfilador ya detenido
+        """
+        
+        try:
+            files = profiler.save(self.logs_dir, "profile")
+        except Exception as e:
+            print(f"{Fore.RED}❌ Failed to save profile: {str(e)}")
+            return
+        
+        print(f"\n{Fore.MAGENTA}🔬 Profile ({profiler.elapsed:.1f}s): {', '.join(str(path) for path in files)}")
+        print(f"{Fore.MAGENTA}   Top functions by own time:")
+        for line in profiler.summary_lines():
+            print(f"   {line}")
+    
     # ========================================================================
     # MÉTODO: MOSTRAR RESUMEN DE DESCARGA
     # ========================================================================
@@ -625,14 +1539,14 @@ class TikTokDownloader:
     
     def list_available_files(self):
         """
-        Busca y lista todos los archivos .txt disponibles en el directorio de datos.
-        Estos archivos contienen las URLs de TikTok a descargar.
+        Busca y lista todos los archivos de URLs (.txt, .csv, .jsonl) disponibles
+        en el directorio de datos. Estos archivos contienen las URLs de TikTok a descargar.
         
         Retorna:
-            list: Lista de objetos Path de archivos .txt encontrados
+            list: Lista de objetos Path de archivos encontrados
         
         Funcionalidad:
-        1. Busca archivos .txt en el directorio de datos
+        1. Busca archivos .txt, .csv y .jsonl en el directorio de datos
         2. Los muestra numerados para selección del usuario
         3. Retorna la lista para uso posterior
         """
@@ -641,9 +1555,9 @@ class TikTokDownloader:
         # BÚSQUEDA DE ARCHIVOS
         # ====================================================================
         
-        # Busca todos los archivos .txt en el directorio de datos
-        # glob("*.txt") encuentra archivos que terminen en .txt
-        txt_files = list(self.data_dir.glob("*.txt"))
+        # Busca todos los archivos con extensión soportada en el directorio de datos
+        # glob("*.txt") encuentra archivos que terminen en .txt (igual para .csv y .jsonl)
+        txt_files = sorted(file for ext in SUPPORTED_EXTENSIONS for file in self.data_dir.glob(f"*{ext}"))
         
         # ====================================================================
         # PRESENTACIÓN DE ARCHIVOS ENCONTRADOS
@@ -660,7 +1574,7 @@ class TikTokDownloader:
             return txt_files  # Retorna lista para uso posterior
         else:
             # Si no hay archivos, informa al usuario
-            print(f"{Fore.YELLOW}📂 No .txt files found in data directory")
+            print(f"{Fore.YELLOW}📂 No URL files (.txt, .csv, .jsonl) found in data directory")
             return []  # Retorna lista vacía
     
     # ========================================================================
@@ -750,27 +1664,29 @@ class TikTokDownloader:
         # ====================================================================
         
         # Carga URLs del archivo seleccionado
-        urls = self.load_urls_from_file(selected_file.name)
+        # (generador: las URLs se leen a medida que se registran en el journal)
+        urls = self.iter_urls_from_file(selected_file.name)
         
-        # Si se encontraron URLs válidas, procede con la descarga
-        if urls:
-            # Ejecuta el proceso de descarga
-            successful, failed = self.download_videos(urls, selected_file.name)
-            
-            # Muestra resumen detallado de resultados
+        # Ejecuta el proceso de descarga
+        successful, failed = self.download_videos(urls, selected_file.name)
+        
+        # Si se encontraron URLs válidas, muestra resumen detallado de resultados
+        if self.last_session_id:
             self.print_summary(successful, failed)
     
     # ========================================================================
     # MÉTODO: MODO BATCH (POR LOTES)
     # ========================================================================
     
-    def run_batch(self, filename="tiktok_urls.txt"):
+    def run_batch(self, filename="tiktok_urls.txt", resume_session=None):
         """
         Ejecuta el descargador en modo batch (por lotes) con un archivo específico.
         Este modo es ideal para automatización y uso programático.
         
         Parámetros:
             filename (str): Nombre del archivo a procesar (por defecto: "tiktok_urls.txt")
+            resume_session (str): ID de una sesión interrumpida a reanudar (opcional).
+                                  Las URLs pendientes se leen del journal, no del archivo.
         
         Funcionalidad:
         1. Muestra encabezado del modo batch
@@ -794,25 +1710,36 @@ class TikTokDownloader:
         print(f"{Fore.MAGENTA}🎬 TikTok Downloader - Batch Mode")
         print(f"{Fore.MAGENTA}{'='*60}")
         
+        # ====================================================================
+        # CASO: REANUDAR UNA SESIÓN INTERRUMPIDA
+        # ====================================================================
+        
+        if resume_session:
+            # El journal de la sesión ya contiene todas sus URLs
+            successful, failed = self.download_videos([], filename, session_id=resume_session)
+            self.print_summary(successful, failed)
+            return
+        
         # ====================================================================
         # CARGA DE URLs DEL ARCHIVO ESPECIFICADO
         # ====================================================================
         
-        # Intenta cargar URLs del archivo especificado
-        urls = self.load_urls_from_file(filename)
+        # Prepara la lectura perezosa del archivo ('-' lee de stdin)
+        # Nada se carga en memoria: download_videos consume el generador por lotes
+        urls = self.iter_urls_from_file(filename)
+        
+        # Ejecuta descarga con el archivo como fuente para tracking
+        successful, failed = self.download_videos(urls, filename)
         
         # ====================================================================
         # PROCESAMIENTO BASADO EN RESULTADOS
         # ====================================================================
         
-        if urls:
+        if self.last_session_id:
             # ================================================================
-            # CASO: URLS ENCONTRADAS - PROCESAR DESCARGA
+            # CASO: URLS ENCONTRADAS - MOSTRAR RESULTADOS
             # ================================================================
             
-            # Ejecuta descarga con el archivo como fuente para tracking
-            successful, failed = self.download_videos(urls, filename)
-            
             # Muestra resumen completo de resultados
             self.print_summary(successful, failed)
         else:
@@ -835,6 +1762,7 @@ def main():
     Lógica de decisión:
     - Si hay argumentos: Modo batch con archivo específico
     - Si no hay argumentos: Modo interactivo
+    - Con --profile: la ejecución completa se perfila (ver profiler.py)
     
     Funcionalidad:
     1. Crea instancia del descargador
@@ -842,6 +1770,27 @@ def main():
     3. Ejecuta el modo apropiado
     """
     
+    # ========================================================================
+    # ANÁLISIS DE ARGUMENTOS DE LÍNEA DE COMANDOS
+    # ========================================================================
+    
+    # sys.argv contiene los argumentos pasados al script
+    # sys.argv[0] = nombre del script
+    # sys.argv[1] = primer argumento (si existe)
+    # len(sys.argv) > 1 significa que hay al menos un argumento
+    args = sys.argv[1:]
+    
+    # --profile / --profile-sampler pueden ir en cualquier posición
+    # El perfilador arranca antes de crear el descargador para incluir su inicialización
+    # (cProfile y pstats solo se importan si se pide el perfil)
+    profiler = None
+    if any(arg in ('--profile', '--profile-sampler') for arg in args):
+        from profiler import SessionProfiler, pop_profile_options
+        
+        _, sampler = pop_profile_options(args)
+        profiler = SessionProfiler(sampler=sampler)
+        profiler.start()
+    
     # ========================================================================
     # INICIALIZACIÓN DEL DESCARGADOR
     # ========================================================================
@@ -850,25 +1799,51 @@ def main():
     # Esto ejecuta __init__() que configura directorios, base de datos, etc.
     downloader = TikTokDownloader()
     
-    # ========================================================================
-    # ANÁLISIS DE ARGUMENTOS DE LÍNEA DE COMANDOS
-    # ========================================================================
+    try:
+        run_mode(downloader, args)
+    finally:
+        # También se guarda el perfil de una ejecución interrumpida (Ctrl+C)
+        if profiler is not None:
+            profiler.stop()
+            downloader.save_profile(profiler)
+
+
+def run_mode(downloader, args):
+    """
+    Ejecuta el modo indicado por los argumentos (reanudación, batch o interactivo).
     
-    # sys.argv contiene los argumentos pasados al script
-    # sys.argv[0] = nombre del script
-    # sys.argv[1] = primer argumento (si existe)
-    # len(sys.argv) > 1 significa que hay al menos un argumento
+    Parámetros:
+        downloader (TikTokDownloader): Descargador ya inicializado
+        args (list): Argumentos de línea de comandos (sin el nombre del script)
+    """
+    
+    # Extrae la opción --resume <session_id> si está presente
+    resume_session = None
+    if '--resume' in args:
+        index = args.index('--resume')
+        if index + 1 >= len(args):
+            print(f"{Fore.RED}❌ --resume requires a session ID")
+            return
+        resume_session = args[index + 1]
+        del args[index:index + 2]
     
-    if len(sys.argv) > 1:
+    if resume_session:
+        # ====================================================================
+        # MODO REANUDACIÓN: SESIÓN INTERRUMPIDA
+        # ====================================================================
+        
+        # Ejemplo: python TikTokDL.py --resume 1b4e28ba-2fa1-11d2-883f-0016d3cca427
+        downloader.run_batch(args[0] if args else None, resume_session=resume_session)
+    elif args:
         # ====================================================================
         # MODO BATCH: ARCHIVO ESPECÍFICO
         # ====================================================================
         
         # Obtiene el nombre del archivo del primer argumento
-        filename = sys.argv[1]
+        filename = args[0]
         
         # Ejecuta descarga en modo batch con el archivo especificado
-        # Ejemplo: python TikTokDL.py mi_lista.txt
+        # Ejemplo: python TikTokDL.py mi_lista.txt  (o .csv, .jsonl, "-" para stdin)
         downloader.run_batch(filename)
     else:
         # ====================================================================
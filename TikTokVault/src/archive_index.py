@@ -0,0 +1,93 @@
+"""
+TikTok Archive Index
+Fast membership checks for video IDs that are already archived in the database
+"""
+
+import hashlib
+import logging
+import math
+import threading
+
+
+class AlreadyArchivedError(Exception):
+    """Raised when a video is already downloaded and should be skipped"""
+
+    def __init__(self, video_id: str):
+        super().__init__(f"Video {video_id} is already archived")
+        self.video_id = video_id
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Initialize an empty Bloom filter
+
+        Args:
+            capacity: Expected number of items
+            error_rate: Target false positive probability
+        """
+        capacity = max(capacity, 1)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str):
+        """Bit positions for an item (double hashing over one blake2b digest)"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: str):
+        """Add an item to the filter"""
+        positions = self._positions(item)
+        with self._lock:
+            for pos in positions:
+                self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        """False means definitely absent; True means probably present"""
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class ArchiveIndex:
+    def __init__(self, db, error_rate: float = 0.01):
+        """
+        Build the index from the completed videos stored in the database
+
+        Args:
+            db: TikTokDatabase instance
+            error_rate: Bloom filter false positive probability
+        """
+        self.db = db
+
+        count = db.count_completed_videos()
+        # Leave headroom so the filter stays accurate as new videos are added
+        self.bloom = BloomFilter(max(count * 2, 10000), error_rate)
+        for video_id in db.iter_completed_video_ids():
+            self.bloom.add(video_id)
+
+        logging.info(f"Archive index loaded with {count} video IDs")
+
+    def contains(self, video_id: str) -> bool:
+        """
+        Check whether a video is already archived
+
+        The in-memory Bloom filter answers most negative lookups without touching
+        the database; possible hits are confirmed against SQLite.
+
+        Args:
+            video_id: TikTok video ID
+
+        Returns:
+            bool: True if the video is already downloaded
+        """
+        if not video_id or video_id not in self.bloom:
+            return False
+        return self.db.has_completed_video(video_id)
+
+    def add(self, video_id: str):
+        """Record a newly archived video"""
+        if video_id:
+            self.bloom.add(video_id)
@@ -0,0 +1,60 @@
+"""
+TikTok Downloader Configuration
+Loads settings from configs/database_config.ini with safe defaults
+"""
+
+import configparser
+from pathlib import Path
+
+# Default location of the configuration file (repository root / configs)
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent.parent / "configs" / "database_config.ini"
+
+# Fallback values used when the file or a key is missing
+DEFAULTS = {
+    'performance': {
+        'concurrent_downloads': '1',
+        'retry_count': '3',
+        'timeout': '30',
+    },
+    'cache': {
+        'enable_info_cache': 'true',
+        'info_cache_ttl_hours': '6',
+        'info_cache_max_mb': '256',
+        'skip_known_failures': 'true',
+    },
+    'output': {
+        'layout': '',
+        'organize_by_creator': 'false',
+        'filename_template': '%(uploader)s_%(title)s_%(id)s.%(ext)s',
+        'id_filenames': 'false',
+    },
+    'storage': {
+        'content_addressed': 'false',
+        'link_mode': 'hardlink',
+        'max_vault_gb': '0',
+        'max_creator_gb': '0',
+        'min_free_gb': '1',
+        'free_space_check_seconds': '30',
+    },
+    'metrics': {
+        'timing_report': 'true',
+        'prometheus_textfile': '',
+    },
+}
+
+
+def load_config(config_path: Path = None) -> configparser.ConfigParser:
+    """
+    Load the downloader configuration
+
+    Args:
+        config_path: Path to the .ini file. If None, uses configs/database_config.ini
+
+    Returns:
+        ConfigParser: Parsed configuration with defaults applied
+    """
+    # Interpolation is disabled because filename templates contain '%(...)s'
+    config = configparser.ConfigParser(interpolation=None)
+    config.read_dict(DEFAULTS)
+    config.read(config_path or DEFAULT_CONFIG_PATH, encoding='utf-8')
+    return config
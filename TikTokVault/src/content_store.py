@@ -0,0 +1,157 @@
+"""
+TikTok Content-Addressed Store
+Stores each distinct video payload once (keyed by SHA-256) and exposes it by link
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Tuple
+
+# Bytes read per hashing step (keeps memory flat for any file size)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# How a stored object is exposed at the downloaded file's path
+HARDLINK = 'hardlink'
+SYMLINK = 'symlink'
+LINK_MODES = (HARDLINK, SYMLINK)
+
+
+def hash_file(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Compute the SHA-256 of a file in streaming fashion
+
+    Args:
+        path: File to hash
+        chunk_size: Bytes read per step
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def object_path(root: Path, digest: str, suffix: str = '') -> Path:
+    """
+    Location of a stored object: <root>/<ab>/<cd>/<sha256><ext>
+
+    Two directory levels keep each directory small however many videos are archived.
+    """
+    return Path(root) / digest[:2] / digest[2:4] / f"{digest}{suffix}"
+
+
+class ContentStore:
+    def __init__(self, root: Path, link_mode: str = HARDLINK):
+        """
+        Initialize the store
+
+        Args:
+            root: Store directory (same filesystem as the videos for hardlinks)
+            link_mode: 'hardlink' (falls back to a symlink) or 'symlink'
+
+        Raises:
+            ValueError: Unknown link mode
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{link_mode}' (use {', '.join(LINK_MODES)})")
+
+        self.root = Path(root)
+        self.link_mode = link_mode
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # Serializes the check-then-move of new objects between workers
+        self._lock = threading.Lock()
+
+        # Payloads that were already stored, and the disk space that saved
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+    def object_path(self, digest: str, suffix: str = '') -> Path:
+        """Location of the object with the given hash"""
+        return object_path(self.root, digest, suffix)
+
+    def add(self, path: Path) -> Tuple[str, bool]:
+        """
+        Move a downloaded file into the store and link it back in place
+
+        The file keeps its original name for the user; if an identical payload
+        is already stored, the new copy is dropped and replaced by a link to it.
+
+        Args:
+            path: Downloaded file
+
+        Returns:
+            Tuple[str, bool]: SHA-256 hex digest and whether the payload was a duplicate
+
+        Raises:
+            OSError: The file can't be read or moved
+        """
+        path = Path(path)
+        if path.is_symlink():
+            # Already exposed by link (e.g. re-processed file)
+            return hash_file(path), False
+
+        # Hash outside the lock: it is the slow part and workers can overlap it
+        digest = hash_file(path)
+        target = self.object_path(digest, path.suffix)
+
+        with self._lock:
+            duplicate = target.exists()
+            if duplicate:
+                if self._same_file(path, target):
+                    return digest, False
+                size = path.stat().st_size
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(path), str(target))
+
+            self._link(target, path)
+
+            if duplicate:
+                self.duplicates += 1
+                self.bytes_saved += size
+
+        return digest, duplicate
+
+    @staticmethod
+    def _same_file(path: Path, target: Path) -> bool:
+        """Whether path is already a hardlink to target"""
+        try:
+            return os.path.samefile(path, target)
+        except OSError:
+            return False
+
+    def _link(self, target: Path, path: Path):
+        """
+        Atomically replace path with a link to target
+
+        The link is created under a temporary name and renamed over path, so
+        path never disappears. Falls back from hardlink to symlink (e.g. store
+        on another filesystem) and from symlink to a plain copy (e.g. Windows
+        without symlink permission).
+        """
+        temp_path = path.with_name(f".{path.name}.link")
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+
+        if self.link_mode == HARDLINK:
+            try:
+                os.link(target, temp_path)
+                os.replace(temp_path, path)
+                return
+            except OSError as e:
+                logging.warning(f"Hardlink failed for {path}, using a symlink: {str(e)}")
+
+        try:
+            os.symlink(os.path.relpath(target, path.parent), temp_path)
+        except OSError as e:
+            logging.warning(f"Symlink failed for {path}, keeping a copy: {str(e)}")
+            shutil.copy2(target, temp_path)
+        os.replace(temp_path, path)
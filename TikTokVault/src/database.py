@@ -5,10 +5,188 @@ Handles database operations for storing video metadata
 
 import sqlite3
 import json
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import logging
+import threading
+from itertools import islice
+
+from db_writer import DatabaseWriter
+from metadata_codec import decode_metadata, encode_metadata
+from retry import UNKNOWN, RetryPolicy, classify_message
+from url_utils import canonicalize_url, extract_video_id
+
+# Columns written for a video record, in TikTokDatabase._video_row order
+VIDEO_COLUMNS = (
+    'video_id', 'url', 'title', 'description', 'creator_username',
+    'creator_display_name', 'duration', 'view_count', 'like_count',
+    'comment_count', 'share_count', 'upload_date', 'download_date',
+    'file_path', 'thumbnail_path', 'file_size', 'format_quality',
+    'tags', 'metadata_json', 'updated_at', 'content_hash'
+)
+
+# Schema version stored in PRAGMA user_version once init_database has run.
+# Bump it whenever init_database creates or migrates something new, so
+# existing databases run the (idempotent) initialization once more
+SCHEMA_VERSION = 2
+
+# Insert or update a video's compressed metadata (see TikTokDatabase._metadata_row)
+INSERT_METADATA_SQL = '''
+    INSERT INTO video_metadata (video_id, codec, data) VALUES (?, ?, ?)
+    ON CONFLICT(video_id) DO UPDATE SET codec = excluded.codec, data = excluded.data
+'''
+
+# yt-dlp info dict keys not worth storing (large and only useful while downloading)
+METADATA_EXCLUDED_KEYS = ('formats', 'thumbnails', 'automatic_captions', 'subtitles')
+
+# Disk quota eviction order: lowest priority first, then least recently
+# accessed (never-viewed videos count from their download date)
+EVICTION_ORDER = 'priority, COALESCE(last_accessed, download_date)'
+
+# Videos whose file is still on disk (disk quota)
+ON_DISK_WHERE = "download_status = 'completed' AND file_path IS NOT NULL AND file_path != ''"
+
+# Key of a video's payload on disk: videos with the same content_hash link one stored object
+PAYLOAD_KEY = "COALESCE(NULLIF(content_hash, ''), 'video:' || video_id)"
+
+# Insert or update a video record. An upsert (instead of INSERT OR REPLACE)
+# keeps the row id stable and fires the UPDATE triggers that maintain the
+# full-text index; REPLACE deletes the old row without firing DELETE triggers.
+INSERT_VIDEO_SQL = f'''
+    INSERT INTO videos ({', '.join(VIDEO_COLUMNS)})
+    VALUES ({', '.join('?' * len(VIDEO_COLUMNS))})
+    ON CONFLICT(video_id) DO UPDATE SET
+        {', '.join(f'{column} = excluded.{column}' for column in VIDEO_COLUMNS[1:] if column != 'content_hash')},
+        content_hash = COALESCE(excluded.content_hash, videos.content_hash),
+        evicted_at = NULL,
+        download_status = 'completed'
+'''
+
+# Trigger statements adding / removing one video row's contribution to the
+# incrementally maintained statistics ({row} is 'new' or 'old')
+_STATS_ADD_SQL = '''
+    UPDATE video_stats SET
+        total_videos = total_videos + ({row}.download_status = 'completed'),
+        failed_downloads = failed_downloads + ({row}.download_status = 'failed'),
+        total_file_size = total_file_size
+            + CASE WHEN {row}.download_status = 'completed' THEN COALESCE({row}.file_size, 0) ELSE 0 END,
+        first_download = CASE WHEN {row}.download_status = 'completed'
+            AND (first_download IS NULL OR {row}.download_date < first_download)
+            THEN {row}.download_date ELSE first_download END,
+        last_download = CASE WHEN {row}.download_status = 'completed'
+            AND (last_download IS NULL OR {row}.download_date > last_download)
+            THEN {row}.download_date ELSE last_download END
+    WHERE id = 1;
+    INSERT INTO creator_stats (creator_username, video_count, total_file_size)
+    SELECT {row}.creator_username, 1, COALESCE({row}.file_size, 0)
+    WHERE {row}.download_status = 'completed' AND {row}.creator_username IS NOT NULL
+    ON CONFLICT(creator_username) DO UPDATE SET
+        video_count = video_count + 1,
+        total_file_size = total_file_size + excluded.total_file_size;
+'''
+
+_STATS_REMOVE_SQL = '''
+    UPDATE video_stats SET
+        total_videos = total_videos - ({row}.download_status = 'completed'),
+        failed_downloads = failed_downloads - ({row}.download_status = 'failed'),
+        total_file_size = total_file_size
+            - CASE WHEN {row}.download_status = 'completed' THEN COALESCE({row}.file_size, 0) ELSE 0 END
+    WHERE id = 1;
+    UPDATE creator_stats SET
+        video_count = video_count - 1,
+        total_file_size = total_file_size - COALESCE({row}.file_size, 0)
+    WHERE creator_username = {row}.creator_username AND {row}.download_status = 'completed';
+    DELETE FROM creator_stats
+    WHERE creator_username = {row}.creator_username AND video_count <= 0;
+'''
+
+# Recompute the download date range, only when a boundary row went away
+# (indexed lookups, so they stay cheap even then)
+_STATS_RANGE_SQL = '''
+    UPDATE video_stats SET first_download = (
+        SELECT download_date FROM videos WHERE download_status = 'completed'
+        ORDER BY download_date LIMIT 1
+    ) WHERE id = 1 AND first_download = old.download_date;
+    UPDATE video_stats SET last_download = (
+        SELECT download_date FROM videos WHERE download_status = 'completed'
+        ORDER BY download_date DESC LIMIT 1
+    ) WHERE id = 1 AND last_download = old.download_date;
+'''
+
+# Light projection for list views: everything but the large text/JSON columns
+LIST_COLUMNS = (
+    'id', 'video_id', 'url', 'title', 'creator_username', 'duration',
+    'view_count', 'like_count', 'file_size', 'download_date'
+)
+
+# Hashtags in a description, used when yt-dlp reports no tags
+HASHTAG_PATTERN = re.compile(r'#(\w+)')
+
+# Tag normalization used by the video_tags triggers: case-insensitive, no '#'
+_NORMALIZED_TAG_SQL = "lower(trim(ltrim(trim(value), '#')))"
+
+# Search fields accepted by search_videos, mapped to full-text index columns
+SEARCH_FIELDS = {
+    'title': 'title',
+    'creator': 'creator_username',
+    'description': 'description',
+}
+
+# BM25 column weights (title, creator_username, description): a match in the
+# title counts more than one buried in a long description
+SEARCH_RANK = 'bm25(videos_fts, 10.0, 5.0, 1.0)'
+
+# Quoted phrases, or single terms (optionally ending in * for prefix search)
+_SEARCH_TOKEN_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_fts_query(query: str, field: str = 'all') -> str:
+    """
+    Translate a user search query into an FTS5 MATCH expression
+    
+    Terms are quoted so punctuation in user input (e.g. '-', ':', '.') is
+    never parsed as FTS5 syntax. Supported syntax:
+        word      -> term
+        word*     -> prefix search
+        "a b c"   -> phrase search
+        OR / NOT  -> boolean operators (uppercase, as in FTS5)
+    
+    Args:
+        query: Search query as typed by the user
+        field: Field to search in ('all', 'title', 'creator', 'description')
+        
+    Returns:
+        str: FTS5 query, or '' if the query has no searchable terms
+    """
+    parts = []
+    for match in _SEARCH_TOKEN_PATTERN.finditer(query):
+        phrase, term = match.groups()
+        if phrase is not None:
+            if phrase.strip():
+                parts.append('"' + phrase.strip() + '"')
+        elif term in ('OR', 'NOT', 'AND'):
+            parts.append(term)
+        else:
+            prefix = term.endswith('*')
+            term = term.rstrip('*').replace('"', '""')
+            if term:
+                parts.append('"' + term + '"' + ('*' if prefix else ''))
+    
+    # Dangling operators are a syntax error in FTS5
+    while parts and parts[0] in ('OR', 'NOT', 'AND'):
+        parts.pop(0)
+    while parts and parts[-1] in ('OR', 'NOT', 'AND'):
+        parts.pop()
+    if not parts:
+        return ''
+    
+    expression = ' '.join(parts)
+    if field in SEARCH_FIELDS:
+        expression = f'{SEARCH_FIELDS[field]} : ({expression})'
+    return expression
+
 
 class TikTokDatabase:
     def __init__(self, db_path: Path = None):
@@ -27,14 +205,78 @@ class TikTokDatabase:
         # Ensure directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # Serializes writes so concurrent download workers don't hit "database is locked"
+        self._write_lock = threading.Lock()
+        
+        # Optional single background writer (see start_batch_writer)
+        self._writer = None
+        
+        # Whether SQLite was built with FTS5 (set by init_database)
+        self.fts_enabled = False
+        
+        # Persistent connections, one per thread (see _connection)
+        self._local = threading.local()
+        self._connections = []  # (thread, connection) pairs, for close()
+        self._connections_lock = threading.Lock()
+        
         # Initialize database
         self.init_database()
     
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get the calling thread's persistent connection, opening it on first use
+        
+        Each thread keeps its own connection for the lifetime of the database
+        object, so calls no longer pay for a connect per query, and the
+        connection's statement cache keeps prepared statements around.
+        
+        Returns:
+            sqlite3.Connection: Connection with sqlite3.Row as row factory
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread=False only so close() can close every thread's connection
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                   cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers run while a download worker writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            
+            self._local.conn = conn
+            with self._connections_lock:
+                # Close connections left behind by finished threads (e.g. the
+                # workers of a previous download session)
+                alive = []
+                for thread, other in self._connections:
+                    if thread.is_alive():
+                        alive.append((thread, other))
+                    else:
+                        other.close()
+                alive.append((threading.current_thread(), conn))
+                self._connections = alive
+        return conn
+    
     def init_database(self):
-        """Create database tables if they don't exist"""
-        with sqlite3.connect(self.db_path) as conn:
+        """
+        Create database tables if they don't exist
+        
+        A database already at SCHEMA_VERSION skips the CREATE/ALTER statements
+        and backfill checks entirely (one PRAGMA read), so opening the archive
+        stays cheap for short-lived commands like the db viewer.
+        """
+        with self._connection() as conn:
             cursor = conn.cursor()
             
+            cursor.execute('PRAGMA user_version')
+            if cursor.fetchone()[0] == SCHEMA_VERSION:
+                # Without videos_fts (SQLite built without FTS5) the full
+                # initialization runs, in case this build can create it
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos_fts'")
+                if cursor.fetchone() is not None:
+                    self.fts_enabled = True
+                    return
+            
             # Create videos table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS videos (
@@ -57,13 +299,24 @@ class TikTokDatabase:
                     file_size INTEGER,
                     format_quality TEXT,
                     tags TEXT,  -- JSON string of tags/hashtags
-                    metadata_json TEXT,  -- Full metadata as JSON
+                    metadata_json TEXT,  -- Legacy inline metadata (now in video_metadata)
                     download_status TEXT DEFAULT 'completed',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    content_hash TEXT,  -- SHA-256 of the payload (content-addressed store)
+                    priority INTEGER DEFAULT 0,  -- Lower is evicted first by the disk quota
+                    last_accessed TEXT,  -- Last time the video was viewed (eviction order)
+                    evicted_at TEXT  -- File deleted by the disk quota (row kept, file_path cleared)
                 )
             ''')
             
+            # Columns added after the videos table: payload hash (content-addressed
+            # store) and disk quota eviction bookkeeping
+            self._add_column_if_missing(cursor, 'videos', 'content_hash', 'TEXT')
+            self._add_column_if_missing(cursor, 'videos', 'priority', 'INTEGER DEFAULT 0')
+            self._add_column_if_missing(cursor, 'videos', 'last_accessed', 'TEXT')
+            self._add_column_if_missing(cursor, 'videos', 'evicted_at', 'TEXT')
+            
             # Create download_sessions table to track batch downloads
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS download_sessions (
@@ -80,305 +333,1982 @@ class TikTokDatabase:
                 )
             ''')
             
+            # Older databases don't have the session status column
+            self._add_column_if_missing(cursor, 'download_sessions', 'status', "TEXT DEFAULT 'running'")
+            
+            # Create session_urls table: per-URL checkpoint journal used to resume sessions
+            # status: pending -> in_flight -> done | failed
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS session_urls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    error TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(session_id, url)
+                )
+            ''')
+            
+            # Attempt counter was added after the journal table
+            self._add_column_if_missing(cursor, 'session_urls', 'attempts', 'INTEGER DEFAULT 0')
+            
+            # Create url_resolutions table: persistent cache of resolved short links
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS url_resolutions (
+                    short_url TEXT PRIMARY KEY,
+                    resolved_url TEXT NOT NULL,
+                    resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Create failed_downloads table: one row per video (or per canonical URL
+            # for links without a video ID) whose download finally failed, also
+            # used as a negative cache (see get_active_failure)
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'failed_downloads'")
+            migrate_failures = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS failed_downloads (
+                    url TEXT PRIMARY KEY,
+                    video_id TEXT,
+                    error TEXT,
+                    error_class TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    first_failed_at TEXT NOT NULL,
+                    last_failed_at TEXT NOT NULL,
+                    next_retry_at TEXT
+                )
+            ''')
+            
             # Create indexes for better performance
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_video_id ON videos(video_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_creator_username ON videos(creator_username)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_download_date ON videos(download_date)')
+            # Keyset pagination indexes: (download_date, id) order within a status / creator
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_status_download_date ON videos(download_status, download_date)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_creator_download_date ON videos(creator_username, download_date)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_content_hash ON videos(content_hash)')
+            # Eviction order of the disk quota (see get_eviction_candidates)
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_eviction_order ON videos({EVICTION_ORDER})')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_id ON download_sessions(session_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_urls_status ON session_urls(session_id, status)')
+            
+            self._init_statistics(cursor)
+            self._init_tag_index(cursor)
+            self._init_metadata_table(cursor)
+            self._init_failures(cursor, migrate_failures)
+            self.fts_enabled = self._init_search_index(cursor)
             
+            # Set last, so an interrupted initialization runs again next time
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
             conn.commit()
     
-    def add_video(self, video_data: Dict) -> bool:
+    @classmethod
+    def _init_statistics(cls, cursor):
         """
-        Add a video record to the database
+        Create the statistics tables and the triggers that maintain them
+        
+        video_stats holds a single row of archive-wide counters and
+        creator_stats one row per creator. Triggers on videos apply each
+        insert, update and delete as a delta, so get_statistics never scans
+        the videos table. A database created before these tables existed is
+        backfilled once here.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_stats'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_videos INTEGER NOT NULL DEFAULT 0,
+                failed_downloads INTEGER NOT NULL DEFAULT 0,
+                unique_creators INTEGER NOT NULL DEFAULT 0,
+                total_file_size INTEGER NOT NULL DEFAULT 0,
+                first_download TEXT,
+                last_download TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS creator_stats (
+                creator_username TEXT PRIMARY KEY,
+                video_count INTEGER NOT NULL DEFAULT 0,
+                total_file_size INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_creator_stats_count ON creator_stats(video_count)')
+        cursor.execute('INSERT OR IGNORE INTO video_stats (id) VALUES (1)')
+        
+        # The number of creators follows the rows of creator_stats
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS creator_stats_insert AFTER INSERT ON creator_stats BEGIN
+                UPDATE video_stats SET unique_creators = unique_creators + 1 WHERE id = 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS creator_stats_delete AFTER DELETE ON creator_stats BEGIN
+                UPDATE video_stats SET unique_creators = unique_creators - 1 WHERE id = 1;
+            END
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS videos_stats_insert AFTER INSERT ON videos BEGIN
+                {_STATS_ADD_SQL.format(row='new')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS videos_stats_delete AFTER DELETE ON videos BEGIN
+                {_STATS_REMOVE_SQL.format(row='old')}
+                {_STATS_RANGE_SQL}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS videos_stats_update
+            AFTER UPDATE OF download_status, creator_username, file_size, download_date ON videos BEGIN
+                {_STATS_REMOVE_SQL.format(row='old')}
+                {_STATS_RANGE_SQL}
+                {_STATS_ADD_SQL.format(row='new')}
+            END
+        ''')
+        
+        if not exists:
+            cls._rebuild_statistics(cursor)
+    
+    @staticmethod
+    def _rebuild_statistics(cursor):
+        """Recompute the statistics tables from a full scan of videos"""
+        cursor.execute('DELETE FROM creator_stats')
+        cursor.execute('''
+            INSERT INTO creator_stats (creator_username, video_count, total_file_size)
+            SELECT creator_username, COUNT(*), COALESCE(SUM(file_size), 0)
+            FROM videos
+            WHERE download_status = 'completed' AND creator_username IS NOT NULL
+            GROUP BY creator_username
+        ''')
+        
+        # Runs last: it overwrites unique_creators touched by the triggers above
+        cursor.execute('''
+            INSERT OR REPLACE INTO video_stats (
+                id, total_videos, failed_downloads, unique_creators,
+                total_file_size, first_download, last_download
+            )
+            SELECT 1,
+                COALESCE(SUM(download_status = 'completed'), 0),
+                -- Legacy failure rows in videos plus the failed_downloads table
+                COALESCE(SUM(download_status = 'failed'), 0) + (SELECT COUNT(*) FROM failed_downloads),
+                (SELECT COUNT(*) FROM creator_stats),
+                COALESCE(SUM(CASE WHEN download_status = 'completed' THEN file_size ELSE 0 END), 0),
+                MIN(CASE WHEN download_status = 'completed' THEN download_date END),
+                MAX(CASE WHEN download_status = 'completed' THEN download_date END)
+            FROM videos
+        ''')
+    
+    def rebuild_statistics(self) -> Optional[Dict]:
+        """
+        Recompute the statistics tables from scratch and report any drift
+        
+        The counters are maintained by triggers and should never drift; this is
+        a consistency check and a repair tool (e.g. after editing the database
+        by hand with triggers dropped).
         
-        Args:
-            video_data: Dictionary containing video information
-            
         Returns:
-            bool: True if successful, False otherwise
+            Dict or None: {counter: (stored value, recomputed value)} for every
+                          counter that was wrong, plus 'creator_rows' with the
+                          number of wrong per-creator rows (empty if all were
+                          consistent), or None on error
         """
+        self.flush_writes()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._write_lock, self._connection() as conn:
                 cursor = conn.cursor()
                 
-                # Extract and prepare data
-                video_id = video_data.get('id', '')
-                url = video_data.get('webpage_url', video_data.get('url', ''))
-                title = video_data.get('title', '')
-                description = video_data.get('description', '')
-                creator_username = video_data.get('uploader', video_data.get('uploader_id', ''))
-                creator_display_name = video_data.get('uploader', '')
-                duration = video_data.get('duration', 0)
-                view_count = video_data.get('view_count', 0)
-                like_count = video_data.get('like_count', 0)
-                comment_count = video_data.get('comment_count', 0)
-                share_count = video_data.get('repost_count', 0)
-                upload_date = video_data.get('upload_date', '')
-                download_date = datetime.now().isoformat()
-                
-                # File information
-                file_path = video_data.get('_filename', '')
-                thumbnail_path = video_data.get('thumbnail', '')
-                file_size = video_data.get('filesize', 0) or video_data.get('filesize_approx', 0)
-                format_quality = video_data.get('format', '')
-                
-                # Tags/hashtags
-                tags = video_data.get('tags', [])
-                tags_json = json.dumps(tags) if tags else None
-                
-                # Full metadata as JSON (excluding binary data)
-                metadata_copy = dict(video_data)
-                # Remove potentially large or binary fields
-                for key in ['formats', 'thumbnails', 'automatic_captions', 'subtitles']:
-                    metadata_copy.pop(key, None)
-                metadata_json = json.dumps(metadata_copy, default=str)
-                
-                # Insert or update video record
-                cursor.execute('''
-                    INSERT OR REPLACE INTO videos (
-                        video_id, url, title, description, creator_username, 
-                        creator_display_name, duration, view_count, like_count, 
-                        comment_count, share_count, upload_date, download_date,
-                        file_path, thumbnail_path, file_size, format_quality,
-                        tags, metadata_json, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    video_id, url, title, description, creator_username,
-                    creator_display_name, duration, view_count, like_count,
-                    comment_count, share_count, upload_date, download_date,
-                    file_path, thumbnail_path, file_size, format_quality,
-                    tags_json, metadata_json, datetime.now().isoformat()
-                ))
-                
+                before = self._read_statistics(cursor)
+                self._rebuild_statistics(cursor)
+                after = self._read_statistics(cursor)
                 conn.commit()
-                return True
+                
+                drift = {key: (before[key], after[key]) for key in after
+                         if key != 'creators' and before[key] != after[key]}
+                
+                # Per-creator rollup: report how many creators had wrong totals
+                creators = set(before['creators']) | set(after['creators'])
+                wrong = sum(1 for name in creators if before['creators'].get(name) != after['creators'].get(name))
+                if wrong:
+                    drift['creator_rows'] = (wrong, 0)
+                return drift
                 
         except Exception as e:
-            logging.error(f"Error adding video to database: {str(e)}")
-            return False
+            logging.error(f"Error rebuilding statistics: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _read_statistics(cursor) -> Dict:
+        """Read the archive-wide counters and the per-creator rollup"""
+        cursor.execute('''
+            SELECT total_videos, failed_downloads, unique_creators,
+                   total_file_size, first_download, last_download
+            FROM video_stats WHERE id = 1
+        ''')
+        stats = dict(cursor.fetchone())
+        
+        cursor.execute('SELECT creator_username, video_count, total_file_size FROM creator_stats')
+        stats['creators'] = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        return stats
     
-    def add_failed_download(self, url: str, error: str) -> bool:
+    @classmethod
+    def _init_tag_index(cls, cursor):
         """
-        Add a failed download record
+        Create the video_tags inverted index and the triggers that maintain it
+        
+        video_tags holds one (tag, video_id) row per hashtag, so tag lookups are
+        index seeks instead of parsing the JSON tags column of every row. A
+        database created before the table existed is backfilled once here.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_tags'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_tags (
+                tag TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                PRIMARY KEY (tag, video_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_video_tags_video_id ON video_tags(video_id)')
+        
+        insert_tags = f'''
+            INSERT OR IGNORE INTO video_tags (tag, video_id)
+            SELECT {_NORMALIZED_TAG_SQL}, new.video_id FROM json_each(new.tags)
+            WHERE json_valid(new.tags) AND {_NORMALIZED_TAG_SQL} != '';
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS videos_tags_insert AFTER INSERT ON videos
+            WHEN new.tags IS NOT NULL BEGIN
+                {insert_tags}
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS videos_tags_delete AFTER DELETE ON videos BEGIN
+                DELETE FROM video_tags WHERE video_id = old.video_id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS videos_tags_update AFTER UPDATE OF tags, video_id ON videos BEGIN
+                DELETE FROM video_tags WHERE video_id = old.video_id;
+                {insert_tags}
+            END
+        ''')
+        
+        if not exists:
+            cls._backfill_tags(cursor)
+    
+    @staticmethod
+    def _backfill_tags(cursor):
+        """Rebuild video_tags from every row's tags (and description hashtags)"""
+        # Rows without tags get them from their description, which fires the
+        # update trigger like a normal write would
+        cursor.execute('''
+            SELECT video_id, description FROM videos
+            WHERE (tags IS NULL OR tags = '[]') AND description LIKE '%#%'
+        ''')
+        updates = []
+        for video_id, description in cursor.fetchall():
+            hashtags = list(dict.fromkeys(map(TikTokDatabase.normalize_tag, HASHTAG_PATTERN.findall(description))))
+            if hashtags:
+                updates.append((json.dumps(hashtags), video_id))
+        cursor.executemany('UPDATE videos SET tags = ? WHERE video_id = ?', updates)
+        
+        cursor.execute('DELETE FROM video_tags')
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO video_tags (tag, video_id)
+            SELECT {_NORMALIZED_TAG_SQL}, videos.video_id FROM videos, json_each(videos.tags)
+            WHERE videos.tags IS NOT NULL AND json_valid(videos.tags) AND {_NORMALIZED_TAG_SQL} != ''
+        ''')
+    
+    def rebuild_tag_index(self) -> bool:
+        """
+        Rebuild the hashtag index from the videos table
         
-        Args:
-            url: The URL that failed to download
-            error: Error message
-            
         Returns:
             bool: True if successful, False otherwise
         """
+        self.flush_writes()
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO videos (
-                        video_id, url, download_date, download_status, metadata_json
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    'failed_' + str(hash(url))[:10], url, 
-                    datetime.now().isoformat(), 'failed',
-                    json.dumps({'error': error, 'url': url})
-                ))
-                
+            with self._write_lock, self._connection() as conn:
+                self._backfill_tags(conn.cursor())
                 conn.commit()
                 return True
                 
         except Exception as e:
-            logging.error(f"Error adding failed download to database: {str(e)}")
+            logging.error(f"Error rebuilding tag index: {str(e)}")
             return False
     
-    def start_download_session(self, session_id: str, total_urls: int, source_file: str = None) -> bool:
+    @staticmethod
+    def _init_failures(cursor, migrate: bool):
         """
-        Start a new download session
+        Create the failed_downloads counter triggers and key index, and migrate
+        legacy failures
+        
+        Older versions stored failures as 'failed_' + hash(url) rows in videos.
+        hash() is randomized per process, so the same URL piled up duplicate
+        rows; they are folded here into one failed_downloads row per canonical
+        URL and removed from videos.
+        
+        Failures of URLs with a video ID are keyed by that ID (unique index):
+        rows written when canonical URLs still kept the creator handle are
+        merged first, one row per video.
         
         Args:
-            session_id: Unique identifier for this session
-            total_urls: Total number of URLs to download
-            source_file: Source file name
+            cursor: Database cursor
+            migrate: Whether the failed_downloads table was just created
+        """
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS failed_downloads_insert AFTER INSERT ON failed_downloads BEGIN
+                UPDATE video_stats SET failed_downloads = failed_downloads + 1 WHERE id = 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS failed_downloads_delete AFTER DELETE ON failed_downloads BEGIN
+                UPDATE video_stats SET failed_downloads = failed_downloads - 1 WHERE id = 1;
+            END
+        ''')
+        
+        if not migrate:
+            TikTokDatabase._merge_failures_by_video_id(cursor)
+        cursor.execute('DROP INDEX IF EXISTS idx_failed_downloads_video_id')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_failed_downloads_video_key
+            ON failed_downloads(video_id) WHERE video_id IS NOT NULL
+        ''')
+        
+        if not migrate:
+            return
+        
+        cursor.execute('''
+            SELECT url, download_date, metadata_json FROM videos
+            WHERE download_status = 'failed'
+            ORDER BY download_date
+        ''')
+        failures = {}
+        for url, failed_at, metadata_json in cursor.fetchall():
+            try:
+                error = json.loads(metadata_json or '{}').get('error')
+            except ValueError:
+                error = None
+            
+            url = canonicalize_url(url)
+            failure = failures.setdefault(url, {'url': url, 'attempts': 0, 'first_failed_at': failed_at})
+            failure.update(error=error, last_failed_at=failed_at)
+            failure['attempts'] += 1
+        
+        policy = RetryPolicy()
+        rows = []
+        for failure in failures.values():
+            error_class = classify_message(failure['error'])
+            try:
+                last_failed_at = datetime.fromisoformat(failure['last_failed_at'])
+            except (TypeError, ValueError):
+                last_failed_at = datetime.now()
+            next_retry_at = last_failed_at + timedelta(seconds=policy.failure_cooldown(error_class))
+            rows.append((failure['url'], extract_video_id(failure['url']), failure['error'], error_class,
+                         failure['attempts'], failure['first_failed_at'], failure['last_failed_at'],
+                         next_retry_at.isoformat()))
+        
+        cursor.executemany('''
+            INSERT INTO failed_downloads (
+                url, video_id, error, error_class, attempts,
+                first_failed_at, last_failed_at, next_retry_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        cursor.execute("DELETE FROM videos WHERE download_status = 'failed'")
+        if rows:
+            logging.info(f"Migrated {len(rows)} failed URLs out of the videos table")
+    
+    @staticmethod
+    def _merge_failures_by_video_id(cursor):
+        """
+        Fold failure rows of the same video into one, under its canonical URL
+        
+        Args:
+            cursor: Database cursor
+        """
+        cursor.execute('''
+            SELECT * FROM failed_downloads
+            WHERE video_id IS NOT NULL
+            ORDER BY last_failed_at
+        ''')
+        groups = {}
+        for row in cursor.fetchall():
+            groups.setdefault(row['video_id'], []).append(dict(row))
+        
+        rows = []
+        for video_id, failures in groups.items():
+            url = canonicalize_url(failures[0]['url'])
+            if len(failures) == 1 and failures[0]['url'] == url:
+                continue
+            
+            # The latest failure decides error and cooldown; attempts add up
+            latest = failures[-1]
+            rows.append((url, video_id, latest['error'], latest['error_class'],
+                         sum(failure['attempts'] or 0 for failure in failures),
+                         min(failure['first_failed_at'] for failure in failures),
+                         latest['last_failed_at'], latest['next_retry_at']))
+        
+        if not rows:
+            return
+        cursor.executemany('DELETE FROM failed_downloads WHERE video_id = ?', [(row[1],) for row in rows])
+        cursor.executemany('''
+            INSERT INTO failed_downloads (
+                url, video_id, error, error_class, attempts,
+                first_failed_at, last_failed_at, next_retry_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        logging.info(f"Merged failure records of {len(rows)} videos")
+    
+    @staticmethod
+    def _init_metadata_table(cursor):
+        """
+        Create the video_metadata side table
+        
+        Full metadata is stored compressed (see metadata_codec) outside the
+        videos row, so scans and list queries over videos don't drag it
+        through the page cache; it is decoded only by get_video_metadata.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS video_metadata (
+                video_id TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS videos_metadata_delete AFTER DELETE ON videos BEGIN
+                DELETE FROM video_metadata WHERE video_id = old.video_id;
+            END
+        ''')
+    
+    def migrate_metadata(self, batch_size: int = 500, vacuum: bool = True) -> int:
+        """
+        Move legacy inline metadata_json into the compressed side table
+        
+        Rows are rewritten in place, one batch per transaction, so the
+        migration can be interrupted and resumed. VACUUM then returns the freed
+        pages to the file system.
+        
+        Args:
+            batch_size: Number of rows migrated per transaction
+            vacuum: Whether to VACUUM the database afterwards
             
         Returns:
-            bool: True if successful, False otherwise
+            int: Number of rows migrated (-1 on error)
         """
+        self.flush_writes()
+        migrated = 0
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO download_sessions (
-                        session_id, total_urls, source_file
-                    ) VALUES (?, ?, ?)
-                ''', (session_id, total_urls, source_file))
+            with self._write_lock:
+                conn = self._connection()
+                last_id = 0
+                while True:
+                    # Failed-download rows keep their small inline error record
+                    cursor = conn.execute('''
+                        SELECT id, video_id, metadata_json FROM videos
+                        WHERE id > ? AND metadata_json IS NOT NULL AND download_status = 'completed'
+                        ORDER BY id
+                        LIMIT ?
+                    ''', (last_id, batch_size))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    
+                    metadata_rows = []
+                    for row_id, video_id, metadata_json in rows:
+                        try:
+                            metadata = json.loads(metadata_json)
+                        except ValueError:
+                            logging.warning(f"Keeping unparseable metadata of video {video_id} as text")
+                            metadata = {'raw_metadata': metadata_json}
+                        metadata_rows.append((video_id,) + encode_metadata(metadata)[::-1])
+                    
+                    with conn:
+                        conn.executemany(INSERT_METADATA_SQL, metadata_rows)
+                        conn.executemany('UPDATE videos SET metadata_json = NULL WHERE id = ?',
+                                         [(row[0],) for row in rows])
+                    migrated += len(rows)
+                    last_id = rows[-1][0]
                 
-                conn.commit()
-                return True
+                if vacuum:
+                    conn.execute('VACUUM')
+                    # In WAL mode the compacted pages land in the WAL first
+                    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                return migrated
                 
         except Exception as e:
-            logging.error(f"Error starting download session: {str(e)}")
-            return False
+            logging.error(f"Error migrating metadata: {str(e)}")
+            return -1
     
-    def end_download_session(self, session_id: str, successful: int, failed: int) -> bool:
+    @staticmethod
+    def _init_search_index(cursor) -> bool:
         """
-        End a download session with results
+        Create the FTS5 full-text index over videos and its sync triggers
+        
+        videos_fts is an external-content table: it stores only the index and
+        reads the text from videos, so it costs little extra space. The
+        triggers keep it in sync on every insert, update and delete. A database
+        created before the index existed is backfilled once here.
+        
+        Returns:
+            bool: True if full-text search is available
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos_fts'")
+        exists = cursor.fetchone() is not None
+        
+        if not exists:
+            try:
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE videos_fts USING fts5(
+                        title, creator_username, description,
+                        content='videos', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2'
+                    )
+                ''')
+            except sqlite3.OperationalError as e:
+                # SQLite compiled without FTS5: search falls back to LIKE scans
+                logging.warning(f"Full-text search unavailable, using LIKE search: {str(e)}")
+                return False
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+                INSERT INTO videos_fts (rowid, title, creator_username, description)
+                VALUES (new.id, new.title, new.creator_username, new.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+                INSERT INTO videos_fts (videos_fts, rowid, title, creator_username, description)
+                VALUES ('delete', old.id, old.title, old.creator_username, old.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS videos_fts_update
+            AFTER UPDATE OF title, creator_username, description ON videos BEGIN
+                INSERT INTO videos_fts (videos_fts, rowid, title, creator_username, description)
+                VALUES ('delete', old.id, old.title, old.creator_username, old.description);
+                INSERT INTO videos_fts (rowid, title, creator_username, description)
+                VALUES (new.id, new.title, new.creator_username, new.description);
+            END
+        ''')
+        
+        if not exists:
+            # Backfill rows written before the index existed
+            cursor.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+        return True
+    
+    def rebuild_search_index(self) -> bool:
+        """
+        Rebuild the full-text index from the videos table and optimize it
+        
+        Needed only if the index got out of sync (e.g. rows written by an older
+        version using INSERT OR REPLACE, or edited with triggers disabled).
         
-        Args:
-            session_id: Session identifier
-            successful: Number of successful downloads
-            failed: Number of failed downloads
-            
         Returns:
             bool: True if successful, False otherwise
         """
+        if not self.fts_enabled:
+            logging.error("Full-text search is not available in this SQLite build")
+            return False
+        
+        self.flush_writes()
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                total = successful + failed
-                success_rate = (successful / total * 100) if total > 0 else 0
-                
-                cursor.execute('''
-                    UPDATE download_sessions SET 
-                        end_time = CURRENT_TIMESTAMP,
-                        successful_downloads = ?,
-                        failed_downloads = ?,
-                        success_rate = ?
-                    WHERE session_id = ?
-                ''', (successful, failed, success_rate, session_id))
-                
+            with self._write_lock, self._connection() as conn:
+                conn.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+                conn.execute("INSERT INTO videos_fts (videos_fts) VALUES ('optimize')")
                 conn.commit()
                 return True
                 
         except Exception as e:
-            logging.error(f"Error ending download session: {str(e)}")
+            logging.error(f"Error rebuilding search index: {str(e)}")
             return False
     
-    def get_video_by_id(self, video_id: str) -> Optional[Dict]:
+    @staticmethod
+    def _add_column_if_missing(cursor, table: str, column: str, definition: str):
+        """Add a column to an existing table (lightweight schema migration)"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
+    @staticmethod
+    def _video_row(video_data: Dict) -> Tuple:
         """
-        Get video information by video ID
+        Build the parameters of INSERT_VIDEO_SQL from a yt-dlp info dict
         
         Args:
-            video_id: TikTok video ID
+            video_data: Dictionary containing video information
             
         Returns:
-            Dict or None: Video information or None if not found
+            Tuple: Row values in INSERT_VIDEO_SQL column order
         """
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute('SELECT * FROM videos WHERE video_id = ?', (video_id,))
-                row = cursor.fetchone()
-                
-                return dict(row) if row else None
-                
-        except Exception as e:
-            logging.error(f"Error getting video by ID: {str(e)}")
-            return None
+        # Extract and prepare data
+        video_id = video_data.get('id', '')
+        url = video_data.get('webpage_url', video_data.get('url', ''))
+        title = video_data.get('title', '')
+        description = video_data.get('description', '')
+        creator_username = video_data.get('uploader', video_data.get('uploader_id', ''))
+        creator_display_name = video_data.get('uploader', '')
+        duration = video_data.get('duration', 0)
+        view_count = video_data.get('view_count', 0)
+        like_count = video_data.get('like_count', 0)
+        comment_count = video_data.get('comment_count', 0)
+        share_count = video_data.get('repost_count', 0)
+        upload_date = video_data.get('upload_date', '')
+        download_date = datetime.now().isoformat()
+        
+        # File information
+        file_path = video_data.get('_filename', '')
+        thumbnail_path = video_data.get('thumbnail', '')
+        file_size = video_data.get('filesize', 0) or video_data.get('filesize_approx', 0)
+        format_quality = video_data.get('format', '')
+        
+        # Tags/hashtags (TikTok often reports none: fall back to the description's).
+        # Normalized here because SQLite's lower() in the video_tags triggers
+        # only folds ASCII letters
+        tags = video_data.get('tags') or HASHTAG_PATTERN.findall(description or '')
+        tags = list(dict.fromkeys(filter(None, map(TikTokDatabase.normalize_tag, tags))))
+        tags_json = json.dumps(tags) if tags else None
+        
+        # Full metadata lives in video_metadata (see _metadata_row); NULL also
+        # clears a legacy inline copy when an old row is updated
+        metadata_json = None
+        
+        # SHA-256 of the payload, when stored in the content-addressed store
+        # (an update without a hash keeps the known one, see INSERT_VIDEO_SQL)
+        content_hash = video_data.get('content_hash')
+        
+        return (
+            video_id, url, title, description, creator_username,
+            creator_display_name, duration, view_count, like_count,
+            comment_count, share_count, upload_date, download_date,
+            file_path, thumbnail_path, file_size, format_quality,
+            tags_json, metadata_json, datetime.now().isoformat(), content_hash
+        )
     
-    def get_videos_by_creator(self, creator_username: str) -> List[Dict]:
+    @staticmethod
+    def _metadata_row(video_data: Dict) -> Tuple:
         """
-        Get all videos by a specific creator
+        Build the parameters of INSERT_METADATA_SQL from a yt-dlp info dict
         
         Args:
-            creator_username: Creator's username
+            video_data: Dictionary containing video information
             
         Returns:
-            List[Dict]: List of video records
+            Tuple: (video_id, codec, compressed metadata)
         """
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT * FROM videos 
-                    WHERE creator_username = ? AND download_status = 'completed'
-                    ORDER BY download_date DESC
-                ''', (creator_username,))
-                
-                return [dict(row) for row in cursor.fetchall()]
-                
-        except Exception as e:
-            logging.error(f"Error getting videos by creator: {str(e)}")
-            return []
+        # Full metadata (excluding potentially large or binary fields)
+        metadata = {key: value for key, value in video_data.items() if key not in METADATA_EXCLUDED_KEYS}
+        data, codec = encode_metadata(metadata)
+        return video_data.get('id', ''), codec, data
     
-    def get_recent_videos(self, limit: int = 50) -> List[Dict]:
+    def _write(self, sql: str, params: Tuple):
         """
-        Get recently downloaded videos
+        Execute a write statement, through the batch writer when it is running
         
         Args:
-            limit: Maximum number of videos to return
+            sql: SQL statement with ? placeholders
+            params: Statement parameters
+        """
+        if self._writer is not None:
+            self._writer.submit(sql, params)
+            return
+        
+        with self._write_lock, self._connection() as conn:
+            conn.execute(sql, params)
+            conn.commit()
+    
+    def start_batch_writer(self, batch_size: int = 500, flush_interval: float = 0.5):
+        """
+        Route video, failure and journal writes through a single background writer
+        
+        The writer holds one WAL-mode connection and commits queued statements in
+        grouped transactions instead of one connection and fsync per statement.
+        
+        Args:
+            batch_size: Maximum number of statements per transaction
+            flush_interval: Maximum seconds a statement waits before being committed
+        """
+        if self._writer is None:
+            self._writer = DatabaseWriter(self.db_path, batch_size, flush_interval)
+    
+    def flush_writes(self):
+        """Block until all queued writes are committed"""
+        if self._writer is not None:
+            self._writer.flush()
+    
+    def stop_batch_writer(self):
+        """Flush pending writes and go back to direct writes"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+    
+    def add_video(self, video_data: Dict) -> bool:
+        """
+        Add a video record to the database
+        
+        Args:
+            video_data: Dictionary containing video information
             
         Returns:
-            List[Dict]: List of recent video records
+            bool: True if successful (or queued, with the batch writer), False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT * FROM videos 
-                    WHERE download_status = 'completed'
-                    ORDER BY download_date DESC 
-                    LIMIT ?
-                ''', (limit,))
-                
-                return [dict(row) for row in cursor.fetchall()]
+            # Insert or update video record, then its compressed metadata
+            self._write(INSERT_VIDEO_SQL, self._video_row(video_data))
+            self._write(INSERT_METADATA_SQL, self._metadata_row(video_data))
+            return True
                 
         except Exception as e:
-            logging.error(f"Error getting recent videos: {str(e)}")
-            return []
+            logging.error(f"Error adding video to database: {str(e)}")
+            return False
     
-    def get_statistics(self) -> Dict:
+    def add_video_rows(self, rows: Iterable[Tuple[Tuple, Tuple]]) -> bool:
         """
-        Get database statistics
+        Upsert prebuilt video rows in a single transaction (bulk import)
         
+        Args:
+            rows: (video row, metadata row) pairs built with _video_row / _metadata_row
+            
         Returns:
-            Dict: Statistics about stored videos
+            bool: True if successful, False otherwise
         """
+        rows = list(rows)
+        self.flush_writes()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._write_lock, self._connection() as conn:
+                conn.executemany(INSERT_VIDEO_SQL, [video_row for video_row, _ in rows])
+                conn.executemany(INSERT_METADATA_SQL, [metadata_row for _, metadata_row in rows])
+                conn.commit()
+                return True
+                
+        except Exception as e:
+            logging.error(f"Error importing videos: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _failure_key(url: str) -> Tuple[str, str]:
+        """Column and value identifying a URL's failure row (video_id, or url without an ID)"""
+        video_id = extract_video_id(url)
+        return ('video_id', video_id) if video_id else ('url', canonicalize_url(url))
+    
+    def add_failed_download(self, url: str, error: str, error_class: str = UNKNOWN,
+                            attempts: int = 1, cooldown: float = None) -> bool:
+        """
+        Record a URL whose download finally failed
+        
+        Failures are keyed by video ID (by canonical URL for links without
+        one, e.g. unresolved short links): repeated failures of the same video,
+        whatever form its URL took, update one row, adding up attempts and
+        pushing next_retry_at forward.
+        
+        Args:
+            url: The URL that failed to download
+            error: Error message
+            error_class: Error class from retry.classify_error
+            attempts: Number of attempts made in this run
+            cooldown: Seconds before the URL is eligible again (None: immediately)
+            
+        Returns:
+            bool: True if successful (or queued, with the batch writer), False otherwise
+        """
+        try:
+            url = canonicalize_url(url)
+            video_id = extract_video_id(url)
+            now = datetime.now()
+            next_retry_at = (now + timedelta(seconds=cooldown)).isoformat() if cooldown else None
+            
+            conflict_target = '(video_id) WHERE video_id IS NOT NULL' if video_id else '(url)'
+            self._write(f'''
+                INSERT INTO failed_downloads (
+                    url, video_id, error, error_class, attempts,
+                    first_failed_at, last_failed_at, next_retry_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT{conflict_target} DO UPDATE SET
+                    error = excluded.error,
+                    error_class = excluded.error_class,
+                    attempts = attempts + excluded.attempts,
+                    last_failed_at = excluded.last_failed_at,
+                    next_retry_at = excluded.next_retry_at
+            ''', (
+                url, video_id, error, error_class, attempts,
+                now.isoformat(), now.isoformat(), next_retry_at
+            ))
+            return True
+                
+        except Exception as e:
+            logging.error(f"Error adding failed download to database: {str(e)}")
+            return False
+    
+    def clear_failed_download(self, url: str) -> bool:
+        """
+        Forget a failure (after the URL downloaded successfully)
+        
+        Args:
+            url: The URL that downloaded successfully
+            
+        Returns:
+            bool: True if successful (or queued, with the batch writer), False otherwise
+        """
+        try:
+            column, key = self._failure_key(url)
+            self._write(f'DELETE FROM failed_downloads WHERE {column} = ?', (key,))
+            return True
+                
+        except Exception as e:
+            logging.error(f"Error clearing failed download: {str(e)}")
+            return False
+    
+    def get_active_failure(self, url: str) -> Optional[Dict]:
+        """
+        Negative cache lookup: the failure record of a URL still cooling down
+        
+        Args:
+            url: URL about to be downloaded
+            
+        Returns:
+            Dict or None: Failure record if the URL should be skipped for now
+        """
+        try:
+            column, key = self._failure_key(url)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute(f'''
+                    SELECT * FROM failed_downloads
+                    WHERE {column} = ? AND next_retry_at > ?
+                ''', (key, datetime.now().isoformat()))
+                row = cursor.fetchone()
+                
+                return dict(row) if row else None
+                
+        except Exception as e:
+            logging.error(f"Error checking failed download: {str(e)}")
+            return None
+    
+    def get_failed_downloads(self, limit: int = 50) -> List[Dict]:
+        """
+        Get the most recent failures
+        
+        Args:
+            limit: Maximum number of failures to return
+            
+        Returns:
+            List[Dict]: Failure records, newest first
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT * FROM failed_downloads
+                    ORDER BY last_failed_at DESC
+                    LIMIT ?
+                ''', (limit,))
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logging.error(f"Error getting failed downloads: {str(e)}")
+            return []
+    
+    def start_download_session(self, session_id: str, total_urls: int, source_file: str = None) -> bool:
+        """
+        Start a new download session
+        
+        Args:
+            session_id: Unique identifier for this session
+            total_urls: Total number of URLs to download
+            source_file: Source file name
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._write_lock, self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    INSERT INTO download_sessions (
+                        session_id, total_urls, source_file
+                    ) VALUES (?, ?, ?)
+                ''', (session_id, total_urls, source_file))
+                
+                conn.commit()
+                return True
+                
+        except Exception as e:
+            logging.error(f"Error starting download session: {str(e)}")
+            return False
+    
+    def end_download_session(self, session_id: str, successful: int, failed: int,
+                             status: str = 'completed') -> bool:
+        """
+        End a download session with results
+        
+        total_urls is updated from the session journal: new sessions start
+        downloading before all of their URLs have been journaled.
+        
+        Args:
+            session_id: Session identifier
+            successful: Number of successful downloads
+            failed: Number of failed downloads
+            status: Final session status ('completed' or 'interrupted')
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        # Make sure every queued video and journal write is committed first
+        self.flush_writes()
+        
+        try:
+            with self._write_lock, self._connection() as conn:
+                cursor = conn.cursor()
+                
+                total = successful + failed
+                success_rate = (successful / total * 100) if total > 0 else 0
+                
+                cursor.execute('''
+                    UPDATE download_sessions SET 
+                        end_time = CURRENT_TIMESTAMP,
+                        successful_downloads = ?,
+                        failed_downloads = ?,
+                        success_rate = ?,
+                        status = ?,
+                        total_urls = MAX(COALESCE(total_urls, 0),
+                                         (SELECT COUNT(*) FROM session_urls WHERE session_id = ?))
+                    WHERE session_id = ?
+                ''', (successful, failed, success_rate, status, session_id, session_id))
+                
+                conn.commit()
+                return True
+                
+        except Exception as e:
+            logging.error(f"Error ending download session: {str(e)}")
+            return False
+    
+    def get_download_session(self, session_id: str) -> Optional[Dict]:
+        """
+        Get a download session by its ID
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Dict or None: Session information or None if not found
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('SELECT * FROM download_sessions WHERE session_id = ?', (session_id,))
+                row = cursor.fetchone()
+                
+                return dict(row) if row else None
+                
+        except Exception as e:
+            logging.error(f"Error getting download session: {str(e)}")
+            return None
+    
+    def add_session_urls(self, session_id: str, urls: Iterable[str], batch_size: int = 1000) -> int:
+        """
+        Journal the URLs of a session as 'pending'
+        
+        URLs are inserted in batches so arbitrarily long inputs are never held
+        in memory at once. Duplicate URLs within a session are ignored.
+        
+        Each batch is pulled from `urls` before the write lock is taken: the
+        iterable may itself write to the database (UrlCanonicalizer caches
+        short link resolutions), and the lock is not reentrant.
+        
+        Args:
+            session_id: Session identifier
+            urls: Iterable of URLs to journal
+            batch_size: Number of URLs inserted per transaction
+            
+        Returns:
+            int: Number of URLs journaled for the session
+        """
+        try:
+            urls = iter(urls)
+            while True:
+                batch = [(session_id, url) for url in islice(urls, batch_size)]
+                if not batch:
+                    break
+                with self._write_lock, self._connection() as conn:
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO session_urls (session_id, url) VALUES (?, ?)', batch)
+                    conn.commit()
+            
+            cursor = self._connection().execute(
+                'SELECT COUNT(*) FROM session_urls WHERE session_id = ?', (session_id,))
+            return cursor.fetchone()[0]
+                
+        except Exception as e:
+            logging.error(f"Error journaling session URLs: {str(e)}")
+            return 0
+    
+    def mark_session_url(self, session_id: str, url: str, status: str, error: str = None,
+                         attempts: int = None) -> bool:
+        """
+        Update the journal status of a session URL
+        
+        Args:
+            session_id: Session identifier
+            url: URL being processed
+            status: New status ('pending', 'in_flight', 'done', 'failed' or 'skipped')
+            error: Error message for failed URLs
+            attempts: Number of download attempts so far (unchanged if None)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self._write('''
+                UPDATE session_urls SET
+                    status = ?, error = ?, attempts = COALESCE(?, attempts),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE session_id = ? AND url = ?
+            ''', (status, error, attempts, session_id, url))
+            return True
+                
+        except Exception as e:
+            logging.error(f"Error updating session URL: {str(e)}")
+            return False
+    
+    def reset_in_flight_urls(self, session_id: str) -> int:
+        """
+        Return URLs left 'in_flight' by a crash or kill back to 'pending'
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            int: Number of URLs reset
+        """
+        try:
+            with self._write_lock, self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    UPDATE session_urls SET status = 'pending', updated_at = CURRENT_TIMESTAMP
+                    WHERE session_id = ? AND status = 'in_flight'
+                ''', (session_id,))
+                
+                conn.commit()
+                return cursor.rowcount
+                
+        except Exception as e:
+            logging.error(f"Error resetting in-flight URLs: {str(e)}")
+            return 0
+    
+    def iter_session_urls(self, session_id: str, status: str = 'pending',
+                          batch_size: int = 500, follow: threading.Event = None) -> Iterator[Optional[str]]:
+        """
+        Lazily iterate the journaled URLs of a session with a given status
+        
+        Rows are read in id order, one batch at a time, so status changes made
+        while iterating never cause a URL to be yielded twice.
+        
+        With `follow`, the journal may still be growing (download_videos
+        journals its input while downloading): once the iterator has caught
+        up with the rows written so far it yields None instead of stopping,
+        and only stops after `follow` is set and no rows are left.
+        
+        Args:
+            session_id: Session identifier
+            status: Journal status to select
+            batch_size: Number of rows fetched per query
+            follow: Event set when the journal is complete (optional)
+        
+        Yields:
+            str: Journaled URL (None while waiting for more rows)
+        """
+        last_id = 0
+        while True:
+            # Checked before the query so rows committed just before the
+            # event was set are still read
+            complete = follow is None or follow.is_set()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, url FROM session_urls
+                    WHERE session_id = ? AND status = ? AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (session_id, status, last_id, batch_size))
+                rows = cursor.fetchall()
+            
+            if not rows:
+                if complete:
+                    return
+                yield None
+                continue
+            
+            for row_id, url in rows:
+                last_id = row_id
+                yield url
+    
+    def get_session_url_counts(self, session_id: str) -> Dict[str, int]:
+        """
+        Count journaled URLs of a session by status
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Dict[str, int]: Mapping of status to number of URLs
+        """
+        # Queued journal updates must be visible to the count
+        self.flush_writes()
+        
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT status, COUNT(*) FROM session_urls
+                    WHERE session_id = ?
+                    GROUP BY status
+                ''', (session_id,))
+                
+                return {status: count for status, count in cursor.fetchall()}
+                
+        except Exception as e:
+            logging.error(f"Error counting session URLs: {str(e)}")
+            return {}
+    
+    def get_resolved_urls(self, short_urls: List[str]) -> Dict[str, str]:
+        """
+        Look up cached short link resolutions
+        
+        Args:
+            short_urls: Short links to look up
+            
+        Returns:
+            Dict[str, str]: Mapping of short link to resolved URL for cached entries
+        """
+        resolved = {}
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # Stay well below SQLite's bound parameter limit
+                for start in range(0, len(short_urls), 500):
+                    chunk = short_urls[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'''
+                        SELECT short_url, resolved_url FROM url_resolutions
+                        WHERE short_url IN ({placeholders})
+                    ''', chunk)
+                    resolved.update(cursor.fetchall())
+                
+        except Exception as e:
+            logging.error(f"Error reading URL resolutions: {str(e)}")
+        return resolved
+    
+    def save_resolved_urls(self, resolutions: Dict[str, str]) -> bool:
+        """
+        Cache short link resolutions
+        
+        Args:
+            resolutions: Mapping of short link to resolved URL
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._write_lock, self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO url_resolutions (short_url, resolved_url)
+                    VALUES (?, ?)
+                ''', resolutions.items())
+                
+                conn.commit()
+                return True
+                
+        except Exception as e:
+            logging.error(f"Error saving URL resolutions: {str(e)}")
+            return False
+    
+    def get_video_by_id(self, video_id: str, include_metadata: bool = False) -> Optional[Dict]:
+        """
+        Get video information by video ID
+        
+        Args:
+            video_id: TikTok video ID
+            include_metadata: Also decode the full metadata into a 'metadata' key
+            
+        Returns:
+            Dict or None: Video information or None if not found
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('SELECT * FROM videos WHERE video_id = ?', (video_id,))
+                row = cursor.fetchone()
+                
+            if row is None:
+                return None
+            
+            video = dict(row)
+            if include_metadata:
+                video['metadata'] = self.get_video_metadata(video_id)
+            return video
+                
+        except Exception as e:
+            logging.error(f"Error getting video by ID: {str(e)}")
+            return None
+    
+    def get_video_metadata(self, video_id: str) -> Optional[Dict]:
+        """
+        Decode the full metadata of a video
+        
+        Reads the compressed side table, falling back to the legacy inline
+        metadata_json column for rows not migrated yet.
+        
+        Args:
+            video_id: TikTok video ID
+            
+        Returns:
+            Dict or None: Metadata (the stored yt-dlp info dict) or None if not found
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('SELECT codec, data FROM video_metadata WHERE video_id = ?', (video_id,))
+                row = cursor.fetchone()
+                if row is not None:
+                    return decode_metadata(row['data'], row['codec'])
+                
+                cursor.execute('SELECT metadata_json FROM videos WHERE video_id = ?', (video_id,))
+                row = cursor.fetchone()
+                return json.loads(row[0]) if row and row[0] else None
+                
+        except Exception as e:
+            logging.error(f"Error getting video metadata: {str(e)}")
+            return None
+    
+    def has_completed_video(self, video_id: str) -> bool:
+        """
+        Check whether a video is already downloaded
+        
+        Args:
+            video_id: TikTok video ID
+            
+        Returns:
+            bool: True if a completed record exists for the video
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT 1 FROM videos WHERE video_id = ? AND download_status = 'completed'
+                ''', (video_id,))
+                
+                return cursor.fetchone() is not None
+                
+        except Exception as e:
+            logging.error(f"Error checking video: {str(e)}")
+            return False
+    
+    def count_completed_videos(self) -> int:
+        """
+        Count completed videos
+        
+        Returns:
+            int: Number of completed video records
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("SELECT COUNT(*) FROM videos WHERE download_status = 'completed'")
+                return cursor.fetchone()[0]
+                
+        except Exception as e:
+            logging.error(f"Error counting videos: {str(e)}")
+            return 0
+    
+    def iter_completed_video_ids(self, batch_size: int = 10000) -> Iterator[str]:
+        """
+        Lazily iterate the IDs of all completed videos
+        
+        Args:
+            batch_size: Number of rows fetched at a time
+            
+        Yields:
+            str: TikTok video ID
+        """
+        cursor = self._connection().cursor()
+        cursor.execute("SELECT video_id FROM videos WHERE download_status = 'completed'")
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for (video_id,) in rows:
+                yield video_id
+    
+    @staticmethod
+    def _select_list(columns: Optional[Iterable[str]], required: Tuple[str, ...] = ()) -> str:
+        """
+        Build the SELECT list for a column projection
+        
+        Args:
+            columns: Column names, or None for all columns
+            required: Columns always included (e.g. keyset pagination keys)
+            
+        Returns:
+            str: Comma-separated column list, or '*'
+        """
+        if columns is None:
+            return '*'
+        
+        columns = list(columns)
+        for column in columns:
+            # Column names can't be bound as parameters: only allow plain identifiers
+            if not column.isidentifier():
+                raise ValueError(f"Invalid column name: {column!r}")
+        columns += [column for column in required if column not in columns]
+        return ', '.join(f'videos.{column}' for column in columns)
+    
+    def _iter_keyset(self, where: str, params: Tuple, columns: Optional[Iterable[str]],
+                     batch_size: int) -> Iterator[Dict]:
+        """
+        Lazily iterate completed videos, newest first, with keyset pagination
+        
+        Each batch is a separate short query that resumes after the last
+        (download_date, id) seen, so no read transaction stays open between
+        batches and deep pages cost the same as the first one (unlike OFFSET).
+        
+        Args:
+            where: Extra WHERE condition on videos
+            params: Parameters of the condition
+            columns: Columns to select (None for all)
+            batch_size: Number of rows fetched per query
+            
+        Yields:
+            Dict: Video record with the selected columns
+        """
+        select = self._select_list(columns, required=('download_date', 'id'))
+        last_key = None
+        
+        while True:
+            keyset, keyset_params = '', ()
+            if last_key is not None:
+                keyset = 'AND (download_date, id) < (?, ?)'
+                keyset_params = last_key
+            
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {select} FROM videos
+                    WHERE download_status = 'completed' AND {where} {keyset}
+                    ORDER BY download_date DESC, id DESC
+                    LIMIT ?
+                ''', params + keyset_params + (batch_size,))
+                rows = cursor.fetchall()
+            
+            if not rows:
+                return
+            
+            for row in rows:
+                yield dict(row)
+            last_key = (rows[-1]['download_date'], rows[-1]['id'])
+            
+            if len(rows) < batch_size:
+                return
+    
+    def iter_videos_by_creator(self, creator_username: str, columns: Optional[Iterable[str]] = LIST_COLUMNS,
+                               batch_size: int = 100) -> Iterator[Dict]:
+        """
+        Lazily iterate a creator's videos, newest first
+        
+        Args:
+            creator_username: Creator's username
+            columns: Columns to select (None for all)
+            batch_size: Number of rows fetched per query
+            
+        Yields:
+            Dict: Video record
+        """
+        return self._iter_keyset('creator_username = ?', (creator_username,), columns, batch_size)
+    
+    def iter_recent_videos(self, columns: Optional[Iterable[str]] = LIST_COLUMNS,
+                           batch_size: int = 100) -> Iterator[Dict]:
+        """
+        Lazily iterate downloaded videos, newest first
+        
+        Args:
+            columns: Columns to select (None for all)
+            batch_size: Number of rows fetched per query
+            
+        Yields:
+            Dict: Video record
+        """
+        return self._iter_keyset('1 = 1', (), columns, batch_size)
+    
+    def iter_videos_by_tag(self, tag: str, columns: Optional[Iterable[str]] = LIST_COLUMNS,
+                           batch_size: int = 100) -> Iterator[Dict]:
+        """
+        Lazily iterate the videos with a hashtag, newest first
+        
+        Args:
+            tag: Hashtag, with or without '#' (case-insensitive)
+            columns: Columns to select (None for all)
+            batch_size: Number of rows fetched per query
+            
+        Yields:
+            Dict: Video record
+        """
+        return self._iter_keyset('video_id IN (SELECT video_id FROM video_tags WHERE tag = ?)',
+                                 (self.normalize_tag(tag),), columns, batch_size)
+    
+    def count_videos_by_tag(self, tag: str) -> int:
+        """
+        Count the videos with a hashtag
+        
+        Args:
+            tag: Hashtag, with or without '#' (case-insensitive)
+            
+        Returns:
+            int: Number of completed videos with the tag
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT COUNT(*) FROM video_tags
+                    JOIN videos ON videos.video_id = video_tags.video_id
+                    WHERE video_tags.tag = ? AND videos.download_status = 'completed'
+                ''', (self.normalize_tag(tag),))
+                
+                return cursor.fetchone()[0]
+                
+        except Exception as e:
+            logging.error(f"Error counting videos by tag: {str(e)}")
+            return 0
+    
+    def get_top_tags(self, limit: int = 20) -> List[Dict]:
+        """
+        Get the most used hashtags
+        
+        Args:
+            limit: Maximum number of tags to return
+            
+        Returns:
+            List[Dict]: [{'tag': ..., 'video_count': ...}] by descending count
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # Grouping walks the (tag, video_id) primary key: no table access
+                cursor.execute('''
+                    SELECT tag, COUNT(*) AS video_count FROM video_tags
+                    GROUP BY tag
+                    ORDER BY video_count DESC, tag
+                    LIMIT ?
+                ''', (limit,))
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logging.error(f"Error getting top tags: {str(e)}")
+            return []
+    
+    @staticmethod
+    def normalize_tag(tag: str) -> str:
+        """Normalize a hashtag the way video_tags stores it ('#FYP ' -> 'fyp')"""
+        return str(tag).strip().lstrip('#').strip().lower()
+    
+    def get_video_columns(self) -> List[Tuple[str, str]]:
+        """
+        List the columns of the videos table
+        
+        Returns:
+            List[Tuple[str, str]]: (column name, declared SQLite type) pairs
+        """
+        with self._connection() as conn:
+            return [(row['name'], row['type']) for row in conn.execute('PRAGMA table_info(videos)')]
+    
+    def iter_video_batches(self, columns: Optional[Iterable[str]] = None, since: str = None,
+                           until: str = None, batch_size: int = 10000) -> Iterator[List[Tuple]]:
+        """
+        Stream completed videos in fixed-size batches of tuples (for exports)
+        
+        Rows come in id order, one keyset query per batch, so memory use
+        depends on batch_size only. The pseudo-column 'metadata' adds the
+        decoded metadata as a JSON string.
+        
+        Args:
+            columns: Columns to select, in output order (None for all videos columns)
+            since: Only videos downloaded at or after this ISO date/datetime
+            until: Only videos downloaded before this ISO date/datetime
+            batch_size: Number of rows per batch
+            
+        Yields:
+            List[Tuple]: Batch of rows with values in `columns` order
+        """
+        columns = list(columns) if columns is not None else [name for name, _ in self.get_video_columns()]
+        with_metadata = 'metadata' in columns
+        table_columns = [column for column in columns if column != 'metadata']
+        
+        # The keyset needs id; metadata is looked up by video_id (or read from
+        # the legacy inline column for rows not migrated yet)
+        required = ('id', 'video_id') + (('metadata_json',) if with_metadata else ())
+        select = self._select_list(table_columns, required=required)
+        selected = select.replace('videos.', '').split(', ')
+        id_index, video_id_index = selected.index('id'), selected.index('video_id')
+        
+        where, params = ["download_status = 'completed'"], []
+        if since:
+            where.append('download_date >= ?')
+            params.append(since)
+        if until:
+            where.append('download_date < ?')
+            params.append(until)
+        
+        last_id = 0
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT {select} FROM videos
+                    WHERE {' AND '.join(where)} AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', params + [last_id, batch_size]).fetchall()
+                
+                metadata = {}
+                if with_metadata and rows:
+                    metadata = self._get_metadata_blobs(conn, [row[video_id_index] for row in rows])
+            
+            if not rows:
+                return
+            last_id = rows[-1][id_index]
+            
+            batch = []
+            for row in rows:
+                values = dict(zip(selected, row))
+                if with_metadata:
+                    blob = metadata.get(row[video_id_index])
+                    values['metadata'] = json.dumps(decode_metadata(blob[1], blob[0]), default=str) \
+                        if blob else values.get('metadata_json')
+                batch.append(tuple(values.get(column) for column in columns))
+            yield batch
+            
+            if len(rows) < batch_size:
+                return
+    
+    @staticmethod
+    def _get_metadata_blobs(conn: sqlite3.Connection, video_ids: List[str]) -> Dict[str, Tuple[str, bytes]]:
+        """Fetch the (codec, data) metadata blobs of several videos"""
+        blobs = {}
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(video_ids), 500):
+            chunk = video_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in conn.execute(f'''
+                SELECT video_id, codec, data FROM video_metadata WHERE video_id IN ({placeholders})
+            ''', chunk):
+                blobs[row[0]] = (row[1], row[2])
+        return blobs
+    
+    def get_creator_summary(self, creator_username: str) -> Dict:
+        """
+        Aggregate a creator's engagement without loading their videos
+        
+        Args:
+            creator_username: Creator's username
+            
+        Returns:
+            Dict: video_count, total_views and total_likes
+        """
+        try:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 
-                stats = {}
+                cursor.execute('''
+                    SELECT COUNT(*) AS video_count,
+                           COALESCE(SUM(view_count), 0) AS total_views,
+                           COALESCE(SUM(like_count), 0) AS total_likes
+                    FROM videos
+                    WHERE creator_username = ? AND download_status = 'completed'
+                ''', (creator_username,))
                 
-                # Total videos
-                cursor.execute('SELECT COUNT(*) FROM videos WHERE download_status = "completed"')
-                stats['total_videos'] = cursor.fetchone()[0]
+                return dict(cursor.fetchone())
                 
-                # Failed downloads
-                cursor.execute('SELECT COUNT(*) FROM videos WHERE download_status = "failed"')
-                stats['failed_downloads'] = cursor.fetchone()[0]
+        except Exception as e:
+            logging.error(f"Error getting creator summary: {str(e)}")
+            return {'video_count': 0, 'total_views': 0, 'total_likes': 0}
+
+    def set_content_hash(self, video_id: str, content_hash: str) -> bool:
+        """
+        Record the payload hash of an already archived video
+
+        Args:
+            video_id: TikTok video ID
+            content_hash: SHA-256 hex digest of the video file
+
+        Returns:
+            bool: True if successful (or queued, with the batch writer), False otherwise
+        """
+        try:
+            self._write('UPDATE videos SET content_hash = ? WHERE video_id = ?', (content_hash, video_id))
+            return True
+
+        except Exception as e:
+            logging.error(f"Error setting content hash: {str(e)}")
+            return False
+
+    def update_file_paths(self, updates: Iterable[Tuple[str, str]]) -> bool:
+        """
+        Record new file locations in a single transaction (layout migration)
+
+        Args:
+            updates: (new file_path, video_id) pairs
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._write_lock, self._connection() as conn:
+                conn.executemany('UPDATE videos SET file_path = ? WHERE video_id = ?', updates)
+                conn.commit()
+            return True
+
+        except Exception as e:
+            logging.error(f"Error updating file paths: {str(e)}")
+            return False
+
+    def get_storage_usage(self) -> Dict[str, int]:
+        """
+        Bytes used by video files still on disk, per creator (disk quota)
+
+        Videos sharing a content-store object (same content_hash) are links
+        to one file, so each object counts once per creator.
+
+        Returns:
+            Dict[str, int]: creator_username -> total file_size
+        """
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT creator_username, SUM(size) FROM (
+                        SELECT creator_username, MAX(COALESCE(file_size, 0)) AS size FROM videos
+                        WHERE {ON_DISK_WHERE}
+                        GROUP BY creator_username, {PAYLOAD_KEY}
+                    ) GROUP BY creator_username
+                ''').fetchall()
+            return {row[0]: row[1] for row in rows}
+
+        except Exception as e:
+            logging.error(f"Error getting storage usage: {str(e)}")
+            return {}
+
+    def get_vault_usage(self) -> int:
+        """
+        Bytes used by video files still on disk, each content-store object counted once
+
+        Returns:
+            int: Total bytes
+        """
+        try:
+            with self._connection() as conn:
+                return conn.execute(f'''
+                    SELECT COALESCE(SUM(size), 0) FROM (
+                        SELECT MAX(COALESCE(file_size, 0)) AS size FROM videos
+                        WHERE {ON_DISK_WHERE}
+                        GROUP BY {PAYLOAD_KEY}
+                    )
+                ''').fetchone()[0]
+
+        except Exception as e:
+            logging.error(f"Error getting vault usage: {str(e)}")
+            return 0
+
+    def get_eviction_candidates(self, creator_username: str = None, limit: int = 100,
+                                exclude: Iterable[str] = ()) -> List[Dict]:
+        """
+        Videos whose files the disk quota should delete first
+
+        Args:
+            creator_username: Only this creator's videos (None for any)
+            limit: Maximum number of videos
+            exclude: Video IDs to leave out (e.g. files that could not be deleted)
+
+        Returns:
+            List[Dict]: video_id, creator_username, file_path, file_size and content_hash
+        """
+        where, params = ON_DISK_WHERE, []
+        if creator_username is not None:
+            where += ' AND creator_username = ?'
+            params.append(creator_username)
+        exclude = list(exclude)
+        if exclude:
+            # One JSON parameter instead of one placeholder per ID (no variable limit)
+            where += ' AND video_id NOT IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(exclude))
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT video_id, creator_username, file_path, file_size, content_hash FROM videos
+                    WHERE {where}
+                    ORDER BY {EVICTION_ORDER}
+                    LIMIT ?
+                ''', params + [limit]).fetchall()
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logging.error(f"Error getting eviction candidates: {str(e)}")
+            return []
+
+    def count_videos_with_hash(self, content_hash: str, exclude_video_id: str = None,
+                               creator_username: str = None) -> int:
+        """
+        Count videos that still have a file with the given payload
+
+        Args:
+            content_hash: SHA-256 hex digest
+            exclude_video_id: Video not to count
+            creator_username: Only count this creator's videos (None for any)
+
+        Returns:
+            int: Number of videos
+        """
+        where, params = "content_hash = ? AND video_id != ? AND file_path IS NOT NULL AND file_path != ''", \
+            [content_hash, exclude_video_id or '']
+        if creator_username is not None:
+            where += ' AND creator_username = ?'
+            params.append(creator_username)
+        try:
+            with self._connection() as conn:
+                return conn.execute(f'SELECT COUNT(*) FROM videos WHERE {where}', params).fetchone()[0]
+
+        except Exception as e:
+            logging.error(f"Error counting videos by hash: {str(e)}")
+            # Unknown: report a user so a shared file is never deleted
+            return 1
+
+    def mark_evicted(self, video_id: str) -> bool:
+        """
+        Record that a video's file was deleted by the disk quota
+
+        The row stays (and keeps counting as archived, so the video is not
+        downloaded again); file_path is cleared and evicted_at set. Written
+        directly, not through the batch writer, so the next eviction query
+        already sees it.
+
+        Args:
+            video_id: TikTok video ID
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._write_lock, self._connection() as conn:
+                conn.execute('''
+                    UPDATE videos SET file_path = NULL, evicted_at = ? WHERE video_id = ?
+                ''', (datetime.now().isoformat(), video_id))
+                conn.commit()
+            return True
+
+        except Exception as e:
+            logging.error(f"Error marking video as evicted: {str(e)}")
+            return False
+
+    def set_priority(self, video_id: str, priority: int) -> bool:
+        """
+        Set a video's eviction priority (higher values are kept longer)
+
+        Args:
+            video_id: TikTok video ID
+            priority: New priority (default 0)
+
+        Returns:
+            bool: True if the video exists and was updated
+        """
+        try:
+            with self._write_lock, self._connection() as conn:
+                updated = conn.execute('UPDATE videos SET priority = ? WHERE video_id = ?',
+                                       (priority, video_id)).rowcount
+                conn.commit()
+            return updated > 0
+
+        except Exception as e:
+            logging.error(f"Error setting video priority: {str(e)}")
+            return False
+
+    def touch_video(self, video_id: str) -> bool:
+        """
+        Record an access to a video (least-recently-accessed eviction)
+
+        Args:
+            video_id: TikTok video ID
+
+        Returns:
+            bool: True if successful (or queued, with the batch writer), False otherwise
+        """
+        try:
+            self._write('UPDATE videos SET last_accessed = ? WHERE video_id = ?',
+                        (datetime.now().isoformat(), video_id))
+            return True
+
+        except Exception as e:
+            logging.error(f"Error recording video access: {str(e)}")
+            return False
+
+    def iter_unhashed_videos(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Stream completed videos with a file but no payload hash yet
+
+        Args:
+            batch_size: Rows fetched per query
+
+        Yields:
+            Dict: video_id and file_path
+        """
+        last_id = 0
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute('''
+                    SELECT id, video_id, file_path FROM videos
+                    WHERE id > ? AND content_hash IS NULL AND download_status = 'completed'
+                      AND file_path IS NOT NULL AND file_path != ''
+                    ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            for row in rows:
+                yield {'video_id': row['video_id'], 'file_path': row['file_path']}
+
+    def get_videos_by_hash(self, content_hash: str) -> List[Dict]:
+        """
+        Get the videos sharing a payload (same clip under other IDs or titles)
+
+        Args:
+            content_hash: SHA-256 hex digest
+
+        Returns:
+            List[Dict]: video_id, title, creator_username and file_path of each video
+        """
+        try:
+            with self._connection() as conn:
+                rows = conn.execute('''
+                    SELECT video_id, title, creator_username, file_path FROM videos
+                    WHERE content_hash = ? ORDER BY download_date
+                ''', (content_hash,)).fetchall()
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logging.error(f"Error getting videos by hash: {str(e)}")
+            return []
+
+    def get_duplicate_summary(self) -> Dict:
+        """
+        Count videos whose payload is stored only once
+
+        Returns:
+            Dict: hashed_videos, unique_payloads, duplicate_videos and saved_bytes
+        """
+        try:
+            with self._connection() as conn:
+                row = conn.execute('''
+                    SELECT COALESCE(SUM(copies), 0) AS hashed_videos,
+                           COUNT(*) AS unique_payloads,
+                           COALESCE(SUM(copies - 1), 0) AS duplicate_videos,
+                           COALESCE(SUM((copies - 1) * size), 0) AS saved_bytes
+                    FROM (
+                        SELECT COUNT(*) AS copies, MAX(COALESCE(file_size, 0)) AS size
+                        FROM videos
+                        WHERE content_hash IS NOT NULL
+                        GROUP BY content_hash
+                    )
+                ''').fetchone()
+            return dict(row)
+
+        except Exception as e:
+            logging.error(f"Error getting duplicate summary: {str(e)}")
+            return {'hashed_videos': 0, 'unique_payloads': 0, 'duplicate_videos': 0, 'saved_bytes': 0}
+
+    def get_videos_by_creator(self, creator_username: str, columns: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Get all videos by a specific creator
+        
+        Prefer iter_videos_by_creator for creators with many videos.
+        
+        Args:
+            creator_username: Creator's username
+            columns: Columns to select (None for all)
+            
+        Returns:
+            List[Dict]: List of video records
+        """
+        try:
+            return list(self.iter_videos_by_creator(creator_username, columns, batch_size=500))
                 
-                # Unique creators
-                cursor.execute('SELECT COUNT(DISTINCT creator_username) FROM videos WHERE download_status = "completed"')
-                stats['unique_creators'] = cursor.fetchone()[0]
+        except Exception as e:
+            logging.error(f"Error getting videos by creator: {str(e)}")
+            return []
+    
+    def get_recent_videos(self, limit: int = 50, columns: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Get recently downloaded videos
+        
+        Args:
+            limit: Maximum number of videos to return
+            columns: Columns to select (None for all)
+            
+        Returns:
+            List[Dict]: List of recent video records
+        """
+        try:
+            return list(islice(self.iter_recent_videos(columns, batch_size=max(1, limit)), limit))
                 
-                # Total file size
-                cursor.execute('SELECT SUM(file_size) FROM videos WHERE download_status = "completed"')
-                total_size = cursor.fetchone()[0] or 0
-                stats['total_file_size'] = total_size
-                stats['total_file_size_mb'] = round(total_size / (1024 * 1024), 2)
+        except Exception as e:
+            logging.error(f"Error getting recent videos: {str(e)}")
+            return []
+    
+    def get_statistics(self) -> Dict:
+        """
+        Get database statistics
+        
+        Counters come from the incrementally maintained video_stats and
+        creator_stats tables, so this does not scan the videos table.
+        
+        Returns:
+            Dict: Statistics about stored videos
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
                 
-                # Date range
                 cursor.execute('''
-                    SELECT MIN(download_date), MAX(download_date) 
-                    FROM videos WHERE download_status = "completed"
+                    SELECT total_videos, failed_downloads, unique_creators,
+                           total_file_size, first_download, last_download
+                    FROM video_stats WHERE id = 1
                 ''')
-                date_range = cursor.fetchone()
-                stats['first_download'] = date_range[0]
-                stats['last_download'] = date_range[1]
+                stats = dict(cursor.fetchone())
+                stats['total_file_size_mb'] = round(stats['total_file_size'] / (1024 * 1024), 2)
                 
                 # Top creators
                 cursor.execute('''
-                    SELECT creator_username, COUNT(*) as video_count
-                    FROM videos 
-                    WHERE download_status = "completed" AND creator_username IS NOT NULL
-                    GROUP BY creator_username
+                    SELECT creator_username, video_count
+                    FROM creator_stats
                     ORDER BY video_count DESC
                     LIMIT 10
                 ''')
@@ -391,49 +2321,51 @@ class TikTokDatabase:
             logging.error(f"Error getting statistics: {str(e)}")
             return {}
     
-    def search_videos(self, query: str, field: str = 'all') -> List[Dict]:
+    def search_videos(self, query: str, field: str = 'all', limit: int = None,
+                      offset: int = 0, columns: Optional[Iterable[str]] = None) -> List[Dict]:
         """
         Search videos by title, creator, or description
         
+        Uses the FTS5 index ranked by BM25 (best matches first); see
+        build_fts_query for the query syntax. Without FTS5 it falls back to
+        substring matching ordered by download date.
+        
         Args:
             query: Search query
             field: Field to search in ('all', 'title', 'creator', 'description')
+            limit: Maximum number of results (None for all)
+            offset: Number of results to skip (for pagination)
+            columns: Columns to select (None for all)
             
         Returns:
             List[Dict]: Matching video records
         """
+        limit = -1 if limit is None else limit
+        select = self._select_list(columns)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 
-                query = f'%{query}%'
-                
-                if field == 'title':
-                    cursor.execute('''
-                        SELECT * FROM videos 
-                        WHERE title LIKE ? AND download_status = 'completed'
-                        ORDER BY download_date DESC
-                    ''', (query,))
-                elif field == 'creator':
-                    cursor.execute('''
-                        SELECT * FROM videos 
-                        WHERE creator_username LIKE ? AND download_status = 'completed'
-                        ORDER BY download_date DESC
-                    ''', (query,))
-                elif field == 'description':
-                    cursor.execute('''
-                        SELECT * FROM videos 
-                        WHERE description LIKE ? AND download_status = 'completed'
+                if self.fts_enabled:
+                    fts_query = build_fts_query(query, field)
+                    if not fts_query:
+                        return []
+                    
+                    cursor.execute(f'''
+                        SELECT {'videos.*' if select == '*' else select} FROM videos_fts
+                        JOIN videos ON videos.id = videos_fts.rowid
+                        WHERE videos_fts MATCH ? AND videos.download_status = 'completed'
+                        ORDER BY {SEARCH_RANK}
+                        LIMIT ? OFFSET ?
+                    ''', (fts_query, limit, offset))
+                else:
+                    where, params = self._like_search_clause(query, field)
+                    cursor.execute(f'''
+                        SELECT {select} FROM videos 
+                        WHERE {where} AND download_status = 'completed'
                         ORDER BY download_date DESC
-                    ''', (query,))
-                else:  # search all fields
-                    cursor.execute('''
-                        SELECT * FROM videos 
-                        WHERE (title LIKE ? OR creator_username LIKE ? OR description LIKE ?)
-                        AND download_status = 'completed'
-                        ORDER BY download_date DESC
-                    ''', (query, query, query))
+                        LIMIT ? OFFSET ?
+                    ''', params + (limit, offset))
                 
                 return [dict(row) for row in cursor.fetchall()]
                 
@@ -441,7 +2373,95 @@ class TikTokDatabase:
             logging.error(f"Error searching videos: {str(e)}")
             return []
     
+    def iter_search_results(self, query: str, field: str = 'all',
+                            columns: Optional[Iterable[str]] = LIST_COLUMNS,
+                            batch_size: int = 100) -> Iterator[Dict]:
+        """
+        Lazily iterate search results, best matches first
+        
+        Results are ranked by relevance rather than by date, so batches are
+        fetched by offset; FTS5 ranks all matches per query either way.
+        
+        Args:
+            query: Search query
+            field: Field to search in ('all', 'title', 'creator', 'description')
+            columns: Columns to select (None for all)
+            batch_size: Number of rows fetched per query
+            
+        Yields:
+            Dict: Video record
+        """
+        offset = 0
+        while True:
+            rows = self.search_videos(query, field, limit=batch_size, offset=offset, columns=columns)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            offset += batch_size
+    
+    def count_search_results(self, query: str, field: str = 'all') -> int:
+        """
+        Count the videos matching a search (see search_videos)
+        
+        Args:
+            query: Search query
+            field: Field to search in ('all', 'title', 'creator', 'description')
+            
+        Returns:
+            int: Number of matching videos
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                if self.fts_enabled:
+                    fts_query = build_fts_query(query, field)
+                    if not fts_query:
+                        return 0
+                    
+                    cursor.execute('''
+                        SELECT COUNT(*) FROM videos_fts
+                        JOIN videos ON videos.id = videos_fts.rowid
+                        WHERE videos_fts MATCH ? AND videos.download_status = 'completed'
+                    ''', (fts_query,))
+                else:
+                    where, params = self._like_search_clause(query, field)
+                    cursor.execute(f'''
+                        SELECT COUNT(*) FROM videos
+                        WHERE {where} AND download_status = 'completed'
+                    ''', params)
+                
+                return cursor.fetchone()[0]
+                
+        except Exception as e:
+            logging.error(f"Error counting search results: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def _like_search_clause(query: str, field: str) -> Tuple[str, Tuple]:
+        """Build the substring-match WHERE clause used when FTS5 is unavailable"""
+        pattern = f'%{query}%'
+        if field in SEARCH_FIELDS:
+            return f'{SEARCH_FIELDS[field]} LIKE ?', (pattern,)
+        return '(title LIKE ? OR creator_username LIKE ? OR description LIKE ?)', (pattern,) * 3
+    
     def close(self):
-        """Close database connection (not needed with context managers but good practice)"""
-        # Using context managers (with statements) automatically handles connections
-        pass
\ No newline at end of file
+        """Flush pending writes and close every thread's connection"""
+        self.stop_batch_writer()
+        
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.error(f"Error closing database connection: {str(e)}")
+        
+        # Threads will open fresh connections if the object is used again
+        self._local = threading.local()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
\ No newline at end of file
@@ -6,15 +6,19 @@ Command-line interface for viewing and searching TikTok video database
 import json
 import sys
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
 import colorama
 from colorama import Back, Fore, Style
-from database import TikTokDatabase
+from database import LIST_COLUMNS, TikTokDatabase
 
 # Initialize colorama for cross-platform colored output
 colorama.init(autoreset=True)
 
+# Number of videos shown per page
+PAGE_SIZE = 20
+
 
 class TikTokDBViewer:
     def __init__(self):
@@ -46,6 +50,20 @@ class TikTokDBViewer:
         seconds = int(duration_seconds % 60)
         return f"{minutes}:{seconds:02d}"
 
+    def continue_paging(self, shown):
+        """
+        Ask whether to show the next page of a listing
+
+        Output that is not going to a terminal keeps streaming without prompts.
+        """
+        if not sys.stdin.isatty() or not sys.stdout.isatty():
+            return True
+
+        more = input(
+            f"\n{Fore.CYAN}{shown} shown. Show next page? (Y/n): "
+        ).strip().lower()
+        return more in ("", "y", "yes")
+
     def show_statistics(self):
         """Display database statistics"""
         self.print_header("📊 DATABASE STATISTICS")
@@ -80,15 +98,17 @@ class TikTokDBViewer:
         """Display recent videos"""
         self.print_header(f"🕒 RECENT VIDEOS (Last {limit})")
 
-        videos = self.db.get_recent_videos(limit)
-
-        if not videos:
-            print(f"{Fore.YELLOW}No videos found in database")
-            return
+        # Rows are fetched lazily, a page at a time, without the metadata columns
+        videos = islice(self.db.iter_recent_videos(LIST_COLUMNS, batch_size=PAGE_SIZE), limit)
 
+        shown = 0
         for i, video in enumerate(videos, 1):
-            title = video.get("title", "N/A")[:50] + (
-                "..." if len(video.get("title", "")) > 50 else ""
+            if i > 1 and (i - 1) % PAGE_SIZE == 0 and not self.continue_paging(i - 1):
+                return
+            shown = i
+
+            title = (video.get("title") or "N/A")[:50] + (
+                "..." if len(video.get("title") or "") > 50 else ""
             )
             creator = video.get("creator_username", "N/A")
             duration = self.format_duration(video.get("duration"))
@@ -103,57 +123,313 @@ class TikTokDBViewer:
             print(f"   💾 Size: {size}")
             print(f"   📅 Downloaded: {download_date}")
 
-    def search_videos(self, query, field="all"):
-        """Search videos in database"""
-        self.print_header(f"🔍 SEARCH RESULTS: '{query}' in {field}")
+        if not shown:
+            print(f"{Fore.YELLOW}No videos found in database")
+
+    def search_videos(self, query, field="all", page=1):
+        """
+        Search videos in database, one page at a time
+
+        Returns:
+            int: Total number of pages (0 if nothing matched)
+        """
+        total = self.db.count_search_results(query, field)
+        pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        page = max(1, min(page, pages or 1))
 
-        videos = self.db.search_videos(query, field)
+        self.print_header(f"🔍 SEARCH RESULTS: '{query}' in {field}")
 
-        if not videos:
+        if not total:
             print(f"{Fore.YELLOW}No videos found matching '{query}'")
-            return
+            return 0
 
-        print(f"{Fore.GREEN}Found {len(videos)} video(s):")
+        offset = (page - 1) * PAGE_SIZE
+        videos = self.db.search_videos(query, field, limit=PAGE_SIZE, offset=offset, columns=LIST_COLUMNS)
 
-        for i, video in enumerate(videos[:20], 1):  # Limit to first 20 results
-            title = video.get("title", "N/A")[:60] + (
-                "..." if len(video.get("title", "")) > 60 else ""
+        print(f"{Fore.GREEN}Found {total} video(s) - page {page} of {pages}:")
+
+        for i, video in enumerate(videos, offset + 1):
+            title = (video.get("title") or "N/A")[:60] + (
+                "..." if len(video.get("title") or "") > 60 else ""
             )
             creator = video.get("creator_username", "N/A")
-            views = video.get("view_count", 0)
-            likes = video.get("like_count", 0)
+            views = video.get("view_count") or 0
+            likes = video.get("like_count") or 0
             download_date = video.get("download_date", "N/A")[:19]
 
             print(f"\n{Fore.CYAN}{i}. {title}")
             print(f"   👤 {creator} | 👁️ {views:,} views | ❤️ {likes:,} likes")
             print(f"   📅 Downloaded: {download_date}")
 
-        if len(videos) > 20:
-            print(f"\n{Fore.YELLOW}... and {len(videos) - 20} more results")
+        if page < pages:
+            print(f"\n{Fore.YELLOW}... {total - offset - len(videos)} more results (page {page + 1}: "
+                  f"db search \"{query}\" {field} {page + 1})")
+
+        return pages
+
+    def rebuild_statistics(self):
+        """Recompute the statistics counters and report any inconsistency"""
+        self.print_header("🔧 REBUILDING STATISTICS")
+
+        drift = self.db.rebuild_statistics()
+
+        if drift is None:
+            print(f"{Fore.RED}❌ Could not rebuild statistics (see log for details)")
+        elif not drift:
+            print(f"{Fore.GREEN}✅ Statistics were consistent")
+        else:
+            print(f"{Fore.YELLOW}⚠️  Fixed inconsistent counters:")
+            for counter, (stored, actual) in drift.items():
+                print(f"   {counter}: {stored} -> {actual}")
+
+    def compact_metadata(self):
+        """Move legacy inline metadata into the compressed side table"""
+        self.print_header("🗜️  COMPACTING METADATA")
+
+        size_before = self.db.db_path.stat().st_size
+        migrated = self.db.migrate_metadata()
+
+        if migrated < 0:
+            print(f"{Fore.RED}❌ Could not migrate metadata (see log for details)")
+            return
+
+        size_after = self.db.db_path.stat().st_size
+        print(f"{Fore.GREEN}✅ Migrated metadata of {migrated} video(s)")
+        print(
+            f"{Fore.MAGENTA}💾 Database size: {self.format_file_size(size_before)} -> {self.format_file_size(size_after)}"
+        )
+
+    def deduplicate_videos(self):
+        """Hash archived videos and store identical payloads once"""
+        from config import load_config
+        from content_store import ContentStore
+
+        config = load_config()
+        store = ContentStore(
+            self.db.db_path.parent / "store",
+            link_mode=config.get("storage", "link_mode", fallback="hardlink"),
+        )
+
+        self.print_header("🔗 DEDUPLICATING VIDEO FILES")
+        print(f"{Fore.BLUE}📦 Store: {store.root}")
+
+        hashed = missing = 0
+        for video in self.db.iter_unhashed_videos():
+            path = Path(video["file_path"])
+            if not path.is_file():
+                missing += 1
+                continue
+            try:
+                content_hash, _ = store.add(path)
+            except OSError as e:
+                print(f"\n{Fore.RED}❌ {path}: {str(e)}")
+                continue
+            self.db.set_content_hash(video["video_id"], content_hash)
+            hashed += 1
+            print(f"\r{Fore.CYAN}#️⃣  {hashed:,} files hashed | 🔗 {store.duplicates:,} duplicates", end="", flush=True)
+        print()
+
+        print(f"{Fore.GREEN}✅ Hashed {hashed:,} video file(s), {store.duplicates:,} duplicate(s) linked")
+        if store.duplicates:
+            print(f"{Fore.MAGENTA}💾 Disk space saved: {self.format_file_size(store.bytes_saved)}")
+        if missing:
+            print(f"{Fore.YELLOW}⚠️  {missing:,} video file(s) not found on disk")
+
+        summary = self.db.get_duplicate_summary()
+        print(
+            f"{Fore.MAGENTA}📊 {summary['hashed_videos']:,} hashed videos share "
+            f"{summary['unique_payloads']:,} unique payloads"
+        )
+
+    def show_quota(self, enforce=False):
+        """Show storage usage against the configured budgets (db quota [--enforce])"""
+        from config import load_config
+        from quota import DiskQuota
+
+        outputs_dir = self.db.db_path.parent
+        quota = DiskQuota.from_config(self.db, outputs_dir / "videos", load_config(), store_root=outputs_dir / "store")
+
+        self.print_header("💽 STORAGE QUOTA")
+
+        def budget(limit):
+            return self.format_file_size(limit) if limit else "unlimited"
+
+        usage = quota.usage()
+        print(f"{Fore.GREEN}📦 Vault: {self.format_file_size(usage) if usage else '0 B'} of {budget(quota.max_vault_bytes)}")
+        print(f"{Fore.BLUE}👤 Per creator budget: {budget(quota.max_creator_bytes)}")
+        if quota.videos_dir.exists():
+            free = quota.free_bytes()
+            color = Fore.GREEN if quota.has_free_space() else Fore.RED
+            print(f"{color}🆓 Free disk space: {self.format_file_size(free)} "
+                  f"(downloads pause below {budget(quota.min_free_bytes)})")
+
+        for creator, size in quota.creators_over_budget()[:10]:
+            print(f"   {Fore.YELLOW}⚠️  @{creator}: {self.format_file_size(size)} (over budget)")
+
+        if not enforce:
+            if quota.has_budget:
+                print(f"\n{Fore.YELLOW}💡 Evict files over budget now with: db quota --enforce")
+            return
+
+        evicted = quota.enforce()
+        print(f"\n{Fore.GREEN}✅ Evicted {evicted} video file(s), {self.format_file_size(quota.freed_bytes) if evicted else '0 B'} freed")
+
+    def set_video_priority(self, video_id, priority):
+        """Set how long a video's file is kept by the disk quota (higher = kept longer)"""
+        if self.db.set_priority(video_id, priority):
+            print(f"{Fore.GREEN}✅ Priority of {video_id} set to {priority}")
+        else:
+            print(f"{Fore.RED}❌ Video with ID '{video_id}' not found")
+
+    def import_sidecars(self, directories=None):
+        """Import yt-dlp .info.json sidecars into the database"""
+        from importer import SidecarImporter
+
+        if not directories:
+            outputs_dir = self.db.db_path.parent
+            directories = [outputs_dir / "videos", outputs_dir / "metadata"]
+        directories = [Path(directory).resolve() for directory in directories]
+
+        self.print_header("📥 IMPORTING .info.json FILES")
+        for directory in directories:
+            print(f"{Fore.BLUE}📁 {directory}")
+
+        def report(stats):
+            print(
+                f"\r{Fore.CYAN}📄 {stats.files:,} files | ✅ {stats.imported:,} imported | "
+                f"❌ {stats.errors:,} skipped | ⚡ {stats.files_per_sec:,.0f} files/sec",
+                end="",
+                flush=True,
+            )
+
+        stats = SidecarImporter(self.db).run(directories, progress=report)
+        print()
+
+        if not stats.files:
+            print(f"{Fore.YELLOW}No .info.json files found")
+            return
+
+        print(
+            f"{Fore.GREEN}✅ Imported {stats.imported:,} of {stats.files:,} files in {stats.elapsed:.1f}s "
+            f"({stats.files_per_sec:,.0f} files/sec)"
+        )
+
+    def export_videos(self, args):
+        """Export the archive to Parquet/Arrow/CSV (db export <file> [options])"""
+        import argparse
+
+        from exporter import export_videos
+
+        parser = argparse.ArgumentParser(prog="db export", description="Export downloaded videos")
+        parser.add_argument("file", type=Path, help="Output file (.parquet, .arrow, .feather or .csv)")
+        parser.add_argument("--columns", help="Comma-separated columns (default: all; 'metadata' adds full metadata)")
+        parser.add_argument("--since", help="Only videos downloaded on/after this date (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Only videos downloaded before this date (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Rows per batch (default: 10000)")
+        options = parser.parse_args(args)
+
+        columns = [column.strip() for column in options.columns.split(",")] if options.columns else None
+
+        self.print_header(f"📤 EXPORTING TO {options.file}")
+
+        def report(rows):
+            print(f"\r{Fore.CYAN}📄 {rows:,} rows exported", end="", flush=True)
+
+        try:
+            rows = export_videos(self.db, options.file, columns, options.since, options.until,
+                                 batch_size=options.batch_size, progress=report)
+        except (ImportError, ValueError) as e:
+            print(f"{Fore.RED}❌ {str(e)}")
+            return
+
+        print()
+        print(f"{Fore.GREEN}✅ Exported {rows:,} video(s) to {options.file}")
+
+    def relayout_videos(self, args):
+        """Move downloaded files into a directory layout (db relayout [layout] [options])"""
+        import argparse
+
+        from config import load_config
+        from output_layout import LAYOUTS, OutputLayout, layout_from_config, migrate_layout
+
+        config = load_config()
+        videos_dir = self.db.db_path.parent / "videos"
+
+        parser = argparse.ArgumentParser(prog="db relayout", description="Move downloaded files into a directory layout")
+        parser.add_argument("layout", nargs="?", choices=LAYOUTS,
+                            help="Target layout (default: [output] layout from the configuration)")
+        parser.add_argument("--id-filenames", action="store_true", help="Also rename files to <video id>.<ext>")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the videos that would move")
+        options = parser.parse_args(args)
+
+        layout = OutputLayout(videos_dir, options.layout) if options.layout else layout_from_config(config, videos_dir)
+        id_filenames = options.id_filenames or config.getboolean("output", "id_filenames", fallback=False)
+
+        self.print_header(f"🗂️  REORGANIZING VIDEOS: {layout.layout} layout")
+        print(f"{Fore.BLUE}📁 {videos_dir}")
+
+        def report(stats):
+            print(f"\r{Fore.CYAN}📹 {stats['videos']:,} videos checked | 🚚 {stats['moved']:,} moved", end="", flush=True)
+
+        stats = migrate_layout(self.db, layout, id_filenames=id_filenames, dry_run=options.dry_run, progress=report)
+        print()
+
+        if options.dry_run:
+            print(f"{Fore.YELLOW}🔍 Dry run: {stats['moved']:,} of {stats['videos']:,} video(s) would be moved")
+            return
+
+        print(f"{Fore.GREEN}✅ Moved {stats['moved']:,} video(s) ({stats['files']:,} files)")
+        if stats["missing"]:
+            print(f"{Fore.YELLOW}⚠️  {stats['missing']:,} video file(s) not found on disk")
+        if stats["no_file"]:
+            print(f"{Fore.YELLOW}⚠️  {stats['no_file']:,} video(s) have no file path in the database "
+                  f"(evicted, or downloaded by an older version) and were not moved")
+        if stats["errors"]:
+            print(f"{Fore.RED}❌ {stats['errors']:,} video(s) could not be moved (see log for details)")
+        if layout.layout != layout_from_config(config, videos_dir).layout:
+            print(f"{Fore.YELLOW}💡 Set 'layout = {layout.layout}' in [output] so new downloads use it too")
+
+    def rebuild_search_index(self):
+        """Rebuild the full-text search and hashtag indexes (backfill for existing databases)"""
+        self.print_header("🔧 REBUILDING SEARCH INDEXES")
+
+        if self.db.rebuild_search_index():
+            print(f"{Fore.GREEN}✅ Search index rebuilt")
+        else:
+            print(f"{Fore.RED}❌ Could not rebuild the search index (see log for details)")
+
+        if self.db.rebuild_tag_index():
+            print(f"{Fore.GREEN}✅ Hashtag index rebuilt")
+        else:
+            print(f"{Fore.RED}❌ Could not rebuild the hashtag index (see log for details)")
 
     def show_creator_videos(self, creator):
         """Show all videos by a specific creator"""
         self.print_header(f"👤 VIDEOS BY @{creator}")
 
-        videos = self.db.get_videos_by_creator(creator)
+        summary = self.db.get_creator_summary(creator)
 
-        if not videos:
+        if not summary["video_count"]:
             print(f"{Fore.YELLOW}No videos found for creator '{creator}'")
             return
 
-        print(f"{Fore.GREEN}Found {len(videos)} video(s) by @{creator}:")
-
-        total_views = sum(video.get("view_count", 0) for video in videos)
-        total_likes = sum(video.get("like_count", 0) for video in videos)
+        print(f"{Fore.GREEN}Found {summary['video_count']} video(s) by @{creator}:")
+        print(
+            f"{Fore.BLUE}📊 Total: {summary['total_views']:,} views, {summary['total_likes']:,} likes"
+        )
 
-        print(f"{Fore.BLUE}📊 Total: {total_views:,} views, {total_likes:,} likes")
+        # Rows are fetched lazily, a page at a time, without the metadata columns
+        videos = self.db.iter_videos_by_creator(creator, LIST_COLUMNS, batch_size=PAGE_SIZE)
 
         for i, video in enumerate(videos, 1):
-            title = video.get("title", "N/A")[:60] + (
-                "..." if len(video.get("title", "")) > 60 else ""
+            if i > 1 and (i - 1) % PAGE_SIZE == 0 and not self.continue_paging(i - 1):
+                return
+
+            title = (video.get("title") or "N/A")[:60] + (
+                "..." if len(video.get("title") or "") > 60 else ""
             )
-            views = video.get("view_count", 0)
-            likes = video.get("like_count", 0)
+            views = video.get("view_count") or 0
+            likes = video.get("like_count") or 0
             duration = self.format_duration(video.get("duration"))
             download_date = video.get("download_date", "N/A")[:19]
 
@@ -161,6 +437,74 @@ class TikTokDBViewer:
             print(f"   👁️ {views:,} views | ❤️ {likes:,} likes | ⏱️ {duration}")
             print(f"   📅 Downloaded: {download_date}")
 
+    def show_tag_videos(self, tag):
+        """Show the videos with a hashtag"""
+        tag = self.db.normalize_tag(tag)
+        self.print_header(f"🏷️  VIDEOS TAGGED #{tag}")
+
+        total = self.db.count_videos_by_tag(tag)
+
+        if not total:
+            print(f"{Fore.YELLOW}No videos found with hashtag '#{tag}'")
+            return
+
+        print(f"{Fore.GREEN}Found {total} video(s) tagged #{tag}:")
+
+        # Rows are fetched lazily, a page at a time, without the metadata columns
+        videos = self.db.iter_videos_by_tag(tag, LIST_COLUMNS, batch_size=PAGE_SIZE)
+
+        for i, video in enumerate(videos, 1):
+            if i > 1 and (i - 1) % PAGE_SIZE == 0 and not self.continue_paging(i - 1):
+                return
+
+            title = (video.get("title") or "N/A")[:60] + (
+                "..." if len(video.get("title") or "") > 60 else ""
+            )
+            creator = video.get("creator_username", "N/A")
+            views = video.get("view_count") or 0
+            likes = video.get("like_count") or 0
+            download_date = video.get("download_date", "N/A")[:19]
+
+            print(f"\n{Fore.CYAN}{i}. {title}")
+            print(f"   👤 {creator} | 👁️ {views:,} views | ❤️ {likes:,} likes")
+            print(f"   📅 Downloaded: {download_date}")
+
+    def show_failures(self, limit=20):
+        """Show the most recent failed downloads"""
+        self.print_header(f"❌ FAILED DOWNLOADS (Last {limit})")
+
+        failures = self.db.get_failed_downloads(limit)
+
+        if not failures:
+            print(f"{Fore.GREEN}No failed downloads")
+            return
+
+        now = datetime.now().isoformat()
+        for i, failure in enumerate(failures, 1):
+            next_retry = failure.get("next_retry_at")
+            if next_retry and next_retry > now:
+                retry = f"skipped until {next_retry[:19]}"
+            else:
+                retry = "eligible for retry"
+
+            print(f"\n{Fore.RED}{i}. {failure['url']}")
+            print(f"   ⚠️  {failure.get('error_class', 'unknown')}: {(failure.get('error') or 'N/A')[:100]}")
+            print(f"   🔁 {failure['attempts']} attempt(s) | 📅 Last failed: {failure['last_failed_at'][:19]}")
+            print(f"   ⏭️  {retry}")
+
+    def show_top_tags(self, limit=20):
+        """Show the most used hashtags"""
+        self.print_header(f"🏷️  TOP HASHTAGS (Top {limit})")
+
+        tags = self.db.get_top_tags(limit)
+
+        if not tags:
+            print(f"{Fore.YELLOW}No hashtags found in database")
+            return
+
+        for i, tag in enumerate(tags, 1):
+            print(f"  {i}. #{tag['tag']}: {tag['video_count']} videos")
+
     def show_video_details(self, video_id):
         """Show detailed information about a specific video"""
         video = self.db.get_video_by_id(video_id)
@@ -171,6 +515,9 @@ class TikTokDBViewer:
 
         self.print_header(f"📹 VIDEO DETAILS: {video_id}")
 
+        # Viewing a video keeps its file away from disk quota eviction
+        self.db.touch_video(video_id)
+
         print(f"{Fore.GREEN}Title: {video.get('title', 'N/A')}")
         print(
             f"{Fore.BLUE}Creator: @{video.get('creator_username', 'N/A')} ({video.get('creator_display_name', 'N/A')})"
@@ -201,6 +548,47 @@ class TikTokDBViewer:
         if video.get("file_path"):
             print(f"\n{Fore.CYAN}📁 FILE PATH:")
             print(f"   {video.get('file_path')}")
+        elif video.get("evicted_at"):
+            print(f"\n{Fore.YELLOW}🧹 File evicted by the disk quota on {video['evicted_at'][:19]}")
+        if video.get("priority"):
+            print(f"{Fore.CYAN}⭐ Eviction priority: {video['priority']}")
+
+        if video.get("content_hash"):
+            print(f"\n{Fore.CYAN}#️⃣  SHA-256: {video['content_hash']}")
+            copies = [other for other in self.db.get_videos_by_hash(video["content_hash"])
+                      if other["video_id"] != video_id]
+            for other in copies:
+                print(f"   🔗 Same file as {other['video_id']} - {other.get('title') or 'N/A'}")
+
+        # Full metadata is stored compressed and only decoded here
+        metadata = self.db.get_video_metadata(video_id) or {}
+        details = [
+            ("🎵 Music", " - ".join(filter(None, [metadata.get("track"), metadata.get("artist")]))),
+            ("🖼️  Resolution", f"{metadata['width']}x{metadata['height']}"
+             if metadata.get("width") and metadata.get("height") else ""),
+            ("🎞️  Format", metadata.get("format") or metadata.get("ext")),
+            ("🏷️  Tags", " ".join(f"#{tag}" for tag in json.loads(video.get("tags") or "[]"))),
+        ]
+        details = [(label, value) for label, value in details if value]
+        if details:
+            print(f"\n{Fore.CYAN}🧾 METADATA:")
+            for label, value in details:
+                print(f"   {label}: {value}")
+
+    def save_profile(self, profiler):
+        """Write the --profile output to outputs/logs and show the hottest functions"""
+        try:
+            files = profiler.save(self.db.db_path.parent / "logs", "profile_db")
+        except Exception as e:
+            print(f"{Fore.RED}❌ Failed to save profile: {str(e)}")
+            return
+
+        self.print_header(f"🔬 PROFILE ({profiler.elapsed:.2f}s)")
+        for path in files:
+            print(f"{Fore.BLUE}📄 {path}")
+        print(f"\n{Fore.YELLOW}Top functions by own time:")
+        for line in profiler.summary_lines():
+            print(f"   {line}")
 
     def interactive_menu(self):
         """Run interactive menu"""
@@ -212,9 +600,11 @@ class TikTokDBViewer:
             print(f"{Fore.YELLOW}3. Search Videos")
             print(f"{Fore.YELLOW}4. Show Creator's Videos")
             print(f"{Fore.YELLOW}5. Show Video Details")
-            print(f"{Fore.YELLOW}6. Exit")
+            print(f"{Fore.YELLOW}6. Show Videos by Hashtag")
+            print(f"{Fore.YELLOW}7. Show Top Hashtags")
+            print(f"{Fore.YELLOW}8. Exit")
 
-            choice = input(f"\n{Fore.CYAN}Choose an option (1-6): ").strip()
+            choice = input(f"\n{Fore.CYAN}Choose an option (1-8): ").strip()
 
             if choice == "1":
                 self.show_statistics()
@@ -238,7 +628,15 @@ class TikTokDBViewer:
                         ).strip()
                         or "all"
                     )
-                    self.search_videos(query, field)
+                    page, pages = 1, self.search_videos(query, field)
+                    while page < pages:
+                        more = input(
+                            f"\n{Fore.CYAN}Show next page? (Y/n): "
+                        ).strip().lower()
+                        if more not in ("", "y", "yes"):
+                            break
+                        page += 1
+                        self.search_videos(query, field, page)
                 else:
                     print(f"{Fore.RED}❌ Please enter a search query")
 
@@ -257,6 +655,16 @@ class TikTokDBViewer:
                     print(f"{Fore.RED}❌ Please enter a video ID")
 
             elif choice == "6":
+                tag = input(f"{Fore.CYAN}Hashtag (with or without #): ").strip()
+                if tag:
+                    self.show_tag_videos(tag)
+                else:
+                    print(f"{Fore.RED}❌ Please enter a hashtag")
+
+            elif choice == "7":
+                self.show_top_tags()
+
+            elif choice == "8":
                 print(f"{Fore.GREEN}👋 Goodbye!")
                 break
 
@@ -268,8 +676,29 @@ class TikTokDBViewer:
 
 def main():
     """Main entry point"""
+    # The profiler is only imported when asked for (keeps plain commands fast)
+    if not any(arg in ("--profile", "--profile-sampler") for arg in sys.argv[1:]):
+        run_command(TikTokDBViewer())
+        return
+
+    from profiler import SessionProfiler, pop_profile_options
+
+    args = sys.argv[1:]
+    _, sampler = pop_profile_options(args)
+    sys.argv = [sys.argv[0]] + args
+
+    profiler = SessionProfiler(sampler=sampler)
+    profiler.start()
     viewer = TikTokDBViewer()
+    try:
+        run_command(viewer)
+    finally:
+        profiler.stop()
+        viewer.save_profile(profiler)
 
+
+def run_command(viewer):
+    """Run the command given in sys.argv (interactive menu without one)"""
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
 
@@ -284,7 +713,29 @@ def main():
                 return
             query = sys.argv[2]
             field = sys.argv[3] if len(sys.argv) > 3 else "all"
-            viewer.search_videos(query, field)
+            page = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+            viewer.search_videos(query, field, page)
+        elif command == "reindex":
+            viewer.rebuild_search_index()
+        elif command == "rebuild-stats":
+            viewer.rebuild_statistics()
+        elif command == "export":
+            viewer.export_videos(sys.argv[2:])
+        elif command == "import":
+            viewer.import_sidecars(sys.argv[2:])
+        elif command == "compact":
+            viewer.compact_metadata()
+        elif command == "dedup":
+            viewer.deduplicate_videos()
+        elif command == "relayout":
+            viewer.relayout_videos(sys.argv[2:])
+        elif command == "quota":
+            viewer.show_quota(enforce="--enforce" in sys.argv[2:])
+        elif command == "priority":
+            if len(sys.argv) < 4:
+                print(f"{Fore.RED}❌ Please provide a video ID and a priority")
+                return
+            viewer.set_video_priority(sys.argv[2], int(sys.argv[3]))
         elif command == "creator":
             if len(sys.argv) < 3:
                 print(f"{Fore.RED}❌ Please provide a creator username")
@@ -297,10 +748,21 @@ def main():
                 return
             video_id = sys.argv[2]
             viewer.show_video_details(video_id)
+        elif command == "tag":
+            if len(sys.argv) < 3:
+                print(f"{Fore.RED}❌ Please provide a hashtag")
+                return
+            viewer.show_tag_videos(sys.argv[2])
+        elif command == "failures":
+            limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+            viewer.show_failures(limit)
+        elif command == "tags":
+            limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+            viewer.show_top_tags(limit)
         else:
             print(f"{Fore.RED}❌ Unknown command: {command}")
             print(
-                f"{Fore.YELLOW}Available commands: stats, recent, search, creator, video"
+                f"{Fore.YELLOW}Available commands: stats, rebuild-stats, recent, search, reindex, compact, dedup, relayout, quota, priority, import, export, creator, video, tag, tags, failures"
             )
     else:
         # Interactive mode
@@ -0,0 +1,125 @@
+"""
+TikTok Database Writer
+Single background thread that batches SQLite writes into grouped transactions
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from pathlib import Path
+from typing import Sequence
+
+# Sentinel telling the writer thread to exit
+_STOP = object()
+
+
+class DatabaseWriter:
+    def __init__(self, db_path: Path, batch_size: int = 500, flush_interval: float = 0.5):
+        """
+        Start the writer thread
+
+        Args:
+            db_path: Path to the SQLite database file
+            batch_size: Maximum number of statements per transaction
+            flush_interval: Maximum seconds a queued statement waits before being committed
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql: str, params: Sequence):
+        """
+        Queue a write statement
+
+        Consecutive statements with the same SQL are executed together with
+        executemany inside one transaction.
+
+        Args:
+            sql: SQL statement with ? placeholders
+            params: Statement parameters
+        """
+        self._queue.put((sql, params))
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Block until every statement queued so far is committed
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            bool: True if the queue was flushed in time
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        """Writer thread main loop"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # WAL lets readers keep working while the writer commits; NORMAL sync is
+        # durable across application crashes and only fsyncs at checkpoints
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+
+        try:
+            while True:
+                item = self._queue.get()
+                batch, waiters, stop = [], [], False
+
+                # Collect statements until the batch is full, the interval expires,
+                # or a flush/stop request arrives
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                        break
+
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._commit(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch):
+        """Execute a batch in a single transaction"""
+        try:
+            with conn:
+                for sql, group in groupby(batch, key=lambda item: item[0]):
+                    conn.executemany(sql, [params for _, params in group])
+        except sqlite3.Error as e:
+            # One bad row must not lose the whole batch: retry statement by statement
+            logging.error(f"Batched database write failed, retrying individually: {str(e)}")
+            for sql, params in batch:
+                try:
+                    with conn:
+                        conn.execute(sql, params)
+                except sqlite3.Error as row_error:
+                    logging.error(f"Error writing to database: {str(row_error)}")
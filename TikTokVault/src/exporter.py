@@ -0,0 +1,166 @@
+"""
+TikTok Archive Exporter
+Streams the videos table into Parquet, Arrow IPC or CSV files in bounded batches
+"""
+
+import csv
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from database import TikTokDatabase
+
+# Optional: columnar formats need pyarrow, CSV works without it
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Export formats by file extension
+FORMATS = {
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.csv': 'csv',
+}
+
+# Formats that need pyarrow
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+def detect_format(path: Path) -> str:
+    """
+    Pick the export format from the file extension
+
+    Args:
+        path: Output file
+
+    Returns:
+        str: 'parquet', 'arrow' or 'csv'
+
+    Raises:
+        ValueError: Unknown extension
+    """
+    try:
+        return FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown export format '{path.suffix}' (use {', '.join(FORMATS)})") from None
+
+
+def _arrow_type(sqlite_type: str):
+    """Map a declared SQLite column type to an Arrow type (SQLite type affinity rules)"""
+    sqlite_type = (sqlite_type or '').upper()
+    if 'INT' in sqlite_type:
+        return pyarrow.int64()
+    if any(name in sqlite_type for name in ('REAL', 'FLOA', 'DOUB')):
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def _coerce(values, arrow_type) -> list:
+    """
+    Convert values to the column's Arrow type
+
+    SQLite columns are dynamically typed (e.g. a float duration in an INTEGER
+    column); values that can't be converted are exported as nulls.
+    """
+    if pyarrow.types.is_string(arrow_type):
+        return [None if value is None else str(value) for value in values]
+
+    convert = int if pyarrow.types.is_integer(arrow_type) else float
+    coerced = []
+    for value in values:
+        try:
+            coerced.append(None if value is None else convert(value))
+        except (TypeError, ValueError):
+            coerced.append(None)
+    return coerced
+
+
+def export_videos(db: TikTokDatabase, path: Path, columns: Optional[Iterable[str]] = None,
+                  since: str = None, until: str = None, export_format: str = None,
+                  batch_size: int = 10000, progress: Callable[[int], None] = None) -> int:
+    """
+    Export completed videos to a file
+
+    Rows are read with TikTokDatabase.iter_video_batches and written one batch
+    at a time (a Parquet row group / Arrow record batch / block of CSV rows),
+    so memory stays bounded by batch_size whatever the archive size.
+
+    Args:
+        db: Database to export
+        path: Output file
+        columns: Columns to export (None for all); 'metadata' adds the decoded metadata as JSON
+        since: Only videos downloaded at or after this ISO date/datetime
+        until: Only videos downloaded before this ISO date/datetime
+        export_format: 'parquet', 'arrow' or 'csv' (None: from the file extension)
+        batch_size: Rows per batch
+        progress: Called with the running row count after each batch
+
+    Returns:
+        int: Number of exported rows
+
+    Raises:
+        ValueError: Unknown format or column
+        ImportError: Columnar format requested without pyarrow installed
+    """
+    export_format = export_format or detect_format(path)
+    if export_format in COLUMNAR_FORMATS and pyarrow is None:
+        raise ImportError(f"Exporting to {export_format} requires pyarrow (pip install pyarrow); "
+                          f"use a .csv file instead")
+
+    types = dict(db.get_video_columns())
+    columns = list(columns) if columns else list(types)
+    unknown = [column for column in columns if column not in types and column != 'metadata']
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    batches = db.iter_video_batches(columns, since, until, batch_size)
+
+    if export_format == 'csv':
+        return _write_csv(path, columns, batches, progress)
+
+    schema = pyarrow.schema([(column, _arrow_type(types.get(column))) for column in columns])
+    return _write_arrow(path, schema, export_format, batches, progress)
+
+
+def _write_csv(path: Path, columns, batches, progress) -> int:
+    """Write batches as CSV rows"""
+    rows = 0
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+            rows += len(batch)
+            if progress:
+                progress(rows)
+    return rows
+
+
+def _write_arrow(path: Path, schema, export_format: str, batches, progress) -> int:
+    """Write batches as Parquet row groups or Arrow IPC record batches"""
+    if export_format == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(str(path), schema, compression='zstd')
+    else:
+        writer = pyarrow.ipc.new_file(str(path), schema)
+
+    rows = 0
+    try:
+        for batch in batches:
+            # Rows -> columns, converted with the declared types
+            arrays = [pyarrow.array(_coerce(values, field.type), type=field.type)
+                      for values, field in zip(zip(*batch), schema)]
+            record_batch = pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+            if export_format == 'parquet':
+                writer.write_table(pyarrow.Table.from_batches([record_batch]))
+            else:
+                writer.write_batch(record_batch)
+            rows += len(batch)
+            if progress:
+                progress(rows)
+    finally:
+        writer.close()
+    return rows
@@ -0,0 +1,175 @@
+"""
+TikTok Sidecar Importer
+Rebuilds or merges the database from the .info.json files written by yt-dlp
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from database import VIDEO_COLUMNS, TikTokDatabase
+
+# yt-dlp names sidecars <video file stem>.info.json
+SIDECAR_SUFFIX = '.info.json'
+
+# Sidecars parsed per pool task; large enough to amortize inter-process overhead
+PARSE_CHUNKSIZE = 64
+
+# Position of download_date in a video row (replaced by the sidecar's mtime)
+_DOWNLOAD_DATE_INDEX = VIDEO_COLUMNS.index('download_date')
+
+
+class ImportStats:
+    def __init__(self):
+        """Counters for an import run"""
+        self.files = 0
+        self.imported = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the import started"""
+        return time.monotonic() - self.started
+
+    @property
+    def files_per_sec(self) -> float:
+        """Sidecar files processed per second"""
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def iter_sidecars(directories: Iterable[Path]) -> Iterator[str]:
+    """
+    Recursively find .info.json files
+
+    os.scandir reuses the directory entry types returned by the OS, so no
+    extra stat() call is made per file.
+
+    Args:
+        directories: Directories to scan (missing ones are skipped)
+
+    Yields:
+        str: Path of a sidecar file
+    """
+    pending = [str(directory) for directory in directories]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.endswith(SIDECAR_SUFFIX) and entry.is_file():
+                        yield entry.path
+        except OSError as e:
+            logging.warning(f"Skipping unreadable directory {directory}: {str(e)}")
+
+
+def _find_video_file(sidecar: str, info: dict) -> Optional[str]:
+    """Locate the media file a sidecar describes"""
+    candidates = [info.get('filepath'), info.get('_filename')]
+    candidates += [download.get('filepath') for download in info.get('requested_downloads') or []]
+    # The video normally sits next to its sidecar with the same stem
+    stem = sidecar[:-len(SIDECAR_SUFFIX)]
+    candidates.append(f"{stem}.{info.get('ext') or 'mp4'}")
+
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def parse_sidecar(sidecar: str) -> Optional[Tuple[Tuple, Tuple]]:
+    """
+    Parse one sidecar into database rows (runs in a worker process)
+
+    Args:
+        sidecar: Path of the .info.json file
+
+    Returns:
+        Tuple or None: (video row, metadata row) for TikTokDatabase.add_video_rows,
+                       or None if the file is not a usable video sidecar
+    """
+    try:
+        with open(sidecar, 'rb') as file:
+            info = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    # Playlist/channel sidecars have no single video
+    if not isinstance(info, dict) or not info.get('id') or info.get('_type', 'video') != 'video':
+        return None
+
+    video_file = _find_video_file(sidecar, info)
+    if video_file:
+        info['_filename'] = video_file
+        info['filesize'] = os.path.getsize(video_file)
+
+    video_row = TikTokDatabase._video_row(info)
+
+    # The sidecar is written during the download: its mtime is the download date
+    download_date = datetime.fromtimestamp(os.path.getmtime(sidecar)).isoformat()
+    video_row = video_row[:_DOWNLOAD_DATE_INDEX] + (download_date,) + video_row[_DOWNLOAD_DATE_INDEX + 1:]
+
+    return video_row, TikTokDatabase._metadata_row(info)
+
+
+class SidecarImporter:
+    def __init__(self, db: TikTokDatabase, workers: int = None, batch_size: int = 2000):
+        """
+        Initialize the importer
+
+        Args:
+            db: Database to import into
+            workers: Parser processes (None: one per CPU)
+            batch_size: Sidecars per database transaction
+        """
+        self.db = db
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def run(self, directories: Iterable[Path],
+            progress: Callable[[ImportStats], None] = None) -> ImportStats:
+        """
+        Import every sidecar found under the given directories
+
+        Files are parsed in a process pool (JSON parsing is CPU-bound) while
+        this process upserts each batch of rows in a single transaction.
+        Existing videos are updated, so the import can be re-run safely.
+
+        Args:
+            directories: Directories to scan recursively
+            progress: Called with the running stats after each batch
+
+        Returns:
+            ImportStats: Final counters
+        """
+        stats = ImportStats()
+        sidecars = iter_sidecars(directories)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                # Bounded batches keep memory flat however many files there are
+                batch = list(islice(sidecars, self.batch_size))
+                if not batch:
+                    break
+
+                rows = [row for row in pool.map(parse_sidecar, batch, chunksize=PARSE_CHUNKSIZE) if row]
+                stats.files += len(batch)
+                stats.errors += len(batch) - len(rows)
+
+                if rows and self.db.add_video_rows(rows):
+                    stats.imported += len(rows)
+                else:
+                    stats.errors += len(rows)
+
+                if progress:
+                    progress(stats)
+
+        return stats
@@ -0,0 +1,146 @@
+"""
+TikTok Info Cache
+Persistent, size-bounded cache of yt-dlp info dicts keyed by video ID
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class InfoCache:
+    def __init__(self, cache_path: Path, ttl_seconds: float = 6 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            cache_path: Path to the SQLite file holding the cache
+            ttl_seconds: Entries older than this are treated as missing
+            max_bytes: Maximum total size of the stored (compressed) entries;
+                       least recently used entries are evicted beyond it
+        """
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # A single connection shared by all download workers, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS info_cache (
+                video_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_info_cache_last_access ON info_cache(last_access)')
+        self._conn.commit()
+
+        # Running total so size checks don't need a full scan
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM info_cache').fetchone()[0]
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        """
+        Get a cached info dict
+
+        Args:
+            video_id: TikTok video ID
+
+        Returns:
+            Dict or None: Cached info dict, or None if missing or expired
+        """
+        if not video_id:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, size, fetched_at FROM info_cache WHERE video_id = ?', (video_id,)).fetchone()
+            if row is None:
+                return None
+
+            data, size, fetched_at = row
+            if now - fetched_at > self.ttl_seconds:
+                self._delete(video_id, size)
+                self._conn.commit()
+                return None
+
+            self._conn.execute('UPDATE info_cache SET last_access = ? WHERE video_id = ?', (now, video_id))
+            self._conn.commit()
+
+        try:
+            return json.loads(zlib.decompress(data))
+        except (zlib.error, ValueError) as e:
+            logging.warning(f"Discarding corrupt info cache entry {video_id}: {str(e)}")
+            self.invalidate(video_id)
+            return None
+
+    def put(self, video_id: str, info: Dict):
+        """
+        Store an info dict, evicting least recently used entries if over budget
+
+        Args:
+            video_id: TikTok video ID
+            info: yt-dlp info dict
+        """
+        if not video_id:
+            return
+
+        data = zlib.compress(json.dumps(info, default=str).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute('SELECT size FROM info_cache WHERE video_id = ?', (video_id,)).fetchone()
+            if previous:
+                self._total_bytes -= previous[0]
+
+            self._conn.execute('''
+                INSERT OR REPLACE INTO info_cache (video_id, data, size, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (video_id, data, len(data), now, now))
+            self._total_bytes += len(data)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def invalidate(self, video_id: str):
+        """Remove an entry (e.g. when its media URLs turned out to be stale)"""
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM info_cache WHERE video_id = ?', (video_id,)).fetchone()
+            if row:
+                self._delete(video_id, row[0])
+                self._conn.commit()
+
+    def _delete(self, video_id: str, size: int):
+        """Delete an entry and update the running total (lock must be held)"""
+        self._conn.execute('DELETE FROM info_cache WHERE video_id = ?', (video_id,))
+        self._total_bytes -= size
+
+    def _evict(self):
+        """Evict least recently used entries down to 90% of the budget (lock must be held)"""
+        target = self.max_bytes * 0.9
+        cursor = self._conn.execute('SELECT video_id, size FROM info_cache ORDER BY last_access')
+        victims = []
+        for video_id, size in cursor:
+            if self._total_bytes <= target:
+                break
+            victims.append((video_id,))
+            self._total_bytes -= size
+
+        self._conn.executemany('DELETE FROM info_cache WHERE video_id = ?', victims)
+        logging.info(f"Info cache evicted {len(victims)} entries")
+
+    def close(self):
+        """Close the cache database"""
+        with self._lock:
+            self._conn.close()
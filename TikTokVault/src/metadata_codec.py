@@ -0,0 +1,88 @@
+"""
+TikTok Metadata Codec
+Compact binary encoding of video metadata (JSON + zstd or zlib compression)
+"""
+
+import json
+import zlib
+from typing import Dict, Tuple
+
+# Optional faster codecs: used when installed, never required
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Compression codec names stored next to each blob
+ZLIB = 'zlib'
+ZSTD = 'zstd'
+
+# zstd level 3 compresses about as well as zlib level 6, several times faster
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# Compression used for new blobs
+DEFAULT_CODEC = ZSTD if zstandard is not None else ZLIB
+
+
+def _dumps(data: Dict) -> bytes:
+    """Serialize to JSON bytes (orjson when available)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=str)
+        except TypeError:
+            # e.g. non-string dict keys, which the json module tolerates
+            pass
+    return json.dumps(data, default=str).encode('utf-8')
+
+
+def _loads(data: bytes) -> Dict:
+    """Parse JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_metadata(metadata: Dict, codec: str = DEFAULT_CODEC) -> Tuple[bytes, str]:
+    """
+    Serialize and compress a metadata dict
+
+    Args:
+        metadata: Metadata to encode (values that aren't JSON types are stored as strings)
+        codec: Compression codec (ZSTD falls back to ZLIB if zstandard isn't installed)
+
+    Returns:
+        Tuple[bytes, str]: Compressed blob and the codec used
+    """
+    raw = _dumps(metadata)
+    if codec == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw), ZSTD
+    return zlib.compress(raw, ZLIB_LEVEL), ZLIB
+
+
+def decode_metadata(blob: bytes, codec: str) -> Dict:
+    """
+    Decompress and parse a metadata blob
+
+    Args:
+        blob: Compressed blob from encode_metadata
+        codec: Codec the blob was compressed with
+
+    Returns:
+        Dict: Decoded metadata
+
+    Raises:
+        ValueError: Unknown codec, or zstd blob without zstandard installed
+    """
+    if codec == ZLIB:
+        return _loads(zlib.decompress(blob))
+    if codec == ZSTD:
+        if zstandard is None:
+            raise ValueError("Metadata is zstd-compressed but the zstandard package is not installed")
+        return _loads(zstandard.ZstdDecompressor().decompress(blob))
+    raise ValueError(f"Unknown metadata codec: {codec}")
@@ -0,0 +1,265 @@
+"""
+TikTok Output Layout
+Sharded directory layouts for downloaded files and migration between them
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from database import TikTokDatabase
+
+# Directory layouts under outputs/videos
+FLAT = 'flat'          # Every file in one directory (original behaviour)
+CREATOR = 'creator'    # <creator>/
+DATE = 'date'          # <upload year>/<upload month>/
+HASH = 'hash'          # <ab>/<cd>/ from a hash of the video ID (evenly spread)
+LAYOUTS = (FLAT, CREATOR, DATE, HASH)
+
+# yt-dlp filename templates: the original descriptive name and a short one.
+# Short names make a video's path computable from its ID alone
+DEFAULT_FILENAME_TEMPLATE = '%(uploader)s_%(title)s_%(id)s.%(ext)s'
+ID_FILENAME_TEMPLATE = '%(id)s.%(ext)s'
+
+# Directory used when the creator or upload date is unknown
+UNKNOWN_DIR = 'unknown'
+
+# Characters not allowed in a directory name on common filesystems
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def _safe_component(name: str) -> str:
+    """Make a creator name usable as a single directory name"""
+    name = _UNSAFE_CHARS.sub('_', name or '').strip(' .')
+    return name[:100] or UNKNOWN_DIR
+
+
+class OutputLayout:
+    def __init__(self, root: Path, layout: str = FLAT):
+        """
+        Initialize the layout
+
+        Args:
+            root: Base directory (outputs/videos)
+            layout: 'flat', 'creator', 'date' or 'hash'
+
+        Raises:
+            ValueError: Unknown layout
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout '{layout}' (use {', '.join(LAYOUTS)})")
+        self.root = Path(root)
+        self.layout = layout
+
+    def relative_dir(self, video_id: str, creator: str = None, upload_date: str = None) -> Path:
+        """
+        Directory of a video relative to the root
+
+        Args:
+            video_id: TikTok video ID
+            creator: Creator username (creator layout)
+            upload_date: Upload date as YYYYMMDD (date layout)
+
+        Returns:
+            Path: Relative directory (empty for the flat layout)
+        """
+        if self.layout == CREATOR:
+            return Path(_safe_component(creator))
+        if self.layout == DATE:
+            if upload_date and len(upload_date) >= 6 and upload_date[:6].isdigit():
+                return Path(upload_date[:4], upload_date[4:6])
+            return Path(UNKNOWN_DIR)
+        if self.layout == HASH:
+            digest = hashlib.sha1(str(video_id).encode('utf-8')).hexdigest()
+            return Path(digest[:2], digest[2:4])
+        return Path()
+
+    def directory_for(self, info: Dict) -> Path:
+        """
+        Directory for a yt-dlp info dict
+
+        Args:
+            info: Video information (id, uploader, upload_date)
+
+        Returns:
+            Path: Absolute directory
+        """
+        return self.root / self.relative_dir(
+            info.get('id', ''),
+            info.get('uploader', info.get('uploader_id')),
+            info.get('upload_date'))
+
+    def outtmpl(self, info: Dict, filename_template: str) -> str:
+        """
+        yt-dlp output template placing a video in its directory
+
+        Args:
+            info: Video information
+            filename_template: yt-dlp template for the file name
+
+        Returns:
+            str: Full output template
+        """
+        # '%' in a creator name must not be read as a template field
+        directory = str(self.directory_for(info)).replace('%', '%%')
+        return os.path.join(directory, filename_template)
+
+
+class _DirectoryListing:
+    """Sorted file names of directories, listed once, to find a video's sidecars"""
+
+    def __init__(self):
+        self._names = {}
+
+    def siblings(self, path: Path) -> List[str]:
+        """Names in path's directory starting with '<path stem>.' (video, .info.json, thumbnail)"""
+        directory = str(path.parent)
+        names = self._names.get(directory)
+        if names is None:
+            try:
+                with os.scandir(directory) as entries:
+                    names = sorted(entry.name for entry in entries if not entry.is_dir(follow_symlinks=False))
+            except OSError:
+                names = []
+            self._names[directory] = names
+
+        prefix = f"{path.stem}."
+        start = bisect.bisect_left(names, prefix)
+        found = []
+        for name in names[start:]:
+            if not name.startswith(prefix):
+                break
+            found.append(name)
+        return found
+
+
+def _move_file(source: Path, target: Path):
+    """Move a file, re-pointing relative symlinks (content store links) at their target"""
+    if source.is_symlink():
+        stored = os.path.realpath(source)
+        os.symlink(os.path.relpath(stored, target.parent), target)
+        os.remove(source)
+    else:
+        shutil.move(str(source), str(target))
+
+
+def migrate_layout(db: TikTokDatabase, layout: OutputLayout, id_filenames: bool = False,
+                   dry_run: bool = False, batch_size: int = 1000,
+                   progress: Callable[[Dict], None] = None) -> Dict:
+    """
+    Move archived videos (and their .info.json and thumbnails) into a layout
+
+    Each source directory is listed once, and file_path is updated in the
+    database one batch at a time, so the migration can be interrupted and
+    re-run: videos already in place are left alone. Only videos with a
+    recorded file_path can be moved; the others (evicted files, rows written
+    before the downloader stored paths) are counted in 'no_file'.
+
+    Args:
+        db: Archive database
+        layout: Target layout
+        id_filenames: Also rename files to '<video id>.<ext>'
+        dry_run: Only count what would be moved
+        batch_size: Videos per database transaction
+        progress: Called with the running counters after each batch
+
+    Returns:
+        Dict: Counters (videos, moved, files, missing, no_file, errors)
+    """
+    stats = {'videos': 0, 'moved': 0, 'files': 0, 'missing': 0, 'no_file': 0, 'errors': 0}
+    listing = _DirectoryListing()
+    source_dirs = set()
+    columns = ['video_id', 'file_path', 'creator_username', 'upload_date']
+
+    for batch in db.iter_video_batches(columns, batch_size=batch_size):
+        updates = []
+        for video_id, file_path, creator, upload_date in batch:
+            stats['videos'] += 1
+            if not file_path:
+                stats['no_file'] += 1
+                continue
+
+            source = Path(file_path)
+            if not os.path.lexists(source):
+                stats['missing'] += 1
+                continue
+
+            target_dir = layout.root / layout.relative_dir(video_id, creator, upload_date)
+            target_stem = video_id if id_filenames else source.stem
+            target = target_dir / f"{target_stem}{source.suffix}"
+            if target == source:
+                continue
+            if os.path.lexists(target):
+                logging.warning(f"Not moving {source}: {target} already exists")
+                stats['errors'] += 1
+                continue
+
+            if dry_run:
+                stats['moved'] += 1
+                continue
+
+            try:
+                target_dir.mkdir(parents=True, exist_ok=True)
+                for name in listing.siblings(source):
+                    sibling_target = target_dir / f"{target_stem}{name[len(source.stem):]}"
+                    if os.path.lexists(sibling_target):
+                        logging.warning(f"Not overwriting {sibling_target}")
+                        continue
+                    _move_file(source.parent / name, sibling_target)
+                    stats['files'] += 1
+            except OSError as e:
+                logging.error(f"Error moving {source}: {str(e)}")
+                stats['errors'] += 1
+                continue
+
+            source_dirs.add(source.parent)
+            updates.append((str(target), video_id))
+            stats['moved'] += 1
+
+        if updates and not db.update_file_paths(updates):
+            stats['errors'] += len(updates)
+
+        if progress:
+            progress(stats)
+
+    # Remove directories left empty by the migration (never the root itself)
+    for directory in sorted(source_dirs, key=lambda path: len(path.parts), reverse=True):
+        while directory != layout.root and layout.root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                break
+            directory = directory.parent
+
+    return stats
+
+
+def layout_from_config(config, root: Path) -> OutputLayout:
+    """
+    Build the layout configured in [output]
+
+    'layout' wins; otherwise organize_by_creator = true selects the creator layout.
+
+    Args:
+        config: Loaded configuration (see config.load_config)
+        root: Base directory (outputs/videos)
+
+    Returns:
+        OutputLayout: Configured layout
+    """
+    layout = config.get('output', 'layout', fallback='').strip().lower()
+    if not layout:
+        layout = CREATOR if config.getboolean('output', 'organize_by_creator', fallback=False) else FLAT
+    return OutputLayout(root, layout)
+
+
+def filename_template_from_config(config) -> str:
+    """[output] filename_template, or the short ID template if id_filenames is set"""
+    if config.getboolean('output', 'id_filenames', fallback=False):
+        return ID_FILENAME_TEMPLATE
+    return config.get('output', 'filename_template', fallback=DEFAULT_FILENAME_TEMPLATE)
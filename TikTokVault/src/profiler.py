@@ -0,0 +1,219 @@
+"""
+TikTok Session Profiler
+cProfile of a whole run (main and worker threads) plus an optional stack sampler
+writing collapsed stacks for flame graphs
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Command-line options (accepted by the downloader and the db viewer)
+PROFILE_OPTION = '--profile'
+SAMPLER_OPTION = '--profile-sampler'
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+
+# Functions shown in the summary
+TOP_FUNCTIONS = 15
+
+
+def pop_profile_options(args: List[str]) -> Tuple[bool, bool]:
+    """
+    Remove the profiling options from a command line
+
+    Args:
+        args: Arguments (modified in place)
+
+    Returns:
+        Tuple[bool, bool]: Whether to profile, and whether to also run the stack sampler
+    """
+    sampler = SAMPLER_OPTION in args
+    profile = sampler or PROFILE_OPTION in args
+    args[:] = [arg for arg in args if arg not in (PROFILE_OPTION, SAMPLER_OPTION)]
+    return profile, sampler
+
+
+class StackSampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        """
+        Sample the call stack of every thread at a fixed interval
+
+        Unlike cProfile it adds no per-call overhead, so wall time spent
+        waiting on the network or on locks shows up in proportion.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples = 0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path: Path):
+        """
+        Write the samples as collapsed stacks ('thread;outer;...;inner count' per line)
+
+        The format is read by flamegraph.pl, speedscope and inferno.
+
+        Args:
+            path: Output file
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self._stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class SessionProfiler:
+    def __init__(self, sampler: bool = False, sample_interval: float = SAMPLE_INTERVAL):
+        """
+        Profile a run with cProfile, including threads started while it is active
+
+        cProfile only sees the thread that enables it, so every new thread
+        (download workers, the batch writer) enables its own profiler on its
+        first call and all of them are merged when saving. On Python 3.12+
+        only one profiler can be active per process: worker threads are then
+        left out of the pstats and only the sampler sees them.
+
+        Args:
+            sampler: Also run the stack sampler
+            sample_interval: Seconds between stack samples
+        """
+        self.sampler = StackSampler(sample_interval) if sampler else None
+        self._profile = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._thread_warning = False
+        self.started = None
+        self.elapsed = 0.0
+
+    def __enter__(self) -> 'SessionProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        # The sampler thread starts first so it is not profiled itself
+        if self.sampler is not None:
+            self.sampler.start()
+        threading.setprofile(self._enable_in_thread)
+        self.started = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self.elapsed = time.perf_counter() - self.started
+        threading.setprofile(None)
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def _enable_in_thread(self, frame, event, arg):
+        """Profile hook run once by each new thread: swaps itself for a cProfile profiler"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            sys.setprofile(None)
+            if not self._thread_warning:
+                self._thread_warning = True
+                logging.warning(f"Worker threads are not profiled: {str(e)}")
+            return
+        with self._lock:
+            self._thread_profiles.append(profile)
+
+    def stats(self) -> pstats.Stats:
+        """Merged statistics of all profiled threads"""
+        with self._lock:
+            profiles = list(self._thread_profiles)
+        stats = pstats.Stats(self._profile)
+        for profile in profiles:
+            stats.add(profile)
+        return stats
+
+    def save(self, directory: Path, name: str) -> List[Path]:
+        """
+        Write <name>_<timestamp>.pstats (and .collapsed with the sampler)
+
+        Args:
+            directory: Output directory (outputs/logs)
+            name: File name prefix
+
+        Returns:
+            List[Path]: Files written
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        base = directory / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        pstats_file = base.with_suffix('.pstats')
+        self.stats().dump_stats(pstats_file)
+        written = [pstats_file]
+
+        if self.sampler is not None:
+            collapsed_file = base.with_suffix('.collapsed')
+            self.sampler.write_collapsed(collapsed_file)
+            written.append(collapsed_file)
+        return written
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+        """
+        Functions with the most own time (excluding callees)
+
+        Args:
+            limit: Number of functions
+
+        Returns:
+            List[Dict]: function ('file:line(name)'), calls, own and cumulative seconds
+        """
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in self.stats().stats.items():
+            label = function if filename == '~' else f"{os.path.basename(filename)}:{line}({function})"
+            rows.append({'function': label, 'calls': calls, 'own': own, 'cumulative': cumulative})
+        rows.sort(key=lambda row: row['own'], reverse=True)
+        return rows[:limit]
+
+    def summary_lines(self, limit: int = TOP_FUNCTIONS) -> List[str]:
+        """Table of the top functions, ready to print"""
+        lines = [f"{'own s':>8} {'cum s':>8} {'calls':>9}  function"]
+        for row in self.top_functions(limit):
+            lines.append(f"{row['own']:8.3f} {row['cumulative']:8.3f} {row['calls']:9d}  {row['function']}")
+        return lines
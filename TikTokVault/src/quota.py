@@ -0,0 +1,299 @@
+"""
+TikTok Disk Quota
+Storage budgets for the archive, least-recently-accessed eviction and free-space checks
+"""
+
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from content_store import object_path
+from database import TikTokDatabase
+
+GB = 1024 ** 3
+
+
+class DiskQuota:
+    def __init__(self, db: TikTokDatabase, videos_dir: Path, max_vault_bytes: int = 0,
+                 max_creator_bytes: int = 0, min_free_bytes: int = 0, check_interval: float = 30.0,
+                 store_root: Path = None):
+        """
+        Initialize the quota manager
+
+        Usage is read from the database once (file_size of videos that still
+        have a file) and then tracked in memory as videos are downloaded and
+        evicted, so enforcing the budgets costs no query per download. Videos
+        linked to the same content-store object share one file: it counts
+        once for the vault and once per creator.
+
+        Args:
+            db: Archive database
+            videos_dir: Directory holding the videos (its filesystem is checked for free space)
+            max_vault_bytes: Budget for all videos (0: unlimited)
+            max_creator_bytes: Budget for each creator's videos (0: unlimited)
+            min_free_bytes: Free space below which downloads pause (0: never)
+            check_interval: Seconds between free-space checks while paused
+            store_root: Content-addressed store, whose objects are deleted with their last video
+        """
+        self.db = db
+        self.videos_dir = Path(videos_dir)
+        self.max_vault_bytes = max(0, max_vault_bytes)
+        self.max_creator_bytes = max(0, max_creator_bytes)
+        self.min_free_bytes = max(0, min_free_bytes)
+        self.check_interval = check_interval
+        self.store_root = Path(store_root) if store_root else None
+
+        # Eviction and usage updates come from several download workers
+        self._lock = threading.Lock()
+        self._usage = None
+        self._vault_usage = 0
+
+        # Videos evicted and disk space released since the manager was created
+        self.evicted = 0
+        self.freed_bytes = 0
+
+        # Videos whose eviction failed (e.g. file in use); not retried by this manager
+        self._failed = set()
+
+    @classmethod
+    def from_config(cls, db: TikTokDatabase, videos_dir: Path, config, store_root: Path = None) -> 'DiskQuota':
+        """
+        Build the manager from the [storage] section of the configuration
+
+        Args:
+            db: Archive database
+            videos_dir: Directory holding the videos
+            config: Loaded configuration (see config.load_config)
+            store_root: Content-addressed store directory
+
+        Returns:
+            DiskQuota: Configured manager
+        """
+        return cls(
+            db, videos_dir,
+            max_vault_bytes=int(config.getfloat('storage', 'max_vault_gb', fallback=0) * GB),
+            max_creator_bytes=int(config.getfloat('storage', 'max_creator_gb', fallback=0) * GB),
+            min_free_bytes=int(config.getfloat('storage', 'min_free_gb', fallback=0) * GB),
+            check_interval=config.getfloat('storage', 'free_space_check_seconds', fallback=30),
+            store_root=store_root)
+
+    @property
+    def has_budget(self) -> bool:
+        """Whether a vault or creator budget is configured"""
+        return bool(self.max_vault_bytes or self.max_creator_bytes)
+
+    def _load_usage(self) -> Dict:
+        """Bytes used per creator (and by the vault), read from the database on first use"""
+        if self._usage is None:
+            self._usage = self.db.get_storage_usage()
+            self._vault_usage = self.db.get_vault_usage()
+        return self._usage
+
+    def usage(self, creator: str = None) -> int:
+        """
+        Bytes currently used
+
+        Args:
+            creator: Creator username (None for the whole vault)
+
+        Returns:
+            int: Bytes used by videos that still have a file
+        """
+        with self._lock:
+            usage = self._load_usage()
+            if creator is None:
+                return self._vault_usage
+            return usage.get(creator, 0)
+
+    def creators_over_budget(self) -> List[Tuple[str, int]]:
+        """
+        Creators using more than the creator budget
+
+        Returns:
+            List[Tuple[str, int]]: (creator, bytes used), largest first
+        """
+        if not self.max_creator_bytes:
+            return []
+        with self._lock:
+            over = [(creator, size) for creator, size in self._load_usage().items()
+                    if size > self.max_creator_bytes]
+        return sorted(over, key=lambda item: item[1], reverse=True)
+
+    def free_bytes(self) -> int:
+        """Free space on the videos filesystem"""
+        return shutil.disk_usage(self.videos_dir).free
+
+    def has_free_space(self) -> bool:
+        """False when free space is below min_free_bytes (downloads should pause)"""
+        return not self.min_free_bytes or self.free_bytes() >= self.min_free_bytes
+
+    def record(self, creator: str, size: int, video_id: str = None, content_hash: str = None,
+               duplicate: bool = False):
+        """
+        Account for a downloaded video
+
+        A duplicate payload is linked to an object already in the content
+        store and takes no new space: the vault usage doesn't change, and the
+        creator's only grows if none of its videos links that object yet.
+
+        Args:
+            creator: Creator username
+            size: File size in bytes
+            video_id: TikTok video ID
+            content_hash: SHA-256 of the payload (content store only)
+            duplicate: Whether the payload was already stored
+        """
+        if not self.has_budget:
+            return
+        new_for_creator = True
+        if duplicate and content_hash:
+            # The creator's other links may still be queued in the batch writer
+            self.db.flush_writes()
+            new_for_creator = not self.db.count_videos_with_hash(content_hash, video_id, creator)
+        with self._lock:
+            usage = self._load_usage()
+            if not duplicate:
+                self._vault_usage += size or 0
+            if new_for_creator:
+                usage[creator] = usage.get(creator, 0) + (size or 0)
+
+    def make_room(self, creator: str, incoming: int = 0) -> int:
+        """
+        Evict videos until the budgets leave room for a new download
+
+        The creator's own videos are evicted to honour the creator budget;
+        any videos are evicted to honour the vault budget. Videos with the
+        lowest priority go first, then the least recently accessed.
+
+        Called again with incoming=0 once a download is recorded: the
+        expected size is only an estimate and other workers may have added
+        files meanwhile, so this brings usage back within the budgets.
+
+        Args:
+            creator: Creator of the video about to be downloaded
+            incoming: Expected size of that video in bytes (0 if unknown)
+
+        Returns:
+            int: Number of videos evicted
+        """
+        if not self.has_budget:
+            return 0
+
+        evicted = 0
+        with self._lock:
+            usage = self._load_usage()
+            if self.max_creator_bytes and creator:
+                evicted += self._evict_until(
+                    lambda: usage.get(creator, 0) + incoming <= self.max_creator_bytes, creator)
+            if self.max_vault_bytes:
+                evicted += self._evict_until(
+                    lambda: self._vault_usage + incoming <= self.max_vault_bytes)
+        return evicted
+
+    def enforce(self) -> int:
+        """
+        Bring every creator and the vault back within budget (e.g. after lowering them)
+
+        Returns:
+            int: Number of videos evicted
+        """
+        if not self.has_budget:
+            return 0
+
+        evicted = 0
+        with self._lock:
+            usage = self._load_usage()
+            if self.max_creator_bytes:
+                for creator in [name for name, size in usage.items() if size > self.max_creator_bytes]:
+                    evicted += self._evict_until(
+                        lambda: usage.get(creator, 0) <= self.max_creator_bytes, creator)
+            if self.max_vault_bytes:
+                evicted += self._evict_until(lambda: self._vault_usage <= self.max_vault_bytes)
+        return evicted
+
+    def _evict_until(self, within_budget, creator: str = None) -> int:
+        """
+        Evict candidates (of one creator, or any) until within_budget() holds; caller holds the lock
+
+        Videos that fail to evict keep their file_path, so they are excluded
+        from later queries; a pass that evicts nothing ends the loop.
+        """
+        evicted = 0
+        flushed = False
+        while not within_budget():
+            candidates = self.db.get_eviction_candidates(creator, limit=100, exclude=self._failed)
+            if not candidates and not flushed:
+                # Recent downloads may still be queued in the batch writer
+                self.db.flush_writes()
+                flushed = True
+                continue
+            if not candidates:
+                logging.warning(f"Storage budget exceeded but nothing left to evict"
+                                f"{f' for @{creator}' if creator else ''}")
+                break
+
+            evicted_in_pass = 0
+            for video in candidates:
+                if within_budget():
+                    break
+                if video.get('content_hash') and not flushed:
+                    # Other links to the same object may still be queued in the batch writer
+                    self.db.flush_writes()
+                    flushed = True
+                if self._evict(video):
+                    evicted_in_pass += 1
+                else:
+                    self._failed.add(video['video_id'])
+            evicted += evicted_in_pass
+
+            if not evicted_in_pass and not within_budget():
+                logging.warning(f"Storage budget exceeded: no video could be evicted in this pass"
+                                f"{f' for @{creator}' if creator else ''}")
+                break
+        return evicted
+
+    def _evict(self, video: Dict) -> bool:
+        """
+        Delete a video file and keep its database row (file_path cleared, evicted_at set)
+
+        The .info.json sidecar is kept. A content-store object is deleted with
+        its last link; only then is its size freed (and taken off the vault
+        usage). The creator's usage drops when it loses its last link.
+        """
+        path = Path(video['file_path'])
+        content_hash = video.get('content_hash')
+        creator = video.get('creator_username')
+        # Other videos linking the same payload keep it on disk
+        shared = bool(content_hash) and self.db.count_videos_with_hash(content_hash, video['video_id']) > 0
+        stored = self._stored_object(path, content_hash)
+        try:
+            if os.path.lexists(path):
+                os.remove(path)
+            if stored is not None and not shared:
+                os.remove(stored)
+        except OSError as e:
+            logging.error(f"Error evicting {path}: {str(e)}")
+            return False
+
+        if not self.db.mark_evicted(video['video_id']):
+            return False
+
+        size = video.get('file_size') or 0
+        if not shared or not self.db.count_videos_with_hash(content_hash, video['video_id'], creator):
+            self._usage[creator] = max(0, self._usage.get(creator, 0) - size)
+        if not shared:
+            self._vault_usage = max(0, self._vault_usage - size)
+            self.freed_bytes += size
+        self.evicted += 1
+        logging.info(f"Evicted {video['video_id']} ({path}) to stay within the storage budget")
+        return True
+
+    def _stored_object(self, path: Path, content_hash: Optional[str]) -> Optional[Path]:
+        """Content-store object holding a video's payload, if any"""
+        if not content_hash or self.store_root is None:
+            return None
+        stored = object_path(self.store_root, content_hash, path.suffix)
+        return stored if stored.exists() else None
@@ -0,0 +1,151 @@
+"""
+TikTok Download Retry Policy
+Classifies yt-dlp errors and computes exponential backoff delays with jitter
+"""
+
+import random
+import re
+
+# Error classes
+RATE_LIMITED = 'rate_limited'
+NETWORK = 'network'
+UNAVAILABLE = 'unavailable'   # removed, private or deleted videos
+GEO_BLOCKED = 'geo_blocked'
+DISK_FULL = 'disk_full'       # local disk, not the video: requeued once space is freed
+UNKNOWN = 'unknown'
+
+# Error classes worth retrying; the others fail the same way every time
+TRANSIENT_ERRORS = (RATE_LIMITED, NETWORK)
+
+# Message patterns checked in order (first match wins)
+ERROR_PATTERNS = [
+    (DISK_FULL, re.compile(r'no space left|disk (?:is )?full|\[errno 28\]|enospc|disk quota exceeded', re.IGNORECASE)),
+    (RATE_LIMITED, re.compile(r'\b429\b|too many requests|rate.?limit', re.IGNORECASE)),
+    # Server-side hiccups must be matched before the generic "unavailable" pattern
+    (NETWORK, re.compile(r'\b50[0234]\b|service unavailable|temporarily unavailable', re.IGNORECASE)),
+    (GEO_BLOCKED, re.compile(r'geo.?restrict|geo.?block|not available in your (?:country|region)', re.IGNORECASE)),
+    # "not found" / "does not exist" only count when they refer to the video or page:
+    # local errors ("ffmpeg not found", "file not found") must not be cached as unavailable
+    (UNAVAILABLE, re.compile(r'\b404\b|\b410\b|private|removed|deleted|unavailable|no longer available|'
+                             r'(?:video|post|page|user|account) (?:was |is )?not found|'
+                             r'(?:video|post|page|user|account) does not exist', re.IGNORECASE)),
+    (NETWORK, re.compile(r'timed? ?out|connection|network|reset by peer|temporary failure|name resolution|'
+                         r'ssl|incomplete ?read', re.IGNORECASE)),
+]
+
+# How long a URL whose download finally failed is skipped on future runs
+# (seconds), by error class: removed/private videos practically never come back
+FAILURE_COOLDOWNS = {
+    UNAVAILABLE: 30 * 24 * 3600,
+    GEO_BLOCKED: 7 * 24 * 3600,
+    RATE_LIMITED: 3600,
+    NETWORK: 3600,
+    UNKNOWN: 24 * 3600,
+}
+
+# Exception types that always mean a network problem
+NETWORK_EXCEPTIONS = ('TimeoutError', 'timeout', 'ConnectionError', 'ConnectionResetError',
+                      'ConnectionRefusedError', 'URLError', 'IncompleteRead', 'TransportError')
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify a download error
+
+    The exception chain is inspected (yt-dlp wraps the original error in
+    DownloadError) and its messages are matched against known patterns.
+
+    Args:
+        error: Exception raised while extracting or downloading
+
+    Returns:
+        str: One of RATE_LIMITED, NETWORK, UNAVAILABLE, GEO_BLOCKED, DISK_FULL or UNKNOWN
+    """
+    messages = []
+    current = error
+    while current is not None and len(messages) < 5:
+        if type(current).__name__ in NETWORK_EXCEPTIONS:
+            return NETWORK
+        messages.append(str(current))
+
+        # yt-dlp keeps the original exception in exc_info
+        exc_info = getattr(current, 'exc_info', None)
+        cause = exc_info[1] if exc_info and len(exc_info) > 1 else None
+        current = cause or current.__cause__ or current.__context__
+
+    return classify_message(' '.join(messages))
+
+
+def classify_message(text: str) -> str:
+    """
+    Classify an error message (e.g. one stored in the database)
+
+    Args:
+        text: Error message
+
+    Returns:
+        str: One of RATE_LIMITED, NETWORK, UNAVAILABLE, GEO_BLOCKED, DISK_FULL or UNKNOWN
+    """
+    for error_class, pattern in ERROR_PATTERNS:
+        if pattern.search(text or ''):
+            return error_class
+    return UNKNOWN
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, base_delay: float = 2.0, max_delay: float = 120.0,
+                 rate_limit_delay: float = 30.0):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_retries: Maximum number of retries per URL (0 disables retries)
+            base_delay: Base backoff delay in seconds for network errors
+            max_delay: Upper bound for any single delay in seconds
+            rate_limit_delay: Base backoff delay in seconds when rate limited
+        """
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limit_delay = rate_limit_delay
+
+    def should_retry(self, error_class: str, attempts: int) -> bool:
+        """
+        Decide whether a failed URL gets another attempt
+
+        Args:
+            error_class: Result of classify_error()
+            attempts: Number of attempts made so far (including the failed one)
+
+        Returns:
+            bool: True if the URL should be retried
+        """
+        return error_class in TRANSIENT_ERRORS and attempts <= self.max_retries
+
+    def next_delay(self, error_class: str, attempts: int) -> float:
+        """
+        Backoff delay before the next attempt (exponential backoff with "equal jitter")
+
+        Args:
+            error_class: Result of classify_error()
+            attempts: Number of attempts made so far
+
+        Returns:
+            float: Delay in seconds
+        """
+        base = self.rate_limit_delay if error_class == RATE_LIMITED else self.base_delay
+        cap = min(self.max_delay, base * (2 ** (attempts - 1)))
+        # Jitter spreads retries out so workers don't hit the server in lockstep
+        return random.uniform(cap / 2, cap)
+
+    def failure_cooldown(self, error_class: str) -> float:
+        """
+        Time a finally failed URL is skipped on future runs (negative cache)
+
+        Args:
+            error_class: Result of classify_error()
+
+        Returns:
+            float: Cooldown in seconds
+        """
+        return FAILURE_COOLDOWNS.get(error_class, FAILURE_COOLDOWNS[UNKNOWN])
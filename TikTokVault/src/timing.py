@@ -0,0 +1,171 @@
+"""
+TikTok Pipeline Timing
+Per-URL stage timings aggregated into percentiles, exported as JSON and Prometheus text
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+# Pipeline stages, in order
+EXTRACT = 'extract'            # Metadata extraction (or info cache lookup)
+DOWNLOAD = 'download'          # Byte transfer of the media file
+POST_PROCESS = 'post_process'  # Format selection, thumbnail/.info.json writing, post-processors, hashing
+DB_WRITE = 'db_write'          # Video record write
+LOG_WRITE = 'log_write'        # Session journal / failure log write
+STAGES = (EXTRACT, DOWNLOAD, POST_PROCESS, DB_WRITE, LOG_WRITE)
+
+# Reported percentiles
+PERCENTILES = (50, 90, 95, 99)
+
+# Metric name prefix in the Prometheus text file
+METRIC_PREFIX = 'tiktokvault'
+
+
+def percentile(sorted_values, p: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values
+
+    Args:
+        sorted_values: Values in ascending order (not empty)
+        p: Percentile (0-100)
+
+    Returns:
+        float: The value below which p% of the values fall
+    """
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class StageTimer:
+    def __init__(self):
+        """
+        Collect stage durations for one download session
+
+        Samples are kept as compact float arrays (8 bytes each) so exact
+        percentiles can be computed at the end; recording a span costs two
+        perf_counter() calls and an append.
+        """
+        self._samples = {stage: array('d') for stage in STAGES}
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self._started_monotonic = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """
+        Time a block of code as one sample of a stage (also when it raises)
+
+        Args:
+            stage: One of STAGES
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        """
+        Add a sample
+
+        Args:
+            stage: One of STAGES
+            seconds: Duration
+        """
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    @property
+    def elapsed(self) -> float:
+        """Wall-clock seconds since the timer was created"""
+        return time.perf_counter() - self._started_monotonic
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Aggregate the samples of each stage
+
+        Returns:
+            Dict[str, Dict]: stage -> count, total, mean, max and p50/p90/p95/p99 (seconds)
+        """
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+
+        summary = {}
+        for stage, values in samples.items():
+            if not values:
+                summary[stage] = {'count': 0, 'total': 0.0}
+                continue
+            total = math.fsum(values)
+            summary[stage] = {
+                'count': len(values),
+                'total': round(total, 6),
+                'mean': round(total / len(values), 6),
+                **{f'p{p}': round(percentile(values, p), 6) for p in PERCENTILES},
+                'max': round(values[-1], 6),
+            }
+        return summary
+
+    def write_json(self, path: Path, extra: Dict = None) -> Dict:
+        """
+        Write the session report as JSON
+
+        Args:
+            path: Output file
+            extra: Additional top-level fields (session id, counters...)
+
+        Returns:
+            Dict: The report written
+        """
+        report = {
+            'started': self.started,
+            'wall_seconds': round(self.elapsed, 3),
+            **(extra or {}),
+            'stages': self.summary(),
+        }
+        _atomic_write(path, json.dumps(report, indent=2))
+        return report
+
+    def write_prometheus(self, path: Path, gauges: Dict[str, float] = None):
+        """
+        Write the stage timings in Prometheus text format (node_exporter textfile collector)
+
+        The file is replaced atomically so the collector never reads a partial file.
+
+        Args:
+            path: Output .prom file
+            gauges: Extra session gauges, metric name suffix -> value
+        """
+        name = f'{METRIC_PREFIX}_stage_duration_seconds'
+        lines = [
+            f'# HELP {name} Time spent per URL in each download pipeline stage during the last session.',
+            f'# TYPE {name} summary',
+        ]
+        for stage, stats in self.summary().items():
+            for p in PERCENTILES:
+                if stats['count']:
+                    lines.append(f'{name}{{stage="{stage}",quantile="{p / 100:g}"}} {stats[f"p{p}"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["total"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+
+        for suffix, value in (gauges or {}).items():
+            lines.append(f'# TYPE {METRIC_PREFIX}_{suffix} gauge')
+            lines.append(f'{METRIC_PREFIX}_{suffix} {value}')
+
+        _atomic_write(path, '\n'.join(lines) + '\n')
+
+
+def _atomic_write(path: Path, text: str):
+    """Write a file through a temporary file and rename"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f'.{path.name}.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(temp_path, path)
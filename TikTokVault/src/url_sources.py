@@ -0,0 +1,131 @@
+"""
+TikTok URL Sources
+Streaming readers for URL input files (.txt, .csv, .jsonl) and stdin
+"""
+
+import csv
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Iterator, List, TextIO, Tuple
+
+# A TikTok URL (scheme optional), with no whitespace
+TIKTOK_URL_PATTERN = re.compile(r'^(?:https?://)?(?:[\w-]+\.)*tiktok\.com/\S*$', re.IGNORECASE)
+
+# Input formats recognized by file extension
+SUPPORTED_EXTENSIONS = ('.txt', '.csv', '.jsonl')
+
+# Column / key names that may hold the URL in CSV and JSONL inputs
+URL_FIELDS = ('url', 'URL', 'link', 'video_url', 'webpage_url')
+
+
+class IngestStats:
+    def __init__(self, max_samples: int = 5):
+        """
+        Aggregated counters for an ingestion run
+
+        Args:
+            max_samples: Number of invalid lines kept as examples
+        """
+        self.lines = 0
+        self.valid = 0
+        self.invalid = 0
+        self.max_samples = max_samples
+        self.invalid_samples: List[Tuple[int, str]] = []
+
+    def record_invalid(self, line_num: int, value: str):
+        """Count an invalid line, keeping the first few as examples"""
+        self.invalid += 1
+        if len(self.invalid_samples) < self.max_samples:
+            self.invalid_samples.append((line_num, value[:100]))
+
+
+def _iter_txt(file: TextIO) -> Iterator[Tuple[int, str]]:
+    """Yield (line number, candidate) for plain text input, skipping blanks and # comments"""
+    for line_num, line in enumerate(file, 1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line_num, line
+
+
+def _iter_csv(file: TextIO) -> Iterator[Tuple[int, str]]:
+    """Yield (row number, candidate) from the URL column of a CSV file (first column if no header)"""
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    column = next((i for i, name in enumerate(header) if name.strip() in URL_FIELDS), None)
+    if column is None:
+        # No recognizable header: the first row is data and the first column holds the URL
+        column = 0
+        if header and header[0].strip():
+            yield 1, header[0].strip()
+
+    for row_num, row in enumerate(reader, 2):
+        if len(row) > column and row[column].strip():
+            yield row_num, row[column].strip()
+
+
+def _iter_jsonl(file: TextIO) -> Iterator[Tuple[int, str]]:
+    """Yield (line number, candidate) from JSON Lines input (objects with a URL key, or bare strings)"""
+    for line_num, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield line_num, line
+            continue
+
+        if isinstance(record, str):
+            yield line_num, record.strip()
+        elif isinstance(record, dict):
+            yield line_num, next((str(record[key]).strip() for key in URL_FIELDS if record.get(key)), line)
+        else:
+            yield line_num, line
+
+
+def iter_urls(source, stats: IngestStats = None) -> Iterator[str]:
+    """
+    Stream valid TikTok URLs from a file or stdin
+
+    The format is chosen from the file extension (.csv, .jsonl, anything else is
+    plain text); '-' reads plain text from stdin. Lines are validated with a
+    compiled pattern and invalid ones are only counted in `stats`.
+
+    Args:
+        source: Path to the input file, or '-' for stdin
+        stats: IngestStats updated while iterating (optional)
+
+    Yields:
+        str: Valid TikTok URL
+    """
+    stats = stats if stats is not None else IngestStats()
+
+    if str(source) == '-':
+        candidates = _iter_txt(sys.stdin)
+        yield from _validate(candidates, stats)
+        return
+
+    path = Path(source)
+    suffix = path.suffix.lower()
+    reader = _iter_csv if suffix == '.csv' else _iter_jsonl if suffix == '.jsonl' else _iter_txt
+
+    # newline='' is required by the csv module and harmless for the others
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        yield from _validate(reader(file), stats)
+
+
+def _validate(candidates: Iterator[Tuple[int, str]], stats: IngestStats) -> Iterator[str]:
+    """Filter candidates through the URL pattern, updating stats"""
+    match = TIKTOK_URL_PATTERN.match
+    for line_num, value in candidates:
+        stats.lines += 1
+        if match(value):
+            stats.valid += 1
+            yield value
+        else:
+            stats.record_invalid(line_num, value)
@@ -0,0 +1,194 @@
+"""
+TikTok URL Utilities
+Helpers for extracting video identifiers from TikTok URLs, canonicalizing them
+and resolving short links
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+# Matches the numeric id in URLs like https://www.tiktok.com/@user/video/7418920193847251205
+# (also /v/<id>.html mobile links and /embed/<id>)
+VIDEO_ID_PATTERN = re.compile(r'/(?:video|v|embed(?:/v2)?)/(\d{8,})')
+
+# Short links that redirect to the full video URL
+SHORT_LINK_PATTERN = re.compile(r'^https?://(?:vm|vt)\.tiktok\.com/\w+|^https?://(?:www\.)?tiktok\.com/t/\w+',
+                                re.IGNORECASE)
+
+# Browser-like user agent; TikTok rejects the default urllib one
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    Extract the numeric TikTok video ID from a URL
+
+    Args:
+        url: TikTok URL
+
+    Returns:
+        str or None: Video ID, or None if the URL doesn't contain one (e.g. short links)
+    """
+    match = VIDEO_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def is_short_link(url: str) -> bool:
+    """Check whether a URL is a vm./vt.tiktok.com or tiktok.com/t/ short link"""
+    return SHORT_LINK_PATTERN.match(url) is not None
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Build the canonical form of a TikTok URL
+
+    Query strings (?is_from_webapp=1&sender_device=pc...), fragments, mobile
+    hosts and the creator handle are dropped, so every variant of the same video
+    (@user/video/<id>, m.tiktok.com/v/<id>.html, /embed/v2/<id>...) maps to
+    https://www.tiktok.com/@_/video/<id>. URLs without a video ID are only
+    normalized (scheme, host and trailing slash).
+
+    Args:
+        url: TikTok URL
+
+    Returns:
+        str: Canonical URL
+    """
+    url = url.strip()
+    video_id = extract_video_id(url)
+
+    if video_id:
+        # The handle is not part of the video's identity (it changes with the
+        # user's capitalization and with renames); yt-dlp builds the same
+        # placeholder URL when it doesn't know the creator
+        return f"https://www.tiktok.com/@_/video/{video_id}"
+
+    parts = urlsplit(url if '://' in url else f'https://{url}')
+    host = parts.netloc.lower()
+    if host in ('tiktok.com', 'm.tiktok.com'):
+        host = 'www.tiktok.com'
+    return f"https://{host}{parts.path.rstrip('/')}"
+
+
+def resolve_short_link(url: str, timeout: float = 30) -> str:
+    """
+    Follow the redirects of a short link to the full video URL
+
+    Args:
+        url: Short link
+        timeout: Connection timeout in seconds
+
+    Returns:
+        str: Final URL after redirects
+    """
+    # Imported here: urllib.request pulls in http.client, ssl and email, which
+    # every importer of this module (e.g. the db viewer) would otherwise pay for
+    import urllib.request
+
+    # HEAD avoids downloading the page body; urllib follows redirects for us
+    request = urllib.request.Request(url, method='HEAD', headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.geturl()
+
+
+class UrlCanonicalizer:
+    def __init__(self, db=None, workers: int = 8, timeout: float = 30, chunk_size: int = 200):
+        """
+        Initialize the canonicalizer
+
+        Args:
+            db: TikTokDatabase used as a persistent short link resolution cache (optional)
+            workers: Number of short links resolved concurrently
+            timeout: Connection timeout in seconds for short link resolution
+            chunk_size: Number of URLs canonicalized per batch
+        """
+        self.db = db
+        self.workers = workers
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+        # Counter for the last run
+        self.unresolved = 0
+
+    def _resolve_one(self, url: str) -> Optional[str]:
+        """Resolve a single short link, returning None on failure"""
+        try:
+            return resolve_short_link(url, self.timeout)
+        except Exception as e:
+            logging.warning(f"Could not resolve short link {url}: {str(e)}")
+            return None
+
+    def resolve_short_links(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        Resolve short links, using the database cache and resolving misses concurrently
+
+        Args:
+            urls: Short links to resolve
+
+        Returns:
+            Dict[str, str]: Mapping of short link to canonical URL (unresolvable links are omitted)
+        """
+        urls = list(dict.fromkeys(urls))
+        resolved = self.db.get_resolved_urls(urls) if self.db else {}
+
+        misses = [url for url in urls if url not in resolved]
+        if misses:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="resolve") as executor:
+                results = dict(zip(misses, executor.map(self._resolve_one, misses)))
+
+            new_entries = {url: canonicalize_url(final) for url, final in results.items() if final}
+            if self.db and new_entries:
+                self.db.save_resolved_urls(new_entries)
+            resolved.update(new_entries)
+
+        return resolved
+
+    def iter_canonical(self, urls: Iterable[str]) -> Iterator[str]:
+        """
+        Canonicalize URLs
+
+        URLs are processed in chunks so short links within a chunk are resolved
+        concurrently. Short links that can't be resolved are passed through
+        unchanged so yt-dlp can still try them.
+
+        Duplicates are not removed here: every variant of a video has the same
+        canonical URL, so the session journal (UNIQUE per session and URL)
+        collapses them without keeping every ID seen in memory.
+
+        Args:
+            urls: Raw URLs
+
+        Yields:
+            str: Canonical URLs, in input order
+        """
+        self.unresolved = 0
+
+        chunk = []
+        for url in urls:
+            chunk.append(url)
+            if len(chunk) >= self.chunk_size:
+                yield from self._canonicalize_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._canonicalize_chunk(chunk)
+
+    def _canonicalize_chunk(self, chunk) -> Iterator[str]:
+        """Canonicalize one chunk of URLs, updating the unresolved counter"""
+        short_links = [url for url in chunk if is_short_link(url)]
+        resolved = self.resolve_short_links(short_links) if short_links else {}
+
+        for url in chunk:
+            short = is_short_link(url)
+            if short:
+                # Unresolvable short links are kept as-is; cached resolutions
+                # may predate the current canonical form
+                canonical = canonicalize_url(resolved[url]) if url in resolved else url
+            else:
+                canonical = canonicalize_url(url)
+
+            if short and url not in resolved:
+                self.unresolved += 1
+            yield canonical
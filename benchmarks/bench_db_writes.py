@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""
+Database write benchmark
+Measures TikTokDatabase.add_video inserts/sec with direct writes vs the batch writer
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the src directory to Python path
+src_path = Path(__file__).parent.parent / "TikTokVault" / "src"
+sys.path.insert(0, str(src_path))
+
+from database import TikTokDatabase
+
+
+def make_video(index):
+    """Build a synthetic yt-dlp info dict"""
+    return {
+        'id': str(7000000000000000000 + index),
+        'webpage_url': f'https://www.tiktok.com/@creator{index % 100}/video/{7000000000000000000 + index}',
+        'title': f'Synthetic video {index} #fyp #benchmark',
+        'description': 'Benchmark description ' * 5,
+        'uploader': f'creator{index % 100}',
+        'duration': 15 + index % 45,
+        'view_count': index * 10,
+        'like_count': index,
+        'comment_count': index // 10,
+        'repost_count': index // 100,
+        'upload_date': '20240101',
+        '_filename': f'/tmp/videos/{index}.mp4',
+        'filesize': 1024 * 1024,
+        'format': '720p',
+        'tags': ['fyp', 'benchmark'],
+    }
+
+
+def run(count, batched):
+    """Insert `count` videos into a fresh database and return inserts/sec"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TikTokDatabase(Path(tmp) / "bench.db")
+        videos = [make_video(i) for i in range(count)]
+
+        if batched:
+            db.start_batch_writer()
+
+        start = time.perf_counter()
+        for video in videos:
+            db.add_video(video)
+        db.flush_writes()
+        elapsed = time.perf_counter() - start
+
+        db.close()
+        return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TikTokDatabase write throughput")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="number of videos to insert")
+    args = parser.parse_args()
+
+    direct = run(args.count, batched=False)
+    batched = run(args.count, batched=True)
+
+    print(f"Direct writes:  {direct:10.0f} inserts/sec")
+    print(f"Batch writer:   {batched:10.0f} inserts/sec")
+    print(f"Speedup:        {batched / direct:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
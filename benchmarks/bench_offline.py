@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+
+"""
+Offline downloader benchmark
+Runs TikTokDownloader.download_videos and the TikTokDatabase write/read paths against a
+local HTTP server at several concurrency levels, without touching TikTok
+
+A stand-in yt-dlp extractor claims tiktok.com video URLs and reads its metadata from
+synthetic pages served on localhost, so the real yt-dlp download, post-processing and
+database code paths are exercised end to end.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add the src directory to Python path
+src_path = Path(__file__).parent.parent / "TikTokVault" / "src"
+sys.path.insert(0, str(src_path))
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from database import TikTokDatabase
+from timing import percentile
+from TikTokDL import TikTokDownloader
+
+MB = 1024 * 1024
+
+# Bytes written per chunk of a synthetic mp4 payload
+CHUNK_SIZE = 64 * 1024
+
+# Synthetic video IDs start here (19 digits, like TikTok IDs)
+BASE_VIDEO_ID = 7100000000000000000
+
+
+# ============================================================================
+# Local server
+# ============================================================================
+
+class BenchHandler(BaseHTTPRequestHandler):
+    """Serves video pages, mp4 payloads and thumbnails; settings live on the server object"""
+
+    PAGE_PATTERN = re.compile(r'^/@(?P<uploader>[\w.-]+)/video/(?P<id>\d+)$')
+    MEDIA_PATTERN = re.compile(r'^/media/(?P<id>\d+)\.mp4$')
+    THUMB_PATTERN = re.compile(r'^/thumb/(?P<id>\d+)\.jpg$')
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        match = self.PAGE_PATTERN.match(self.path)
+        if match:
+            self._send(self._page(match.group('id'), match.group('uploader')), 'text/html; charset=utf-8')
+            return
+
+        match = self.MEDIA_PATTERN.match(self.path)
+        if match:
+            self._send_payload(match.group('id'))
+            return
+
+        if self.THUMB_PATTERN.match(self.path):
+            self._send(b'\xff\xd8\xff\xe0' + b'\0' * 1024, 'image/jpeg')
+            return
+
+        self.send_error(404)
+
+    def _page(self, video_id, uploader):
+        """HTML page embedding the video metadata as JSON, like TikTok's hydration data"""
+        index = int(video_id) - BASE_VIDEO_ID
+        data = {
+            'id': video_id,
+            'uploader': uploader,
+            'title': f'Synthetic video {index} #fyp #benchmark',
+            'description': 'Benchmark description ' * 5,
+            'duration': 15 + index % 45,
+            'view_count': index * 10,
+            'like_count': index,
+            'comment_count': index // 10,
+            'repost_count': index // 100,
+            'upload_date': '20240101',
+            'tags': ['fyp', 'benchmark'],
+            'size': self.server.payload_size,
+        }
+        return (f'<html><head><title>{data["title"]}</title></head><body>'
+                f'<script id="bench-data" type="application/json">{json.dumps(data)}</script>'
+                f'</body></html>').encode('utf-8')
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_payload(self, video_id):
+        """Stream payload_size bytes; the ID is written first so every video's content differs"""
+        size = self.server.payload_size
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+
+        head = video_id.encode('ascii')
+        chunk = b'\0' * CHUNK_SIZE
+        remaining = size
+        first = True
+        while remaining > 0:
+            block = (head + chunk)[:min(CHUNK_SIZE, remaining)] if first else chunk[:remaining]
+            self.wfile.write(block)
+            remaining -= len(block)
+            first = False
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve(payload_size, latency):
+    """
+    Run the local server in a background thread
+
+    Args:
+        payload_size: Bytes per mp4 payload
+        latency: Seconds added to every response
+
+    Yields:
+        str: Base URL of the server
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BenchHandler)
+    server.daemon_threads = True
+    server.payload_size = payload_size
+    server.latency = latency
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ============================================================================
+# Stand-in extractor and downloader
+# ============================================================================
+
+class BenchTikTokIE(InfoExtractor):
+    """Claims TikTok video URLs and extracts them from the local server"""
+
+    IE_NAME = 'benchtiktok'
+    _VALID_URL = r'https?://(?:www\.)?tiktok\.com/@(?P<uploader>[\w.-]*)/video/(?P<id>\d+)'
+
+    # Base URL of the local server, set before a run
+    server_url = None
+
+    def _real_extract(self, url):
+        uploader, video_id = self._match_valid_url(url).group('uploader', 'id')
+        webpage = self._download_webpage(f'{self.server_url}/@{uploader}/video/{video_id}', video_id)
+        data = self._parse_json(self._search_regex(
+            r'<script id="bench-data" type="application/json">(.+?)</script>', webpage, 'video data'), video_id)
+
+        return {
+            'id': video_id,
+            'title': data['title'],
+            'description': data['description'],
+            'uploader': data['uploader'],
+            'duration': data['duration'],
+            'view_count': data['view_count'],
+            'like_count': data['like_count'],
+            'comment_count': data['comment_count'],
+            'repost_count': data['repost_count'],
+            'upload_date': data['upload_date'],
+            'tags': data['tags'],
+            'webpage_url': url,
+            'formats': [{
+                'url': f'{self.server_url}/media/{video_id}.mp4',
+                'ext': 'mp4',
+                'format_id': '720p',
+                'height': 720,
+                'filesize': data['size'],
+            }],
+            'thumbnails': [{'url': f'{self.server_url}/thumb/{video_id}.jpg'}],
+        }
+
+
+class BenchDownloader(TikTokDownloader):
+    """TikTokDownloader whose yt-dlp instances only know the stand-in extractor"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self._latency_lock = threading.Lock()
+
+    def _create_ydl(self):
+        options = {**self.setup_ydl_options(), 'quiet': True, 'noprogress': True}
+        ydl = yt_dlp.YoutubeDL(options, auto_init=False)
+        ydl.add_info_extractor(BenchTikTokIE())
+        return ydl
+
+    def download_single_video(self, url):
+        start = time.perf_counter()
+        try:
+            return super().download_single_video(url)
+        finally:
+            with self._latency_lock:
+                self.latencies.append(time.perf_counter() - start)
+
+
+def make_urls(count):
+    """Synthetic TikTok video URLs spread over 100 creators"""
+    return [f'https://www.tiktok.com/@creator{index % 100}/video/{BASE_VIDEO_ID + index}'
+            for index in range(count)]
+
+
+def make_video(index, payload_size=MB):
+    """Build a synthetic yt-dlp info dict (as produced by a download)"""
+    video_id = str(BASE_VIDEO_ID + index)
+    return {
+        'id': video_id,
+        'webpage_url': f'https://www.tiktok.com/@creator{index % 100}/video/{video_id}',
+        'title': f'Synthetic video {index} #fyp #benchmark',
+        'description': 'Benchmark description ' * 5,
+        'uploader': f'creator{index % 100}',
+        'duration': 15 + index % 45,
+        'view_count': index * 10,
+        'like_count': index,
+        'comment_count': index // 10,
+        'repost_count': index // 100,
+        'upload_date': '20240101',
+        '_filename': f'/tmp/videos/{video_id}.mp4',
+        'filesize': payload_size,
+        'format': '720p',
+        'tags': ['fyp', 'benchmark'],
+    }
+
+
+def result(name, concurrency, count, elapsed, latencies, payload_bytes=0):
+    """One result row: throughput and latency percentiles"""
+    latencies = sorted(latencies)
+    return {
+        'benchmark': name,
+        'concurrency': concurrency,
+        'count': count,
+        'seconds': round(elapsed, 3),
+        'per_sec': round(count / elapsed, 1) if elapsed else 0.0,
+        'mb_per_sec': round(payload_bytes / MB / elapsed, 2) if elapsed and payload_bytes else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+    }
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+def bench_downloads(server_url, count, concurrency, payload_size):
+    """Download `count` videos with download_videos into a fresh vault"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = Path(tmp)
+        config_path = base_dir / "bench_config.ini"
+        config_path.write_text(
+            "[performance]\n"
+            f"concurrent_downloads = {concurrency}\n"
+            "retry_count = 0\n"
+            "[cache]\n"
+            "enable_info_cache = false\n",
+            encoding='utf-8')
+
+        BenchTikTokIE.server_url = server_url
+        downloader = BenchDownloader(base_dir=base_dir, config_path=config_path)
+        urls = make_urls(count)
+
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            start = time.perf_counter()
+            successful, failed = downloader.download_videos(urls, source_file="bench")
+            elapsed = time.perf_counter() - start
+
+        downloader.db.close()
+        if failed:
+            print(f"  warning: {len(failed)} downloads failed at concurrency {concurrency}", file=sys.stderr)
+        return result('download_videos', concurrency, len(successful), elapsed,
+                      downloader.latencies, len(successful) * payload_size)
+
+
+def _timed_calls(func, items, concurrency):
+    """Run func over items on `concurrency` threads; returns (elapsed, per-call latencies)"""
+    latencies = []
+
+    def call(item):
+        start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, items))
+    return time.perf_counter() - start, latencies
+
+
+def bench_database(count, concurrency, payload_size):
+    """Concurrent add_video (direct and batched) followed by concurrent reads"""
+    results = []
+    videos = [make_video(index, payload_size) for index in range(count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for batched in (False, True):
+            db = TikTokDatabase(Path(tmp) / f"bench_{int(batched)}.db")
+            if batched:
+                db.start_batch_writer()
+
+            def write(video):
+                db.add_video(video)
+
+            start = time.perf_counter()
+            _, latencies = _timed_calls(write, videos, concurrency)
+            db.flush_writes()
+            elapsed = time.perf_counter() - start
+
+            name = 'db_write_batched' if batched else 'db_write_direct'
+            results.append(result(name, concurrency, count, elapsed, latencies))
+            if batched:
+                db.stop_batch_writer()
+
+            if not batched:
+                video_ids = [video['id'] for video in videos]
+                elapsed, latencies = _timed_calls(db.get_video_by_id, video_ids, concurrency)
+                results.append(result('db_read_by_id', concurrency, count, elapsed, latencies))
+
+                queries = [f'video {index}' for index in range(max(1, count // 10))]
+                elapsed, latencies = _timed_calls(lambda query: db.search_videos(query, limit=50), queries, concurrency)
+                results.append(result('db_search', concurrency, len(queries), elapsed, latencies))
+
+                pages = range(max(1, concurrency))
+                elapsed, latencies = _timed_calls(lambda _: sum(1 for _ in db.iter_recent_videos()), pages, concurrency)
+                results.append(result('db_scan_recent', concurrency, len(pages) * count, elapsed, latencies))
+
+            db.close()
+
+    return results
+
+
+def print_table(results):
+    """Print the results as an aligned table"""
+    print(f"{'benchmark':<18} {'conc':>4} {'count':>7} {'ops/sec':>10} {'MB/sec':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in results:
+        mb_per_sec = f"{row['mb_per_sec']:.2f}" if row['mb_per_sec'] is not None else '-'
+        p50 = f"{row['p50_ms']:.2f}" if row['p50_ms'] is not None else '-'
+        p95 = f"{row['p95_ms']:.2f}" if row['p95_ms'] is not None else '-'
+        print(f"{row['benchmark']:<18} {row['concurrency']:>4} {row['count']:>7} "
+              f"{row['per_sec']:>10.1f} {mb_per_sec:>8} {p50:>9} {p95:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the downloader and database offline")
+    parser.add_argument("-n", "--count", type=int, default=200, help="videos per download run")
+    parser.add_argument("--db-count", type=int, default=2000, help="videos per database run")
+    parser.add_argument("-c", "--concurrency", default="1,2,4,8",
+                        help="comma-separated concurrency levels (default: 1,2,4,8)")
+    parser.add_argument("--size-kb", type=int, default=512, help="mp4 payload size in KB")
+    parser.add_argument("--latency-ms", type=float, default=20, help="latency added to every HTTP response")
+    parser.add_argument("--skip-downloads", action="store_true", help="only run the database benchmarks")
+    parser.add_argument("--skip-db", action="store_true", help="only run the download benchmarks")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON (for regression tracking)")
+    args = parser.parse_args()
+
+    levels = [max(1, int(level)) for level in args.concurrency.split(',') if level.strip()]
+    payload_size = args.size_kb * 1024
+
+    # The downloader logs every video; keep the benchmark output to the table
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.NullHandler()])
+
+    results = []
+    if not args.skip_downloads:
+        with serve(payload_size, args.latency_ms / 1000) as server_url:
+            for level in levels:
+                results.append(bench_downloads(server_url, args.count, level, payload_size))
+    if not args.skip_db:
+        for level in levels:
+            results.extend(bench_database(args.db_count, level, payload_size))
+
+    print_table(results)
+
+    if args.json:
+        report = {
+            'timestamp': time.time(),
+            'settings': {
+                'count': args.count,
+                'db_count': args.db_count,
+                'payload_bytes': payload_size,
+                'latency_ms': args.latency_ms,
+            },
+            'results': results,
+        }
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+"""
+Startup time benchmark
+Measures how long short commands take to start (wall time of the whole process) and
+which imports dominate it, using python -X importtime
+
+The commands run from a scratch copy of the entry point and sources, next to a
+copy of the archive database (TikTokVault/outputs/tiktok_videos.db, if there is
+one): opening the database initializes it, creating it when it is missing, so
+the real archive is never written to.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+DATABASE = Path("TikTokVault") / "outputs" / "tiktok_videos.db"
+
+
+def commands(root):
+    """(label, arguments after the interpreter, checked against the budget) for a tree at root"""
+    runner = str(root / "run_downloader.py")
+    src = str(root / "TikTokVault" / "src")
+    return [
+        ("python (baseline)", ["-c", "pass"], False),
+        ("--help", [runner, "--help"], False),
+        ("db stats", [runner, "db", "stats"], True),
+        ("db recent 5", [runner, "db", "recent", "5"], True),
+        ("import TikTokDL", ["-c", f"import sys; sys.path.insert(0, {src!r}); import TikTokDL"], False),
+    ]
+
+
+def scratch_tree(target):
+    """
+    Copy the entry point, the sources and the archive database to target
+
+    Args:
+        target: Empty directory
+
+    Returns:
+        Path: target
+    """
+    target = Path(target)
+    shutil.copy2(ROOT / "run_downloader.py", target)
+    shutil.copytree(ROOT / "TikTokVault" / "src", target / "TikTokVault" / "src",
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    (target / DATABASE).parent.mkdir(parents=True)
+    # The -wal file holds commits not checkpointed into the main file yet
+    for suffix in ("", "-wal"):
+        source = ROOT / DATABASE.with_name(DATABASE.name + suffix)
+        if source.exists():
+            shutil.copy2(source, target / DATABASE.with_name(DATABASE.name + suffix))
+    return target
+
+
+# Installed code runs from cached bytecode: without .pyc files every run would
+# also pay for compiling the modules, so PYTHONDONTWRITEBYTECODE is dropped
+ENV = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+
+
+def run(args, cwd):
+    """Run the interpreter with `args` in cwd and return (seconds, stderr)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            cwd=cwd, env=ENV, text=True, encoding='utf-8', errors='replace')
+    return time.perf_counter() - start, result.stderr
+
+
+def slowest_imports(args, cwd, limit, depth=2):
+    """
+    Imports with the largest cumulative time
+
+    Args:
+        args: Interpreter arguments
+        cwd: Working directory
+        limit: Number of imports
+        depth: Deepest nesting level reported (1: imported by the script itself)
+
+    Returns:
+        list: (microseconds, module) pairs, slowest first
+    """
+    _, stderr = run(["-X", "importtime"] + args, cwd)
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        module = parts[2]
+        # importtime indents each nesting level by two spaces
+        level = (len(module) - len(module.lstrip(" ")) + 1) // 2
+        if level <= depth:
+            imports.append((int(parts[1]), module.strip()))
+    return sorted(imports, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark command startup time")
+    parser.add_argument("-n", "--repeat", type=int, default=10, help="runs per command")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports shown per command")
+    parser.add_argument("--budget-ms", type=float, default=100,
+                        help="fail if the median of a db command exceeds this (default: 100)")
+    args = parser.parse_args()
+
+    failed = []
+
+    with tempfile.TemporaryDirectory() as scratch:
+        root = scratch_tree(scratch)
+        run_commands = commands(root)
+
+        print(f"{'command':<20} {'median ms':>10} {'min ms':>8}")
+        for label, command, budgeted in run_commands:
+            # Warm-up: writes .pyc files and initializes the database schema if needed
+            run(command, root)
+            times = [run(command, root)[0] * 1000 for _ in range(args.repeat)]
+            median = statistics.median(times)
+            flag = ""
+            if budgeted and median > args.budget_ms:
+                failed.append(label)
+                flag = f"  over {args.budget_ms:.0f} ms budget"
+            print(f"{label:<20} {median:>10.1f} {min(times):>8.1f}{flag}")
+
+        for label, command, _ in run_commands[1:]:
+            print(f"\nSlowest imports: {label}")
+            for microseconds, module in slowest_imports(command, root, args.top):
+                print(f"  {microseconds / 1000:8.1f} ms  {module}")
+
+    if failed:
+        print(f"\nOver budget: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,14 +19,31 @@ def show_help():
     print("🎬 TikTok Downloader - Usage:")
     print("\nDOWNLOAD VIDEOS:")
     print("  python run_downloader.py                    # Interactive mode")
-    print("  python run_downloader.py <filename>         # Download from specific file")
+    print("  python run_downloader.py <filename>         # Download from specific file (.txt, .csv, .jsonl)")
+    print("  cat urls.txt | python run_downloader.py -   # Read URLs from stdin")
+    print("  python run_downloader.py --resume <session> # Resume an interrupted session")
+    print("  python run_downloader.py <file> --profile   # Profile the run (pstats + top functions in outputs/logs)")
+    print("  python run_downloader.py <file> --profile-sampler  # Also sample stacks (.collapsed for flame graphs)")
     print("\nVIEW DATABASE:")
     print("  python run_downloader.py db                 # Interactive database viewer")
     print("  python run_downloader.py db stats           # Show statistics")
+    print("  python run_downloader.py db rebuild-stats   # Recompute statistics (consistency check)")
     print("  python run_downloader.py db recent [N]      # Show N recent videos")
-    print("  python run_downloader.py db search <query>  # Search videos")
+    print("  python run_downloader.py db search <query> [field] [page]  # Search videos (word, pref*, \"a phrase\")")
+    print("  python run_downloader.py db reindex         # Rebuild the search and hashtag indexes")
+    print("  python run_downloader.py db compact         # Compress metadata of older databases")
+    print("  python run_downloader.py db dedup           # Hash videos and store identical files once")
+    print("  python run_downloader.py db relayout [layout] # Move files into flat/creator/date/hash folders")
+    print("  python run_downloader.py db quota [--enforce] # Show disk usage vs budgets (evict files over budget)")
+    print("  python run_downloader.py db priority <id> <N> # Keep a video's file longer (higher N) or shorter")
+    print("  python run_downloader.py db import [dir...] # Import .info.json files (default: outputs)")
+    print("  python run_downloader.py db export <file>   # Export to .parquet/.arrow/.csv (see db export -h)")
     print("  python run_downloader.py db creator <name>  # Show creator's videos")
     print("  python run_downloader.py db video <id>      # Show video details")
+    print("  python run_downloader.py db tag <hashtag>   # Show videos with a hashtag")
+    print("  python run_downloader.py db tags [N]        # Show the N most used hashtags")
+    print("  python run_downloader.py db failures [N]    # Show the N most recent failed downloads")
+    print("  python run_downloader.py db <command> --profile  # Profile any db command")
 
 
 if __name__ == "__main__":
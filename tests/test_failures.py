@@ -0,0 +1,72 @@
+"""
+Tests for the failed downloads table and its negative cache
+"""
+
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "TikTokVault" / "src"))
+
+from database import TikTokDatabase
+from retry import UNAVAILABLE
+
+DESKTOP_URL = 'https://www.tiktok.com/@x/video/1234567890'
+MOBILE_URL = 'https://m.tiktok.com/v/1234567890.html'
+SHORT_LINK = 'https://vm.tiktok.com/ZMabcdef/'
+
+
+class FailedDownloadsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = Path(self.tmp.name) / "test.db"
+        self.db = TikTokDatabase(self.db_path)
+        self.addCleanup(self.db.close)
+
+    def test_url_variants_of_one_video_share_a_failure(self):
+        self.db.add_failed_download(DESKTOP_URL, 'Video not found', UNAVAILABLE, 2, 3600)
+        self.db.add_failed_download(MOBILE_URL, 'Video not found', UNAVAILABLE, 1, 3600)
+
+        failures = self.db.get_failed_downloads()
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0]['video_id'], '1234567890')
+        self.assertEqual(failures[0]['attempts'], 3)
+        self.assertIsNotNone(self.db.get_active_failure('https://www.tiktok.com/embed/v2/1234567890'))
+
+        self.db.clear_failed_download('https://www.tiktok.com/@X/video/1234567890')
+        self.assertIsNone(self.db.get_active_failure(MOBILE_URL))
+
+    def test_links_without_id_are_keyed_by_url(self):
+        self.db.add_failed_download(SHORT_LINK, 'Unable to resolve', UNAVAILABLE, 1, 3600)
+        self.assertIsNotNone(self.db.get_active_failure(SHORT_LINK))
+        self.assertIsNone(self.db.get_active_failure(DESKTOP_URL))
+
+    def test_rows_of_one_video_are_merged_on_upgrade(self):
+        # Failures written when canonical URLs kept the creator handle
+        self.db.close()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('DROP INDEX idx_failed_downloads_video_key')
+            conn.executemany('''
+                INSERT INTO failed_downloads (url, video_id, error, error_class, attempts,
+                                              first_failed_at, last_failed_at, next_retry_at)
+                VALUES (?, '1234567890', 'Video not found', ?, 1, ?, ?, '2999-01-01T00:00:00')
+            ''', [('https://www.tiktok.com/@x/video/1234567890', UNAVAILABLE, '2026-01-01', '2026-01-01'),
+                  ('https://www.tiktok.com/@/video/1234567890', UNAVAILABLE, '2026-02-01', '2026-02-01')])
+            conn.execute('PRAGMA user_version = 1')
+
+        db = TikTokDatabase(self.db_path)
+        self.addCleanup(db.close)
+        failures = db.get_failed_downloads()
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0]['attempts'], 2)
+        self.assertEqual(failures[0]['first_failed_at'], '2026-01-01')
+        self.assertEqual(failures[0]['url'], 'https://www.tiktok.com/@_/video/1234567890')
+        self.assertEqual(db.get_statistics()['failed_downloads'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
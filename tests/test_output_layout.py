@@ -0,0 +1,73 @@
+"""
+Tests for moving archived files between output layouts
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "TikTokVault" / "src"))
+
+from database import TikTokDatabase
+from output_layout import HASH, OutputLayout, migrate_layout
+
+
+def make_video(index, file_path):
+    """Info dict as the downloader stores it ('_filename' is the downloaded file)"""
+    video_id = str(7100000000000000000 + index)
+    return {
+        'id': video_id,
+        'webpage_url': f'https://www.tiktok.com/@creator{index}/video/{video_id}',
+        'title': f'Video {index}',
+        'uploader': f'creator{index}',
+        'upload_date': '20240101',
+        '_filename': file_path,
+    }
+
+
+class MigrateLayoutTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.videos_dir = Path(self.tmp.name) / "videos"
+        self.videos_dir.mkdir()
+        self.db = TikTokDatabase(Path(self.tmp.name) / "test.db")
+        self.addCleanup(self.db.close)
+
+    def test_moves_downloaded_files_and_sidecars(self):
+        for index in range(3):
+            stem = self.videos_dir / f"creator{index}_Video {index}_{7100000000000000000 + index}"
+            for suffix in ('.mp4', '.info.json', '.jpg'):
+                stem.with_name(stem.name + suffix).write_bytes(b'data')
+            self.db.add_video(make_video(index, str(stem) + '.mp4'))
+        # A row without a recorded file (evicted or written by an older version)
+        self.db.add_video(make_video(3, ''))
+
+        layout = OutputLayout(self.videos_dir, HASH)
+        stats = migrate_layout(self.db, layout, id_filenames=True)
+
+        self.assertEqual((stats['videos'], stats['moved'], stats['files']), (4, 3, 9))
+        self.assertEqual(stats['no_file'], 1)
+        for index in range(3):
+            video_id = str(7100000000000000000 + index)
+            file_path = Path(self.db.get_video_by_id(video_id)['file_path'])
+            self.assertEqual(file_path, self.videos_dir / layout.relative_dir(video_id) / f"{video_id}.mp4")
+            self.assertTrue(file_path.exists())
+            self.assertTrue(file_path.with_name(f"{video_id}.info.json").exists())
+        self.assertEqual([path for path in self.videos_dir.iterdir() if path.is_file()], [])
+
+    def test_dry_run_moves_nothing(self):
+        video_file = self.videos_dir / "creator0_Video 0_7100000000000000000.mp4"
+        video_file.write_bytes(b'data')
+        self.db.add_video(make_video(0, str(video_file)))
+
+        stats = migrate_layout(self.db, OutputLayout(self.videos_dir, HASH), dry_run=True)
+
+        self.assertEqual(stats['moved'], 1)
+        self.assertTrue(video_file.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
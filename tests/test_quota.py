@@ -0,0 +1,95 @@
+"""
+Tests for disk quota accounting with the content-addressed store
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "TikTokVault" / "src"))
+
+from content_store import object_path
+from database import TikTokDatabase
+from quota import DiskQuota
+
+SHARED_HASH = 'ab' * 32
+
+
+def make_video(index, file_path, size, creator, content_hash=None):
+    """Info dict as the downloader stores it ('_filename' is the downloaded file)"""
+    video_id = str(7100000000000000000 + index)
+    return {
+        'id': video_id,
+        'webpage_url': f'https://www.tiktok.com/@{creator}/video/{video_id}',
+        'title': f'Video {index}',
+        'uploader': creator,
+        'upload_date': '20240101',
+        'filesize': size,
+        'content_hash': content_hash,
+        '_filename': str(file_path),
+    }
+
+
+class SharedPayloadQuotaTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        self.videos_dir = root / "videos"
+        self.videos_dir.mkdir()
+        self.store_root = root / "store"
+        self.db = TikTokDatabase(root / "test.db")
+        self.addCleanup(self.db.close)
+
+        # Two videos of one creator hardlinked to one 1000 B stored object
+        self.stored = object_path(self.store_root, SHARED_HASH, '.mp4')
+        self.stored.parent.mkdir(parents=True)
+        self.stored.write_bytes(b'x' * 1000)
+        self.links = []
+        for index in range(2):
+            link = self.videos_dir / f"shared_{index}.mp4"
+            os.link(self.stored, link)
+            self.links.append(link)
+            self.db.add_video(make_video(index, link, 1000, 'creator', SHARED_HASH))
+
+        # And one 500 B video of its own, kept longest
+        self.unique = self.videos_dir / "unique.mp4"
+        self.unique.write_bytes(b'y' * 500)
+        self.db.add_video(make_video(2, self.unique, 500, 'other'))
+        self.db.set_priority(str(7100000000000000002), 1)
+
+    def quota(self, max_vault_bytes):
+        return DiskQuota(self.db, self.videos_dir, max_vault_bytes=max_vault_bytes, store_root=self.store_root)
+
+    def test_shared_object_counts_once(self):
+        quota = self.quota(10_000)
+        self.assertEqual(quota.usage(), 1500)
+        self.assertEqual(quota.usage('creator'), 1000)
+        self.assertEqual(quota.usage('other'), 500)
+
+    def test_space_is_freed_with_the_last_link(self):
+        quota = self.quota(600)
+        self.assertEqual(quota.enforce(), 2)
+
+        # The first link freed nothing; the second took the object with it
+        self.assertEqual(quota.freed_bytes, 1000)
+        self.assertEqual(quota.usage(), 500)
+        self.assertFalse(any(link.exists() for link in self.links))
+        self.assertFalse(self.stored.exists())
+        self.assertTrue(self.unique.exists())
+
+    def test_duplicate_download_takes_no_vault_space(self):
+        quota = self.quota(10_000)
+        link = self.videos_dir / "shared_3.mp4"
+        os.link(self.stored, link)
+        self.db.add_video(make_video(3, link, 1000, 'creator', SHARED_HASH))
+        quota.record('creator', 1000, str(7100000000000000003), SHARED_HASH, duplicate=True)
+        self.assertEqual(quota.usage(), 1500)
+        self.assertEqual(quota.usage('creator'), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+Tests for download error classification
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add the src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "TikTokVault" / "src"))
+
+import retry
+
+
+class ClassifyMessageTest(unittest.TestCase):
+    def test_local_errors_are_not_unavailable(self):
+        for message in ("ERROR: Postprocessing: ffprobe and ffmpeg not found. Please install",
+                        "[Errno 2] file not found",
+                        "Output directory does not exist"):
+            self.assertEqual(retry.classify_message(message), retry.UNKNOWN, message)
+
+    def test_missing_videos_are_unavailable(self):
+        for message in ("HTTP Error 404: Not Found",
+                        "ERROR: [TikTok] 7100000000000000000: Video not found",
+                        "Page not found",
+                        "Post does not exist",
+                        "This video is private"):
+            self.assertEqual(retry.classify_message(message), retry.UNAVAILABLE, message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Regression tests for journaling a session from a streamed URL file
+"""
+
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "TikTokVault" / "src"))
+
+from database import TikTokDatabase
+from url_sources import iter_urls
+from url_utils import UrlCanonicalizer, canonicalize_url
+
+SHORT_LINK = 'https://vm.tiktok.com/ZMabcdef/'
+RESOLVED = 'https://www.tiktok.com/@creator/video/7418920193847251205'
+FULL_URL = 'https://www.tiktok.com/@other/video/7418920193847251206'
+
+
+class AddSessionUrlsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = TikTokDatabase(Path(self.tmp.name) / "test.db")
+        self.addCleanup(self.db.close)
+
+    def test_short_link_in_streamed_file_does_not_deadlock(self):
+        # The canonicalizer caches the resolution in the database while
+        # add_session_urls is consuming it (run_batch's pipeline)
+        url_file = Path(self.tmp.name) / "urls.txt"
+        url_file.write_text(f"{SHORT_LINK}\n{FULL_URL}\n", encoding='utf-8')
+        canonicalizer = UrlCanonicalizer(self.db)
+
+        result = []
+        with mock.patch('url_utils.resolve_short_link', return_value=RESOLVED):
+            worker = threading.Thread(
+                target=lambda: result.append(self.db.add_session_urls(
+                    'session', canonicalizer.iter_canonical(iter_urls(url_file)))),
+                daemon=True)
+            worker.start()
+            worker.join(timeout=10)
+
+        self.assertFalse(worker.is_alive(), "add_session_urls deadlocked")
+        self.assertEqual(result, [2])
+        self.assertEqual(self.db.get_resolved_urls([SHORT_LINK]), {SHORT_LINK: canonicalize_url(RESOLVED)})
+
+    def test_batches_larger_than_batch_size(self):
+        urls = (f'https://www.tiktok.com/@creator/video/{7400000000000000000 + index}' for index in range(25))
+        self.assertEqual(self.db.add_session_urls('session', urls, batch_size=10), 25)
+        self.assertEqual(self.db.get_session_url_counts('session').get('pending'), 25)
+
+    def test_url_variants_collapse_in_the_journal(self):
+        # The canonicalizer keeps no seen-set: the journal's UNIQUE constraint dedups
+        urls = ['https://www.tiktok.com/@x/video/1234567890',
+                'https://m.tiktok.com/v/1234567890.html',
+                'https://www.tiktok.com/@X/video/1234567890?is_from_webapp=1',
+                FULL_URL]
+        canonical = UrlCanonicalizer(self.db).iter_canonical(urls)
+        self.assertEqual(self.db.add_session_urls('session', canonical), 2)
+
+    def test_follow_waits_for_a_growing_journal(self):
+        complete = threading.Event()
+        self.db.add_session_urls('session', [FULL_URL])
+        pending = self.db.iter_session_urls('session', follow=complete)
+
+        self.assertEqual(next(pending), FULL_URL)
+        self.assertIsNone(next(pending))  # caught up, journal still being written
+
+        self.db.add_session_urls('session', [RESOLVED])
+        complete.set()
+        self.assertEqual(list(pending), [RESOLVED])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+Tests for TikTok URL canonicalization
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add the src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "TikTokVault" / "src"))
+
+from url_utils import canonicalize_url
+
+
+class CanonicalizeUrlTest(unittest.TestCase):
+    def test_video_variants_share_one_canonical_url(self):
+        variants = [
+            "https://www.tiktok.com/@x/video/1234567890",
+            "https://www.tiktok.com/@X/video/1234567890?is_from_webapp=1&sender_device=pc",
+            "https://m.tiktok.com/v/1234567890.html",
+            "https://www.tiktok.com/embed/v2/1234567890",
+            "tiktok.com/@someone.else/video/1234567890/#comments",
+        ]
+        canonical = {canonicalize_url(url) for url in variants}
+        self.assertEqual(canonical, {"https://www.tiktok.com/@_/video/1234567890"})
+
+    def test_urls_without_id_are_normalized(self):
+        self.assertEqual(canonicalize_url("http://tiktok.com/t/ZT8abc/"), "https://www.tiktok.com/t/ZT8abc")
+
+
+if __name__ == "__main__":
+    unittest.main()